@@ -1,18 +1,44 @@
 from ._version import __version__
 
 from .models import Message, Tool, AgentContext
-from .agent import Agent, AgentEvent
+from .affinity import AffinityRouter, FileMembership, HashRing, StaticMembership
+from .agent import Agent
+from .events import AgentEvent, EventBus, JsonlSink, OtlpSink
+from .cancellation import CancellationToken, RunCancelled
+from .connections import HttpPoolPolicy, SharedHttpClient
 from .context import ContextManager, SimpleContextManager
+from .routing import ModelRoute, ModelRouter
+from .leases import LeasePolicy, LeaseUnavailable, StaleLeaseError
+from .scheduler import LLMScheduler, get_scheduler, set_scheduler
 from .tools.tool_parser import tool_from_fn
 
 __all__ = [
     "__version__",
     "Agent",
+    "AffinityRouter",
+    "FileMembership",
+    "HashRing",
+    "StaticMembership",
     "AgentEvent",
+    "EventBus",
+    "JsonlSink",
+    "OtlpSink",
     "AgentContext",
+    "CancellationToken",
+    "RunCancelled",
     "Message",
     "Tool",
+    "HttpPoolPolicy",
+    "SharedHttpClient",
     "ContextManager",
     "SimpleContextManager",
+    "ModelRoute",
+    "ModelRouter",
+    "LeasePolicy",
+    "LeaseUnavailable",
+    "StaleLeaseError",
+    "LLMScheduler",
+    "get_scheduler",
+    "set_scheduler",
     "tool_from_fn"
 ]
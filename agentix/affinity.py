@@ -0,0 +1,141 @@
+from __future__ import annotations
+import bisect
+import hashlib
+import os
+import time
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+
+class MembershipSource(Protocol):
+    """
+    Origen de la lista de workers vigente: {nodo: peso}.
+    """
+    def members(self) -> Dict[str, int]: ...
+
+
+class StaticMembership(MembershipSource):
+    def __init__(self, nodes: List[str], weights: Optional[Dict[str, int]] = None):
+        self._members = {node: (weights or {}).get(node, 1) for node in nodes}
+
+    def members(self) -> Dict[str, int]:
+        return dict(self._members)
+
+
+def parse_members(text: str) -> Dict[str, int]:
+    """
+    Un nodo por línea, con peso opcional ("worker-1 2"); se ignoran líneas vacías y comentarios (#).
+    """
+    members: Dict[str, int] = {}
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        node, _, weight = line.partition(" ")
+        members[node] = int(weight.strip() or 1)
+    return members
+
+
+class FileMembership(MembershipSource):
+    """
+    Lista de workers en un archivo (p.ej. generado por el orquestador). Se relee cuando cambia
+    su mtime, como mucho cada `reload_interval` segundos; si no se puede leer se mantiene la última.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self._members: Dict[str, int] = {}
+        self._mtime: Optional[float] = None
+        self._checked: Optional[float] = None
+
+    def members(self) -> Dict[str, int]:
+        now = self.clock()
+        if self._checked is not None and now - self._checked < self.reload_interval:
+            return self._members
+        self._checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime != self._mtime:
+                with open(self.path, encoding="utf-8") as f:
+                    self._members = parse_members(f.read())
+                self._mtime = mtime
+        except OSError:
+            pass
+        return self._members
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Anillo de hashing consistente con nodos virtuales (`vnodes` puntos por unidad de peso).
+    Al agregar o quitar un nodo solo cambian de dueño las claves de ese nodo (~1/N del total).
+    """
+
+    def __init__(self, members: Optional[Dict[str, int]] = None, vnodes: int = 160):
+        self.vnodes = vnodes
+        self.members: Dict[str, int] = dict(members or {})
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        ring: List[Tuple[int, str]] = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node, weight in self.members.items()
+            for i in range(self.vnodes * max(1, weight))
+        )
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def add(self, node: str, weight: int = 1) -> None:
+        self.members[node] = weight
+        self._rebuild()
+
+    def remove(self, node: str) -> None:
+        if self.members.pop(node, None) is not None:
+            self._rebuild()
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def session_key(user_id: str, session_id: str) -> str:
+    return f"{user_id}/{session_id}"
+
+
+class AffinityRouter:
+    """
+    Asigna cada sesión (user_id, session_id) a un worker, siempre el mismo mientras la membresía
+    no cambie: así los caches en proceso (sesiones, vistas, tools) aciertan y los leases de sesión
+    casi no compiten. El anillo se reconstruye solo cuando la membresía cambia.
+    """
+
+    def __init__(self, membership: MembershipSource, vnodes: int = 160):
+        self.membership = membership
+        self.vnodes = vnodes
+        self._ring = HashRing(vnodes=vnodes)
+        self.rebuilds = 0
+
+    @property
+    def ring(self) -> HashRing:
+        members = self.membership.members()
+        if members != self._ring.members:
+            self._ring = HashRing(members, vnodes=self.vnodes)
+            self.rebuilds += 1
+        return self._ring
+
+    def route(self, user_id: str, session_id: str) -> str:
+        node = self.ring.node_for(session_key(user_id, session_id))
+        if node is None:
+            raise LookupError("No hay workers en la membresía")
+        return node
+
+    def owns(self, node: str, user_id: str, session_id: str) -> bool:
+        return self.route(user_id, session_id) == node
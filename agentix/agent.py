@@ -1,24 +1,41 @@
 from __future__ import annotations
 import json
 from textwrap import dedent
-from typing import Any, Dict, Optional, Callable, Awaitable, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Callable, Awaitable, Union
 
 from datetime import datetime
 
-from pydantic import BaseModel
-
 from agentix.utils.collections import flatten
-from .prompts.summarization import  SUMMARIZATION_SYSTEM_PROMPT, META_SUMMARIZATION_PROMPT
+from .runs import RunResult, StepBudgetPolicy, sum_usage
+from .routing import AUX_SUMMARIZATION, ModelRoute, ModelRouter, TurnInfo
+from .scheduler import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, LLMScheduler, estimate_request_tokens, get_scheduler
+from .summarization import IncrementalSummarizer, SummaryPolicy, ordered as ordered_summaries
 
 from .utils.serializer import to_json
-from .models import Session, ToolResultMessage, Tool, ToolCall, AgentContext, SystemMessage, UserMessage, AssistantMessage, SessionSummary, MessageType
+from .tools.encoding import encode_result
+from .models import RunCheckpoint, Session, ToolResultMessage, Tool, ToolCall, AgentContext, SystemMessage, UserMessage, AssistantMessage, SessionSummary, MessageType, ResultEncoding
 from .agent_repository import AgentRepository
-from .context import ContextManager
+from .memory import UserMemoryManager
+from .context import ContextManager, LLMInput
 from .tools.litellm_formatter import tool_to_dict
+from .tools.cache import ToolCache
+from .speculation import Speculation, SpeculationPolicy, SpeculationStats
+from .results import READ_RESULT_TOOL, ResultOffloader, ResultSizePolicy, ResultStore
+from .compaction import CompactionPolicy, compact_runs
+from . import events
+from .events import AgentEvent, EventBus, EventListener, EventType
+from .usage import UsageAccountant, UsageBudget
+from .leases import LeaseManager, LeasePolicy
+from .streaming import ToolCallPipeline, collect_stream
+from .connections import SharedHttpClient
+from .cancellation import CANCELLED_MESSAGE, CancellationToken, RunCancelled
 import logging
 import inspect
 import litellm
+import time
 import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
@@ -84,14 +101,93 @@ def _parse_assistant_response(run_id: str, response: litellm.ModelResponse) -> A
         tool_calls=tool_calls
     )
 
-class AgentEvent(BaseModel):
-    type: str
-    message: Optional[str] = None
+# Run en curso: permite atribuir las llamadas auxiliares (resúmenes, memoria) a su run/sesión/usuario
+_current_run: ContextVar[Optional[AgentContext]] = ContextVar("agentix_current_run", default=None)
+# Cancelación / deadline del run en curso: la consultan las llamadas al LLM y las tools
+_current_cancellation: ContextVar[Optional[CancellationToken]] = ContextVar("agentix_current_cancellation", default=None)
+# Fencing token del lease de sesión del run en curso (None = sin leases)
+_current_lease_token: ContextVar[Optional[int]] = ContextVar("agentix_current_lease_token", default=None)
+
+
+async def _iterate(items: List[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+def _is_nav(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("nav"))
+
+
+def _nav_result(result: Dict[str, Any], before: LLMInput, after: LLMInput) -> str:
+    # Resultado compacto de navegación: solo la pantalla nueva y las tools que cambiaron; las
+    # instrucciones de la vista ya llegan en el mensaje de sistema del siguiente paso.
+    out: Dict[str, Any] = {"status": "ok", "nav": result.get("nav")}
+    if after.screen is not None:
+        out["screen"] = after.screen
+    previous = {t.name for t in before.tools}
+    current = [t.name for t in after.tools]
+    if set(current) != previous:
+        out["tools"] = current
+    return json.dumps(out, ensure_ascii=False)
+
+
+def _is_nav_step(message: AssistantMessage, run_messages: list[MessageType]) -> bool:
+    """
+    Paso de navegación pura: sin texto y con todas sus tool calls resueltas como navegación.
+    """
+    if message.content or not message.tool_calls:
+        return False
+    nav_ids = {m.tool_call_id for m in run_messages if isinstance(m, ToolResultMessage) and m.meta.get("nav")}
+    return all(tc.tool_call_id in nav_ids for tc in message.tool_calls)
+
+
+def _collapse_nav_steps(run_messages: list[MessageType]) -> list[MessageType]:
+    """
+    Quita del historial los pasos de navegación pura (la vista actual ya queda en el stack),
+    manteniéndolos en la auditoría.
+    """
+    nav_call_ids = {
+        tc.tool_call_id
+        for m in run_messages if isinstance(m, AssistantMessage) and m.meta.get("nav")
+        for tc in m.tool_calls
+    }
+    if not nav_call_ids:
+        return run_messages
+    return [
+        m for m in run_messages
+        if not (isinstance(m, AssistantMessage) and m.meta.get("nav"))
+        and not (isinstance(m, ToolResultMessage) and m.tool_call_id in nav_call_ids)
+    ]
+
+
+def _completion_cost(response: litellm.ModelResponse) -> float:
+    try:
+        return litellm.completion_cost(completion_response=response) or 0.0
+    except Exception:
+        # Modelos sin precio conocido (locales, proxies...)
+        return 0.0
+
+
+def _pending_assistant(run_messages: list[MessageType]) -> Optional[AssistantMessage]:
+    """
+    En un run reanudado, el último AssistantMessage si aún falta procesarlo (respuesta final
+    no cerrada o tool calls sin resultado).
+    """
+    done = {m.tool_call_id for m in run_messages if isinstance(m, ToolResultMessage)}
+    for m in reversed(run_messages):
+        if isinstance(m, AssistantMessage):
+            if m.finish_reason != "tool_calls" or any(tc.tool_call_id not in done for tc in m.tool_calls):
+                return m
+            return None
+    return None
+
+
+def _final_content(run_messages: list[MessageType]) -> Optional[str]:
+    for m in reversed(run_messages):
+        if isinstance(m, AssistantMessage) and m.finish_reason in ("stop", "max_steps", "budget", "cancelled"):
+            return m.content
+    return None
 
-EventListener = Union[
-    Callable[[int], None],
-    Callable[[int], Awaitable[None]],
-]
 
 class Agent:
     """
@@ -107,7 +203,25 @@ class Agent:
         max_interactions_in_memory: int = 15,
         max_summaries_in_context = 5,
         interations_retain: int = 5,
-        event_listener: Optional[EventListener] = None
+        event_listener: Optional[EventListener] = None,
+        summary_policy: Optional[SummaryPolicy] = None,
+        model_router: Optional[ModelRouter] = None,
+        user_memory: Optional[UserMemoryManager] = None,
+        checkpoint_runs: bool = True,
+        step_budget: Optional[StepBudgetPolicy] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        tool_cache: Optional[ToolCache] = None,
+        speculation: Optional[SpeculationPolicy] = None,
+        result_policy: Optional[ResultSizePolicy] = None,
+        result_store: Optional[ResultStore] = None,
+        compaction: Optional[CompactionPolicy] = None,
+        event_bus: Optional[EventBus] = None,
+        usage_budget: Optional[UsageBudget] = None,
+        lease_policy: Optional[LeasePolicy] = None,
+        eager_tools: bool = False,
+        http_pool: Optional[SharedHttpClient] = None,
+        run_timeout: Optional[float] = None,
+        result_encoding: Optional[ResultEncoding] = None,
     ):
         self.name = name
         self.max_interactions_in_memory = max_interactions_in_memory
@@ -115,17 +229,62 @@ class Agent:
         self.repo = repository
         self.cm = context_manager
         self.max_steps = max_steps
-        self.model = model
+        if model_router is None and not model:
+            raise ValueError("El Agent necesita `model` o un `model_router`")
+        # Sin router explícito todo (turnos y tareas auxiliares) usa `model`
+        self.model_router = model_router or ModelRouter(default=ModelRoute(name="main", model=model))
+        # Compatibilidad: el modelo de la ruta por defecto
+        self.model = self.model_router.default.model
         self.event_listener = event_listener
+        self.events = event_bus or EventBus()
+        if event_listener is not None:
+            # Compatibilidad: el listener único pasa a ser un suscriptor más del bus
+            self.events.subscribe(event_listener)
         self.max_summaries_in_context = max_summaries_in_context
+        self.user_memory = user_memory
+        self.checkpoint_runs = checkpoint_runs
+        self.step_budget = step_budget or StepBudgetPolicy()
+        # None = scheduler compartido del proceso (todos los agents compiten por los mismos límites)
+        self._scheduler = scheduler
+        # Solo afecta a tools declaradas con `cache` / `invalidates`
+        self.tool_cache = tool_cache or ToolCache()
+        # Solo afecta a vistas que declaran `speculate`; max_calls=0 lo desactiva
+        self.speculation = speculation or SpeculationPolicy()
+        self.speculation_stats = SpeculationStats()
+        # Resultados de tools por encima del tope quedan fuera del contexto (preview + handle).
+        # Sin store explícito se usa el del repositorio si tiene uno (persistente); si no, uno en memoria
+        result_store = result_store or getattr(repository, "result_store", None)
+        self.results = ResultOffloader(store=result_store, policy=result_policy, ask=self._ask_llm)
+        self.compaction = compaction or CompactionPolicy()
+        self.usage = UsageAccountant(repository, budget=usage_budget)
+        # Con lease_policy un solo run a la vez por sesión, también entre procesos/nodos
+        self.leases = LeaseManager(repository, lease_policy) if lease_policy is not None else None
+        # Pide los pasos con stream y ejecuta cada tool call read_only apenas sus argumentos están completos
+        self.eager_tools = eager_tools
+        # Pool HTTP compartido por todas las llamadas a litellm (keep-alive, HTTP/2, warm-up); None = el de litellm
+        self.http_pool = http_pool
+        # Deadline por defecto de cada run (segundos); run_detailed acepta uno propio y un CancellationToken
+        self.run_timeout = run_timeout
+        # Serialización de resultados de tools sin `encoding` propio; None = JSON tal cual
+        self.result_encoding = result_encoding
+        self.summarizer = IncrementalSummarizer(
+            ask=self._ask_llm,
+            policy=summary_policy or SummaryPolicy(
+                chunks_per_period=max_summaries_in_context,
+                periods_per_session=max_summaries_in_context,
+            ),
+            send_event=self._send_event,
+        )
 
 
-    async def _send_event(self, type: str, message: Optional[str] = None):
-        if self.event_listener is None:
+    async def _send_event(self, type: EventType, message: Optional[str] = None,
+                          agent_context: Optional[AgentContext] = None, **data: Any):
+        if not self.events.subscriptions:
             return
-        result = self.event_listener(AgentEvent(type=type))
-        if inspect.isawaitable(result):
-            await result
+        event = AgentEvent(type=type, message=message, data=data)
+        if agent_context is not None:
+            event.run_id, event.session_id, event.user_id = agent_context.run_id, agent_context.session_id, agent_context.user_id
+        await self.events.publish(event)
 
 
     async def _invoke_tool(self, tool: Tool, params: dict, agent_context: AgentContext | None = None):
@@ -135,100 +294,490 @@ class Agent:
         sig = inspect.signature(tool.fn)
         kwargs = dict(params)
 
-        # Si la función declara AgentContext, inyectarlo
+        # Si la función declara AgentContext o CancellationToken, inyectarlos
+        cancellation = _current_cancellation.get()
         for pname, param in sig.parameters.items():
             if param.annotation is AgentContext:
                 kwargs[pname] = agent_context
-                break
+            elif param.annotation is CancellationToken:
+                kwargs[pname] = cancellation or CancellationToken()
 
         result = tool.fn(**kwargs)
         if hasattr(result, "__await__"):
-            result = await result
+            result = await (cancellation.guard(result) if cancellation is not None else result)
         return result
     
+    async def _step(self, agent_context: AgentContext, session_data: Session, history: list[MessageType],
+                    run_messages: list[MessageType], llm_input: LLMInput, user_memory: str, step: int,
+                    tool_choice: str = "auto", notice: str = "",
+                    on_tool_call: Optional[Callable[[ToolCall], None]] = None) -> AssistantMessage:
+        full_system_message = await self._add_session_data(llm_input.system, session=session_data, user_memory=user_memory)
+        if notice:
+            full_system_message = f"{full_system_message}\n---\n{notice}"
+        system_msg = SystemMessage(run_id=agent_context.run_id, content=full_system_message)
+        tools = llm_input.tools
+        if any(m.meta.get("result_handle") for m in run_messages) or any(m.meta.get("result_handle") for m in history):
+            # Hay resultados guardados fuera del contexto: el modelo puede paginarlos
+            tools = tools + [self.results.tool]
+        tool_specs = list(map(tool_to_dict, tools))
+        messages = list(map(lambda m: m.to_wire(), ([system_msg] + history + run_messages)))
+
+        route = self.model_router.select(TurnInfo(agent_context=agent_context, step=step, tools=tools))
+        with langfuse.start_as_current_observation(name=route.model, as_type="generation",
+                                                   completion_start_time=datetime.now(),
+                                                   input=_format_llm_input(messages, tool_specs),
+                                                   model=route.model,
+                                                   metadata={"route": route.name}) as generation_span:
+            raw = await self._completion(route, agent_context=agent_context, messages=messages, tools=tool_specs,
+                                         tool_choice=tool_choice, on_tool_call=on_tool_call)
+            assistant_message = _parse_assistant_response(run_id=agent_context.run_id, response=raw)
+            generation_span.update(output=raw, usage_details=assistant_message.usage_data)
+        return assistant_message
+
+    async def _run_tool_calls(self, assistant_message: AssistantMessage, llm_input: LLMInput,
+                              agent_context: AgentContext, run_messages: list[MessageType],
+                              speculation: Optional[Speculation] = None,
+                              pipeline: Optional[ToolCallPipeline] = None) -> tuple[LLMInput, bool]:
+        """
+        Ejecuta las tool calls del paso (saltando las que ya tienen resultado en un run reanudado).
+        Devuelve el LLMInput vigente y si el paso fue solo navegación.
+        """
+        async def record(result_msg: ToolResultMessage) -> None:
+            run_messages.append(result_msg)
+            # Con el estado que dejó la tool (navegación y view_state): al reanudar no se vuelve a ejecutar
+            await self._checkpoint(agent_context, [result_msg], state=self.cm.snapshot(agent_context))
+
+        if pipeline is not None and pipeline.dispatched:
+            # Las lecturas ya empezaron durante el stream: se completan y se agregan en orden
+            _, llm_input, nav_only = await pipeline.result(assistant_message.tool_calls, record)
+        else:
+            done = {m.tool_call_id for m in run_messages if isinstance(m, ToolResultMessage)}
+            _, llm_input, nav_only = await self._execute_tool_calls(_iterate(assistant_message.tool_calls), llm_input,
+                                                                    agent_context, speculation, done, record)
+        self.cm.invalidate(agent_context)
+        return llm_input, nav_only
+
+    async def _execute_tool_calls(self, tool_calls: AsyncIterator[ToolCall], llm_input: LLMInput,
+                                  agent_context: AgentContext, speculation: Optional[Speculation] = None,
+                                  done: frozenset = frozenset(),
+                                  on_result: Optional[Callable[[ToolResultMessage], Awaitable[None]]] = None
+                                  ) -> tuple[List[ToolResultMessage], LLMInput, bool]:
+        """
+        Ejecuta en orden las tool calls que van llegando. Devuelve los resultados, el LLMInput
+        vigente y si fueron solo navegación.
+        """
+        tools_by_name = {READ_RESULT_TOOL: self.results.tool, **{t.name: t for t in llm_input.tools}}
+        results: List[ToolResultMessage] = []
+        nav_only = True
+        seen = False
+        async for tool_call in tool_calls:
+            seen = True
+            if tool_call.tool_call_id in done:
+                nav_only = False
+                continue
+            result_msg, result = await self._execute_tool_call(tool_call, tools_by_name, agent_context, speculation)
+            if not _is_nav(result):
+                self.cm.record_call(agent_context, tool_call.function_name)
+            if _is_nav(result) and await self.cm.handle_nav(agent_context, result):
+                # La vista cambió: las tool calls siguientes del mismo paso se resuelven
+                # contra la nueva vista y el resultado ya le presenta al modelo su contexto.
+                previous, llm_input = llm_input, self.cm.build(agent_context)
+                if speculation is not None:
+                    # Lo adelantado era de la vista anterior: una tool homónima de la nueva no lo recibe
+                    speculation.discard()
+                tools_by_name = {READ_RESULT_TOOL: self.results.tool, **{t.name: t for t in llm_input.tools}}
+                result_msg.content = _nav_result(result, previous, llm_input)
+                result_msg.meta["nav"] = result
+            else:
+                nav_only = False
+            results.append(result_msg)
+            if on_result is not None:
+                await on_result(result_msg)
+        return results, llm_input, nav_only and seen
+
+    async def _restore_state(self, agent_context: AgentContext, checkpoint: RunCheckpoint) -> None:
+        # El estado de un run interrumpido no llegó a persistirse en la sesión: se toma del checkpoint
+        if checkpoint.state is not None:
+            self.cm.restore(agent_context, checkpoint.state)
+            return
+        # Checkpoints sin snapshot: solo se puede volver a aplicar la navegación
+        for m in checkpoint.messages:
+            nav = m.meta.get("nav") if isinstance(m, ToolResultMessage) else None
+            if isinstance(nav, dict):
+                await self.cm.handle_nav(agent_context, nav)
+
+    async def _checkpoint(self, agent_context: AgentContext, messages: list[MessageType], state: Optional[Any] = None) -> None:
+        if not self.checkpoint_runs:
+            return
+        try:
+            if state is None:
+                await self.repo.append_run_messages(agent_context.run_id, agent_context.session_id, agent_context.user_id, messages)
+            else:
+                await self.repo.append_run_messages(agent_context.run_id, agent_context.session_id, agent_context.user_id,
+                                                    messages, state=state)
+        except Exception as ex:
+            # Un checkpoint fallido no debe tumbar el turno; solo se pierde la capacidad de reanudar
+            logger.error(f"No se pudo guardar el checkpoint del run {agent_context.run_id}: {ex}")
+
+    async def _set_run_status(self, agent_context: AgentContext, status: str) -> None:
+        if not self.checkpoint_runs:
+            return
+        try:
+            await self.repo.set_run_status(agent_context.run_id, status)
+        except Exception as ex:
+            logger.error(f"No se pudo actualizar el estado del run {agent_context.run_id}: {ex}")
+
+    async def _execute_tool_call(self, tool_call: ToolCall, tools_by_name: Dict[str, Tool],
+                                 agent_context: AgentContext,
+                                 speculation: Optional[Speculation] = None) -> tuple[ToolResultMessage, Any]:
+        result: Any = None
+        try:
+            with langfuse.start_as_current_observation(as_type="tool", name=tool_call.function_name, input=tool_call.arguments) as tool_span:
+                tool = tools_by_name.get(tool_call.function_name)
+                if tool is None:
+                    raise ValueError(f"Tool '{tool_call.function_name}' no disponible en el contexto actual")
+                params = json.loads(tool_call.arguments or "{}")
+                await self._send_event(events.TOOL_START, tool.name, agent_context=agent_context,
+                                       tool_call_id=tool_call.tool_call_id)
+                speculated = await speculation.take(tool.name, params) if speculation is not None else None
+                if speculated is not None:
+                    content, result = speculated
+                    tool_span.update(output=content, metadata={"speculative": "hit"})
+                    source = "speculative"
+                else:
+                    content, result, cache_status = await self._resolve_tool_call(tool, params, agent_context)
+                    tool_span.update(output=content, metadata={"cache": cache_status} if cache_status else None)
+                    source = "cache" if cache_status == "hit" else "call"
+            await self._send_event(events.TOOL_END, tool.name, agent_context=agent_context,
+                                   tool_call_id=tool_call.tool_call_id, status="ok", source=source)
+        except RunCancelled:
+            await self._send_event(events.TOOL_END, tool_call.function_name, agent_context=agent_context,
+                                   tool_call_id=tool_call.tool_call_id, status="cancelled")
+            raise
+        except Exception as ex:
+            logger.error(ex)
+            result = None
+            content = json.dumps({"status": "error", "message": str(ex)})
+            await self._send_event(events.TOOL_END, tool_call.function_name, agent_context=agent_context,
+                                   tool_call_id=tool_call.tool_call_id, status="error", error=str(ex))
+        message = ToolResultMessage(
+            run_id=agent_context.run_id,
+            tool_call_id=tool_call.tool_call_id,
+            name=tool_call.function_name,
+            content=content
+        )
+        if not _is_nav(result):
+            message.content, handle = await self.results.bound(content, tool_call.function_name, agent_context)
+            if handle:
+                message.meta["result_handle"] = handle
+        return message, result
+
+    async def _resolve_tool_call(self, tool: Tool, params: dict,
+                                 agent_context: AgentContext) -> tuple[str, Any, Optional[str]]:
+        """
+        Resuelve una tool call (cache o ejecución). Devuelve (contenido, resultado, estado de cache).
+        """
+        if tool.cache:
+            content = await self.tool_cache.get(tool, params, agent_context)
+            if content is not None:
+                return content, None, "hit"
+        try:
+            result = await self._invoke_tool(tool, params, agent_context)
+        finally:
+            # Una escritura fallida puede haber aplicado cambios parciales
+            if tool.invalidates:
+                await self.tool_cache.invalidate(tool, params)
+        encoding = tool.encoding or self.result_encoding
+        content = encode_result(result, encoding) if encoding is not None else to_json(result)
+        if tool.cache:
+            await self.tool_cache.set(tool, params, agent_context, content)
+        return content, result, "miss" if tool.cache else None
+
+    def _tool_pipeline(self, llm_input: LLMInput, agent_context: AgentContext,
+                       speculation: Speculation) -> Union[ToolCallPipeline, nullcontext]:
+        if not self.eager_tools:
+            return nullcontext()
+        # Solo las lecturas se anticipan: una escritura que corriera antes de guardar el mensaje del
+        # modelo se repetiría al reanudar el run
+        eager = {READ_RESULT_TOOL} | {t.name for t in llm_input.tools if t.read_only}
+        return ToolCallPipeline(
+            lambda calls, on_result: self._execute_tool_calls(calls, llm_input, agent_context, speculation,
+                                                              on_result=on_result),
+            eager=lambda tool_call: tool_call.function_name in eager,
+        )
+
+    def _speculate(self, llm_input: LLMInput, agent_context: AgentContext) -> Speculation:
+        speculation = Speculation(self.speculation_stats)
+        if not llm_input.speculative or self.speculation.max_calls <= 0:
+            return speculation
+
+        async def run(tool: Tool, params: Dict[str, Any]) -> tuple[str, Any]:
+            content, result, _ = await self._resolve_tool_call(tool, params, agent_context)
+            return content, result
+
+        return speculation.launch(llm_input.speculative, llm_input.tools, self.speculation, run)
+
+    async def _recall_user_memory(self, agent_context: AgentContext, agent_input: str) -> str:
+        if self.user_memory is None:
+            return ""
+        try:
+            memories = await self.user_memory.retrieve(agent_context.user_id, agent_input)
+        except Exception as ex:
+            # La memoria de largo plazo es best-effort: nunca debe tumbar el run
+            logger.error(ex)
+            return ""
+        return self.user_memory.render(memories)
+
     async def get_session_data(self, user_id: str, session_id: str) -> Session:
         session_data = await self.repo.get_or_create_session(session_id, user_id)
         return session_data
     
-    async def _add_session_data(self, system_prompt: str, session: Session) -> str:
+    async def _add_session_data(self, system_prompt: str, session: Session, user_memory: str = "") -> str:
         parts = [system_prompt]
+        if user_memory:
+            parts.append(user_memory)
         if len(session.summaries) > 0:
-            parts.append(dedent(f"""
+            previous = "\n".join(f"* {summary.content}" for summary in ordered_summaries(session.summaries))
+            parts.append(dedent("""
                 A continuación se listan resúmenes de partes anteriores de la conversación que ya no están disponibles en detalle.
                 Estos resúmenes representan contexto previo que debes tener en cuenta para continuar de forma coherente.
                 Utilízalos como si fueran la memoria de lo que ocurrió antes, tanto para responder al usuario como para decidir llamadas a funciones.
-            
+
                 ## Resúmenes previos:
                 <previous_summaries>
-                    {'\n'.join([f'* {summary.content}' for summary in session.summaries])}
+                {previous}
                 </previous_summaries>
-            """))
+            """).format(previous=previous))
         return "\n---\n".join(parts)
 
-    async def run(self, user_id: str, session_id: str, agent_input: str) -> str:
-        run_id = str(uuid.uuid4())
+    async def run(self, user_id: str, session_id: str, agent_input: str, run_id: Optional[str] = None,
+                  timeout: Optional[float] = None, cancellation: Optional[CancellationToken] = None) -> str:
+        """
+        Ejecuta un turno. Si `run_id` corresponde a un run interrumpido (checkpoint en el repositorio)
+        lo reanuda sin repetir pasos ni tool calls ya completadas; si ya había terminado devuelve su respuesta.
+        """
+        result = await self.run_detailed(user_id, session_id, agent_input, run_id=run_id, timeout=timeout,
+                                         cancellation=cancellation)
+        return result.output
+
+    async def run_detailed(self, user_id: str, session_id: str, agent_input: str, run_id: Optional[str] = None,
+                           timeout: Optional[float] = None,
+                           cancellation: Optional[CancellationToken] = None) -> RunResult:
+        """
+        Igual que run() pero devuelve el RunResult (estado, pasos usados, uso de tokens...).
+
+        Con `lease_policy` el run toma el lease de la sesión antes de leerla; si otro worker la tiene
+        espera o falla con LeaseUnavailable según la política. La espera respeta el deadline y la
+        cancelación: si vencen antes de obtener el lease se lanza RunCancelled (el run no empezó).
+
+        `timeout` (o `run_timeout` del Agent) fija un deadline y `cancellation` permite cortar el run
+        desde afuera (p.ej. al desconectarse el cliente): se abortan la llamada y las tools en curso,
+        se guarda lo completado y el run termina con estado "cancelled".
+        """
+        timeout = timeout if timeout is not None else self.run_timeout
+        if cancellation is None and timeout is not None:
+            cancellation = CancellationToken()
+        if cancellation is not None and timeout is not None:
+            cancellation.set_timeout(timeout)
+        cancel_token = _current_cancellation.set(cancellation)
+        try:
+            lease_scope = self.leases.hold(session_id, user_id, cancellation) if self.leases is not None else nullcontext()
+            async with lease_scope as lease:
+                lease_token = _current_lease_token.set(lease.token if lease is not None else None)
+                try:
+                    return await self._run_detailed(user_id, session_id, agent_input, run_id)
+                finally:
+                    _current_lease_token.reset(lease_token)
+        finally:
+            _current_cancellation.reset(cancel_token)
+
+    async def _run_detailed(self, user_id: str, session_id: str, agent_input: str, run_id: Optional[str] = None) -> RunResult:
+        checkpoint = await self.repo.get_run(run_id) if run_id and self.checkpoint_runs else None
+        if checkpoint is not None and checkpoint.status in ("completed", "exhausted", "budget_exceeded", "cancelled"):
+            return RunResult(run_id=run_id, output=_final_content(checkpoint.messages), status=checkpoint.status,
+                             steps=0, max_steps=self.max_steps, resumed=True, usage=sum_usage(checkpoint.messages))
+        run_id = run_id or str(uuid.uuid4())
         agent_context = AgentContext(session_id = session_id, user_id=user_id, run_id=run_id)
         session_data = await self.get_session_data(session_id=session_id, user_id=user_id)
-        
+        self.cm.begin_run(agent_context, session_data)
+        await self.usage.begin_run(agent_context)
+        token = _current_run.set(agent_context)
+        await self._send_event(events.RUN_START, agent_context=agent_context, resumed=checkpoint is not None)
+        try:
+            return await self._run_loop(agent_context, session_data, agent_input, checkpoint)
+        except Exception as ex:
+            # Queda reanudable con el mismo run_id
+            await self._set_run_status(agent_context, "failed")
+            await self._send_event(events.RUN_END, str(ex), agent_context=agent_context, status="failed")
+            raise
+        finally:
+            # Idempotente: si el run ya se cerró no hace nada, si falló libera el estado del run
+            self.cm.end_run(agent_context, session_data)
+            self.usage.end_run(agent_context)
+            _current_run.reset(token)
+
+    async def _run_loop(self, agent_context: AgentContext, session_data: Session, agent_input: str,
+                        checkpoint: Optional[RunCheckpoint] = None) -> RunResult:
+        run_id = agent_context.run_id
+        session_id = agent_context.session_id
+        user_id = agent_context.user_id
+
         with langfuse.start_as_current_observation(as_type="agent", name=self.name, input=agent_input) as run_span:
-            run_span.update(session_id=session_id, user_id=user_id, metadata={"run_id": run_id})
+            run_span.update(session_id=session_id, user_id=user_id, metadata={"run_id": run_id, "resumed": checkpoint is not None})
             history = session_data.messages
-            user_msg = UserMessage(run_id=run_id, content=agent_input)
-            run_messages = [user_msg]
-
-            for _ in range(self.max_steps):
-                llm_input = self.cm.build(agent_context)
-                full_system_message = await self._add_session_data(llm_input.system, session=session_data)
-                system_msg = SystemMessage(run_id=run_id, content=full_system_message)
-                tool_specs = list(map(tool_to_dict, llm_input.tools))
-                messages = list(map(lambda m: m.to_wire(), ([system_msg] + history + run_messages)))
-
-                with langfuse.start_as_current_observation(name=self.model, as_type="generation",
-                                                           completion_start_time=datetime.now(),
-                                                           input=_format_llm_input(messages, tool_specs),
-                                                           model=self.model) as generation_span:
-                    raw = await litellm.acompletion(model=self.model, messages=messages, tools=tool_specs, tool_choice="auto")
-                    assistant_message = _parse_assistant_response(run_id=run_id, response=raw)
-                    run_messages.append(assistant_message)
-                    generation_span.update(output=raw, usage_details=assistant_message.usage_data)
-
-                if assistant_message.finish_reason == "tool_calls":
-                    tool_calls = assistant_message.tool_calls
-                    tools_by_name = {t.name: t for t in llm_input.tools}
-                    for tool_call in tool_calls:
-                        t = tools_by_name.get(tool_call.function_name)
-                        
-                        try:
-                            with langfuse.start_as_current_observation(as_type="tool", name=tool_call.function_name, input=tool_call.arguments) as tool_span:
-                                params = json.loads(tool_call.arguments or "{}")
-                                result = await self._invoke_tool(t, params, agent_context)
-                                json_result = to_json(result)
-                                tool_span.update(output=json_result)
-                                run_messages.append(ToolResultMessage(
-                                    run_id=run_id,
-                                    tool_call_id=tool_call.tool_call_id,
-                                    name=tool_call.function_name,
-                                    content=json_result
-                                ))
-                        except Exception as ex:
-                            logger.error(ex)
-                            run_messages.append(ToolResultMessage(
-                                run_id=run_id,
-                                tool_call_id=tool_call.tool_call_id,
-                                name=tool_call.function_name,
-                                content=json.dumps({"status": "error", "message": str(ex)})
-                            ))
-
-
-                if assistant_message.finish_reason == "stop":
-                    run_span.update(output=assistant_message.content)
-                    await self._end_run(run_messages, session_data)
-                    return assistant_message.content
-
-            fallback = "No se obtuvo respuesta final dentro del límite de pasos."
-            run_span.update(output="[max-invocation-limit]")
-            return fallback
-        
+            if checkpoint is not None and checkpoint.messages:
+                run_messages: list[MessageType] = list(checkpoint.messages)
+                agent_input = run_messages[0].content or agent_input
+                await self._restore_state(agent_context, checkpoint)
+                # El AssistantMessage se guarda antes de ejecutar sus tools: la marca de navegación
+                # se recupera de los resultados (también la usa _collapse_nav_steps al persistir)
+                for m in run_messages:
+                    if isinstance(m, AssistantMessage) and _is_nav_step(m, run_messages):
+                        m.meta["nav"] = True
+            else:
+                run_messages = [UserMessage(run_id=run_id, content=agent_input)]
+                await self._checkpoint(agent_context, run_messages)
+
+            user_memory = await self._recall_user_memory(agent_context, agent_input)
+            pending = _pending_assistant(run_messages)
+            nav_steps = sum(1 for m in run_messages if isinstance(m, AssistantMessage) and m.meta.get("nav"))
+            steps = sum(1 for m in run_messages if isinstance(m, AssistantMessage) and m is not pending)
+            # Los pasos de navegación pura dentro del tope no consumen presupuesto
+            steps -= min(nav_steps, self.step_budget.max_nav_steps)
+            llm_input = self.cm.build(agent_context)
+            try:
+                while steps < self.max_steps:
+                    nav_only = False
+                    # Las lecturas que predice la vista corren mientras el modelo responde
+                    speculation = self._speculate(llm_input, agent_context) if pending is None else Speculation(self.speculation_stats)
+                    async with speculation, self._tool_pipeline(llm_input, agent_context, speculation) as pipeline:
+                        if pending is not None:
+                            # Reanudación: el paso ya tiene respuesta del modelo, no se vuelve a pedir
+                            assistant_message, pending = pending, None
+                        else:
+                            cancellation = _current_cancellation.get()
+                            if cancellation is not None:
+                                cancellation.raise_if_cancelled()
+                            exceeded = self.usage.exceeded(agent_context)
+                            if exceeded is not None:
+                                return await self._stop_over_budget(agent_context, session_data, run_messages, run_span,
+                                                                    exceeded, steps, resumed=checkpoint is not None)
+                            await self._send_event(events.STEP, str(steps), agent_context=agent_context, step=steps)
+                            assistant_message = await self._step(agent_context, session_data, history, run_messages,
+                                                                 llm_input, user_memory, steps,
+                                                                 on_tool_call=pipeline.put if pipeline else None)
+                            run_messages.append(assistant_message)
+                            await self._checkpoint(agent_context, [assistant_message])
+
+                        if assistant_message.finish_reason == "tool_calls":
+                            llm_input, nav_only = await self._run_tool_calls(assistant_message, llm_input, agent_context,
+                                                                             run_messages, speculation, pipeline)
+
+                    if nav_only and not assistant_message.content:
+                        # Paso de navegación pura: no se guarda en el historial y, dentro del tope
+                        # max_nav_steps, no consume presupuesto de pasos
+                        assistant_message.meta["nav"] = True
+                        nav_steps += 1
+                        if nav_steps <= self.step_budget.max_nav_steps:
+                            continue
+
+                    if assistant_message.finish_reason == "stop":
+                        return await self._finish_run(agent_context, session_data, run_messages, run_span,
+                                                      status="completed", steps=steps + 1, resumed=checkpoint is not None)
+
+                    steps += 1
+                    llm_input = self.cm.build(agent_context)
+
+                # Presupuesto de pasos agotado
+                policy = self.step_budget
+                status = "exhausted"
+                if policy.final_completion:
+                    final = await self._step(agent_context, session_data, history, run_messages, llm_input, user_memory, steps,
+                                             tool_choice="none", notice=policy.final_notice)
+                    if final.content:
+                        # Se cierra el turno con la respuesta forzada; se descartan tool calls que el proveedor insista en pedir
+                        final.tool_calls = []
+                        final.finish_reason = "stop"
+                        final.meta["forced_final"] = True
+                        run_messages.append(final)
+                        await self._checkpoint(agent_context, [final])
+                        return await self._finish_run(agent_context, session_data, run_messages, run_span, status=status,
+                                                      steps=steps, resumed=checkpoint is not None, exhausted=True)
+
+                fallback = AssistantMessage(run_id=run_id, content=policy.fallback_message, finish_reason="max_steps")
+                run_messages.append(fallback)
+                await self._checkpoint(agent_context, [fallback])
+                return await self._finish_run(agent_context, session_data, run_messages, run_span, status=status,
+                                              steps=steps, resumed=checkpoint is not None, exhausted=True,
+                                              persist=policy.persist_partial)
+            except RunCancelled as ex:
+                return await self._stop_cancelled(agent_context, session_data, run_messages, run_span, ex.reason,
+                                                  steps, resumed=checkpoint is not None)
+
+    async def _stop_over_budget(self, agent_context: AgentContext, session_data: Session,
+                                run_messages: list[MessageType], run_span: Any, scope: str, steps: int,
+                                resumed: bool) -> RunResult:
+        logger.warning(f"Presupuesto de uso superado ({scope}) en el run {agent_context.run_id}")
+        stop = AssistantMessage(run_id=agent_context.run_id, content=self.usage.budget.exceeded_message,
+                                finish_reason="budget", meta={"budget_scope": scope})
+        run_messages.append(stop)
+        await self._checkpoint(agent_context, [stop])
+        return await self._finish_run(agent_context, session_data, run_messages, run_span, status="budget_exceeded",
+                                      steps=steps, resumed=resumed)
+
+    async def _stop_cancelled(self, agent_context: AgentContext, session_data: Session,
+                              run_messages: list[MessageType], run_span: Any, reason: str, steps: int,
+                              resumed: bool) -> RunResult:
+        logger.warning(f"Run {agent_context.run_id} cancelado ({reason})")
+        closing: list[MessageType] = []
+        done = {m.tool_call_id for m in run_messages if isinstance(m, ToolResultMessage)}
+        last = next((m for m in reversed(run_messages) if isinstance(m, AssistantMessage)), None)
+        if last is not None and last.finish_reason == "tool_calls":
+            # Toda tool call necesita su resultado para que el historial siga siendo válido
+            closing += [
+                ToolResultMessage(run_id=agent_context.run_id, tool_call_id=tc.tool_call_id, name=tc.function_name,
+                                  content=json.dumps({"status": "cancelled", "reason": reason}))
+                for tc in last.tool_calls if tc.tool_call_id not in done
+            ]
+        closing.append(AssistantMessage(run_id=agent_context.run_id, content=CANCELLED_MESSAGE,
+                                        finish_reason="cancelled", meta={"cancel_reason": reason}))
+        run_messages.extend(closing)
+        await self._checkpoint(agent_context, closing)
+        return await self._finish_run(agent_context, session_data, run_messages, run_span, status="cancelled",
+                                      steps=steps, resumed=resumed, cancel_reason=reason)
+
+    async def _finish_run(self, agent_context: AgentContext, session_data: Session, run_messages: list[MessageType],
+                          run_span: Any, status: str, steps: int, resumed: bool, exhausted: bool = False,
+                          persist: bool = True, cancel_reason: Optional[str] = None) -> RunResult:
+        output = run_messages[-1].content
+        result = RunResult(run_id=agent_context.run_id, output=output, status=status, steps=steps,
+                           max_steps=self.max_steps, exhausted=exhausted, resumed=resumed,
+                           usage=sum_usage(run_messages), cancel_reason=cancel_reason)
+        run_span.update(output=output if not exhausted else f"[{status}] {output}",
+                        metadata={"run_id": agent_context.run_id, "steps": steps,
+                                  "step_budget_utilization": result.budget_utilization})
+        if persist:
+            self.cm.end_run(agent_context, session_data)
+            # Si la sesión ya tenía el run (reanudación tras guardarlo) no se repite la extracción
+            persist = await self._end_run(run_messages, session_data)
+        totals = self.usage.run_totals(agent_context)
+        if totals is not None:
+            # Incluye las llamadas auxiliares hechas durante el run (p.ej. resúmenes al persistir)
+            result.cost = totals.cost
+            result.aux_tokens = max(0, totals.total_tokens - result.usage.get("total_tokens", 0))
+        await self._set_run_status(agent_context, status)
+        await self._send_event(events.STEP_BUDGET, f"{steps}/{self.max_steps}", agent_context=agent_context,
+                               utilization=result.budget_utilization)
+        await self._send_event(events.RUN_END, status, agent_context=agent_context, status=status, steps=steps,
+                               usage=result.usage, **({"cancel_reason": cancel_reason} if cancel_reason else {}))
+        if persist and self.user_memory is not None and cancel_reason is None:
+            # Corre después del run: no la corta el deadline del run
+            cancel_token = _current_cancellation.set(None)
+            try:
+                self.user_memory.schedule_extraction(agent_context, run_messages, self._ask_llm)
+            finally:
+                _current_cancellation.reset(cancel_token)
+        return result
 
     def _split_in_runs(self, session_messages: list[MessageType]) -> list[list[MessageType]]:
         groups = []
@@ -247,89 +796,128 @@ class Agent:
             groups.append(current_run)
         return groups
 
-    async def _end_run(self, run_messages: list[MessageType], session: Session):
+    async def _end_run(self, run_messages: list[MessageType], session: Session) -> bool:
+        """
+        Persiste el run en la sesión y la auditoría. Devuelve False si la sesión ya lo tenía.
+        """
+        run_id = getattr(run_messages[0], "run_id", None) if run_messages else None
+        if run_id is not None and any(getattr(m, "run_id", None) == run_id for m in session.messages):
+            # Reanudación de un run que se guardó pero se cortó antes de marcar su estado
+            logger.warning(f"El run {run_id} ya estaba guardado en la sesión {session.session_id}")
+            return False
         old_messages = session.messages
-        all_messages = old_messages + run_messages
-
-        runs = self._split_in_runs(all_messages)
-
-        if len(runs) > self.max_interactions_in_memory:
-            summary, rotated = await self._summarize_runs(runs, session)
-            session.messages = rotated
-            session.summaries.append(summary)
-            summaries = await self._compress_summaries(session)
-            session.summaries = summaries
+        all_messages = old_messages + _collapse_nav_steps(run_messages)
+
+        # Los runs viejos quedan con un digest de sus tools (los originales van a la auditoría)
+        runs = compact_runs(self._split_in_runs(all_messages), self.compaction)
+
+        session.messages = flatten(runs)
+        cancellation = _current_cancellation.get()
+        if len(runs) > self.max_interactions_in_memory and not (cancellation is not None and cancellation.cancelled):
+            try:
+                summaries, rotated = await self._summarize_runs(runs, session)
+                session.messages = rotated
+                session.summaries = summaries
+            except RunCancelled:
+                # Se guarda sin rotar: el resumen queda para el próximo run
+                pass
+        fencing_token = _current_lease_token.get()
+        if fencing_token is None:
+            await self.repo.save_session(session)
         else:
-            session.messages = all_messages
-        await self.repo.save_session(session)
+            # Con un token viejo (otro worker tomó la sesión) el guardado falla y el run queda reanudable
+            await self.repo.save_session(session, fencing_token=fencing_token)
         await self.repo.append_messages(session.session_id, session.user_id, run_messages)
+        await self._send_event(events.SESSION_SAVED, session.session_id, messages=len(session.messages),
+                               summaries=len(session.summaries))
+        return True
     
-    async def _summarize_runs(self, runs: list[list[MessageType]], session: Session) -> tuple[str, list[list[MessageType]]]:
+    async def _summarize_runs(self, runs: list[list[MessageType]], session: Session) -> tuple[list[SessionSummary], list[MessageType]]:
         remaining = runs[-self.interations_retain:]
         to_summarize = flatten(runs[:-self.interations_retain])
-
-        def summarizable(message: MessageType):
-            return message.role == "user" or isinstance(message, AssistantMessage) and len(message.tool_calls) == 0
-        
-        to_summarize = list(filter(summarizable, to_summarize))
-        to_summarize = {''.join([f"- {m.role}: {m.content}\n" for m in to_summarize])}
-        
-        to_keep = list(filter(summarizable, flatten(remaining)))
-        to_keep = {''.join([f"- {m.role}: {m.content}\n" for m in to_keep])}
-
-        old_summaries = {''.join([f"{s.content}" for s in session.summaries])}
-
-        message = f"""
-        Resume la siguiente conversación:
-        ---
-
-        ## Resumenes anteriores
-
-        <old_summaries>
-        {old_summaries}
-        </old_summaries>
-
-        ---
-
-        ## Mensajes a resumir
-        
-        <conversation>
-        {to_summarize}
-        </conversation>
-
-        # Mensajes posteriores (No incluir en el resumen, solo dan contexto)
-
-        <messages_to_keep>
-        {to_keep}
-        </messages_to_keep>
-"""
-        content = await self._ask_llm(SUMMARIZATION_SYSTEM_PROMPT, message)
-        summary = SessionSummary(content=content)
         remaining = flatten(remaining)
-        await self._send_event("summarization_completed", content[:64])
-        return summary, remaining
+        summaries = await self.summarizer.add_chunk(session.summaries, to_summarize, remaining)
+        return summaries, remaining
 
-    async def _ask_llm(self, system: str, user: str) -> str:
+    async def _ask_llm(self, system: str, user: str, max_tokens: Optional[int] = None, task: str = AUX_SUMMARIZATION) -> str:
         llm_messages = [SystemMessage(content=system), UserMessage(content=user)]
-        raw = await litellm.acompletion(
-            model=self.model,
+        raw = await self._completion(
+            self.model_router.select_aux(task),
             messages=[m.to_wire() for m in llm_messages],
+            max_tokens=max_tokens,
+            priority=PRIORITY_BACKGROUND,
+            task=task,
         )
         choice = raw.choices[0]
         content = choice.message.content or None
         return content
-   
-    async def _compress_summaries(self, session: Session) -> list[SessionSummary]:
-        if len(session.summaries) < self.max_summaries_in_context:
-            return session.summaries
-        await self._send_event("meta_summarization")
-        summaries = "\n".join([f"* {s}" for s in session.summaries])
-        message = dedent(f"""
-            Sintetiza los siguientes resumenes:
-            <summaries>
-            {summaries}
-            </summaries>
-        """)
-        summary = await self._ask_llm(META_SUMMARIZATION_PROMPT, message)
-        return [SessionSummary(content=summary)]
 
+    @property
+    def scheduler(self) -> LLMScheduler:
+        return self._scheduler or get_scheduler()
+
+    @scheduler.setter
+    def scheduler(self, scheduler: Optional[LLMScheduler]) -> None:
+        self._scheduler = scheduler
+
+    async def _completion(self, route: ModelRoute, priority: int = PRIORITY_INTERACTIVE,
+                          agent_context: Optional[AgentContext] = None, task: Optional[str] = None,
+                          on_tool_call: Optional[Callable[[ToolCall], None]] = None,
+                          **kwargs) -> litellm.ModelResponse:
+        """
+        Única salida hacia litellm: pasa por la admisión del scheduler (RPM/TPM del proveedor),
+        aplica la ruta (modelo, timeout, params) y registra sus estadísticas.
+
+        Con `on_tool_call` la respuesta se pide con stream y se avisa de cada tool call apenas se
+        completa; igual se devuelve la respuesta entera.
+        """
+        if route.timeout is not None:
+            kwargs.setdefault("timeout", route.timeout)
+        cancellation = _current_cancellation.get()
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+            remaining = cancellation.remaining()
+            if remaining is not None:
+                # El proveedor tampoco sigue generando más allá del deadline del run
+                kwargs["timeout"] = min(kwargs.get("timeout") or remaining, remaining)
+        if self.http_pool is not None:
+            self.http_pool.ensure_started()
+        scheduler = self.scheduler
+        estimated = estimate_request_tokens(kwargs.get("messages") or [], kwargs.get("tools"), kwargs.get("max_tokens"))
+        acquire = scheduler.acquire(route.model, estimated, priority=priority)
+        queue_wait = await (cancellation.guard(acquire) if cancellation is not None else acquire)
+        await self._send_event(events.LLM_REQUEST, route.model, agent_context=agent_context, route=route.name,
+                               task=task, estimated_tokens=estimated, queue_wait=queue_wait)
+        started = time.perf_counter()
+        async def call() -> litellm.ModelResponse:
+            if on_tool_call is None:
+                return await litellm.acompletion(model=route.model, **route.params, **kwargs)
+            stream = await litellm.acompletion(model=route.model, stream=True, stream_options={"include_usage": True},
+                                               **route.params, **kwargs)
+            return await collect_stream(stream, on_tool_call, kwargs.get("messages"))
+
+        try:
+            raw = await (cancellation.guard(call()) if cancellation is not None else call())
+        except RunCancelled as ex:
+            # Sin respuesta no hay tokens consumidos: se devuelve lo reservado al bucket
+            scheduler.settle(route.model, estimated, 0)
+            await self._send_event(events.LLM_RESPONSE, str(ex), agent_context=agent_context, route=route.name,
+                                   task=task, latency=time.perf_counter() - started, cancelled=True)
+            raise
+        except Exception as ex:
+            scheduler.settle(route.model, estimated, 0)
+            latency = time.perf_counter() - started
+            self.model_router.record(route, latency, error=True)
+            await self._send_event(events.LLM_RESPONSE, str(ex), agent_context=agent_context, route=route.name,
+                                   task=task, latency=latency, error=True)
+            raise
+        latency = time.perf_counter() - started
+        usage = dict(raw.model_extra.get("usage") or {})
+        cost = _completion_cost(raw)
+        scheduler.settle(route.model, estimated, usage.get("total_tokens") or estimated)
+        self.model_router.record(route, latency, usage=usage, cost=cost)
+        await self.usage.record(agent_context or _current_run.get(), route.model, usage, cost)
+        http = {"connection_reuse_rate": self.http_pool.stats.reuse_rate} if self.http_pool is not None else {}
+        await self._send_event(events.LLM_RESPONSE, route.model, agent_context=agent_context, route=route.name,
+                               task=task, latency=latency, usage=usage, **http)
+        return raw
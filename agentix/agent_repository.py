@@ -1,10 +1,27 @@
-from typing import Protocol, List
-from .models import Message, Session
+from typing import Any, Dict, Optional, Protocol, List, Tuple
+from .models import Message, RunCheckpoint, Session, SessionLease, UsageTotals, UserInfo, UserMemory
 
 
 class AgentRepository(Protocol):
     async def get_or_create_session(self, session_id: str, user_id: str) -> Session: ...
-    async def save_session(self, session: Session) -> None: ...
+    async def save_session(self, session: Session, fencing_token: Optional[int] = None) -> None:
+        """
+        Con `fencing_token`, falla con StaleLeaseError si la sesión fue adquirida con otro token.
+        """
+        ...
     async def append_messages(self, session_id: str, user_id: str, messages: List[Message]) -> None: ...
-
-   
\ No newline at end of file
+    async def get_user_info(self, user_id: str) -> UserInfo: ...
+    async def add_user_memories(self, user_id: str, memories: List[UserMemory]) -> None: ...
+    async def append_run_messages(self, run_id: str, session_id: str, user_id: str, messages: List[Message],
+                                  state: Optional[Any] = None) -> None:
+        """
+        Con `state`, reemplaza además el snapshot del ContextManager guardado en el checkpoint.
+        """
+        ...
+    async def get_run(self, run_id: str) -> Optional[RunCheckpoint]: ...
+    async def set_run_status(self, run_id: str, status: str) -> None: ...
+    async def add_usage(self, scopes: List[Tuple[str, str]], model: str, delta: Dict[str, float]) -> None: ...
+    async def get_usage(self, scope: str, key: str) -> UsageTotals: ...
+    async def acquire_lease(self, session_id: str, user_id: str, owner: str, ttl: float) -> Optional[SessionLease]: ...
+    async def renew_lease(self, lease: SessionLease, ttl: float) -> bool: ...
+    async def release_lease(self, lease: SessionLease) -> None: ...
@@ -0,0 +1,280 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from .affinity import AffinityRouter, FileMembership, StaticMembership
+from .agent import Agent
+from .agent_repository import AgentRepository
+from . import events
+from .events import AgentEvent
+from .scheduler import LLMScheduler
+from .storage.memory_repository import InMemoryAgentRepository
+
+logger = logging.getLogger(__name__)
+
+AgentFactory = Callable[[AgentRepository], Agent]
+RepositoryFactory = Callable[[str], AgentRepository]
+
+
+class BatchScript(BaseModel):
+    """
+    Una conversación grabada: los inputs del usuario se envían en orden a la misma sesión.
+    """
+    user_id: str
+    session_id: str
+    inputs: List[str]
+    script_id: Optional[str] = None
+    meta: Dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return self.script_id or f"{self.user_id}/{self.session_id}"
+
+
+class TurnResult(BaseModel):
+    experiment: str
+    script_id: str
+    user_id: str
+    session_id: str
+    turn: int
+    input: str
+    output: Optional[str] = None
+    status: str
+    run_id: Optional[str] = None
+    error: Optional[str] = None
+    latency_ms: float = 0.0
+    queue_ms: float = 0.0
+    steps: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
+
+class BatchReport(BaseModel):
+    experiment: str
+    scripts: int = 0
+    skipped: int = 0
+    # Scripts cuyas sesiones corresponden a otro nodo (con afinidad)
+    other_nodes: int = 0
+    turns: int = 0
+    errors: int = 0
+    total_tokens: int = 0
+    elapsed_s: float = 0.0
+    latency_p50_ms: float = 0.0
+    latency_p95_ms: float = 0.0
+
+
+def load_scripts(path: str) -> List[BatchScript]:
+    with open(path, encoding="utf-8") as f:
+        return [BatchScript(**json.loads(line)) for line in f if line.strip()]
+
+
+def _completed_scripts(path: str) -> Set[str]:
+    """
+    Scripts ya escritos en el JSONL de salida sin errores (se escriben completos, así que su
+    presencia indica que terminaron). Cuenta el último intento de cada script: los que fallaron
+    se vuelven a correr y su nuevo intento se agrega al final del archivo.
+    """
+    if not os.path.exists(path):
+        return set()
+    failed: Dict[str, bool] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                script_id = row["script_id"]
+            except (json.JSONDecodeError, KeyError):
+                # Última línea truncada por una caída: ese script se vuelve a correr
+                continue
+            if row.get("turn") == 0:
+                # Empieza un intento nuevo del script
+                failed[script_id] = False
+            failed[script_id] = failed.get(script_id, False) or row.get("status") == "error"
+    return {script_id for script_id, error in failed.items() if not error}
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p * (len(values) - 1))))]
+
+
+class BatchRunner:
+    """
+    Ejecuta muchas conversaciones grabadas de forma concurrente (evaluación offline / regresión).
+
+    - Concurrencia acotada por semáforo; los turnos de una misma sesión se ejecutan en orden.
+    - Cada experimento usa su propio repositorio (`repository_factory(experiment)`), en memoria por defecto.
+    - Los límites RPM/TPM del proveedor los aplica el LLMScheduler del Agent en cada llamada
+      (pasos y tareas auxiliares): `scheduler`, o uno con `rpm`/`tpm` como límites por defecto.
+    - Reanudable: los scripts ya presentes en el JSONL de salida sin errores se saltan. Los run_id
+      son deterministas, así que con un repositorio persistente los turnos ya completados no se recalculan.
+    - Con `affinity` y `node` varios procesos se reparten los scripts: cada uno corre solo las
+      sesiones que el anillo le asigna.
+    """
+
+    def __init__(
+        self,
+        agent_factory: AgentFactory,
+        repository_factory: Optional[RepositoryFactory] = None,
+        experiment: str = "default",
+        concurrency: int = 8,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        affinity: Optional[AffinityRouter] = None,
+        node: Optional[str] = None,
+    ):
+        if affinity is not None and node is None:
+            raise ValueError("Con affinity hay que indicar el node de este proceso")
+        self.experiment = experiment
+        self.repo = (repository_factory or (lambda _: InMemoryAgentRepository()))(experiment)
+        self.agent = agent_factory(self.repo)
+        self.concurrency = concurrency
+        if scheduler is None and (rpm or tpm):
+            scheduler = LLMScheduler(default_limits=(rpm, tpm))
+        if scheduler is not None:
+            self.agent.scheduler = scheduler
+        # Espera en la cola del scheduler por run (de los eventos llm_request)
+        self._queue_wait: Dict[str, float] = {}
+        self._queue_events = self.agent.events.subscribe(self._on_request, types={events.LLM_REQUEST},
+                                                         max_queue=10000, overflow="block")
+        self.affinity = affinity
+        self.node = node
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._write_lock = asyncio.Lock()
+
+    async def run_file(self, input_path: str, output_path: str) -> BatchReport:
+        return await self.run(load_scripts(input_path), output_path)
+
+    async def run(self, scripts: Iterable[BatchScript], output_path: str) -> BatchReport:
+        scripts = list(scripts)
+        done = _completed_scripts(output_path)
+        mine = scripts
+        if self.affinity is not None:
+            mine = [s for s in scripts if self.affinity.owns(self.node, s.user_id, s.session_id)]
+        pending = [s for s in mine if s.key not in done]
+        report = BatchReport(experiment=self.experiment, scripts=len(mine), skipped=len(mine) - len(pending),
+                             other_nodes=len(scripts) - len(mine))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: List[float] = []
+        started = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            async def worker(script: BatchScript) -> None:
+                # El lock de la sesión se toma antes del semáforo: esperarlo no ocupa un lugar
+                async with self._session_lock(script):
+                    async with semaphore:
+                        results = await self._run_script(script)
+                async with self._write_lock:
+                    # Se escribe el script completo de una vez: es la unidad de reanudación
+                    out.write("".join(r.model_dump_json() + "\n" for r in results))
+                    out.flush()
+                for r in results:
+                    report.turns += 1
+                    report.total_tokens += r.total_tokens
+                    if r.status == "error":
+                        report.errors += 1
+                    latencies.append(r.latency_ms)
+
+            await asyncio.gather(*(worker(s) for s in pending))
+        await self.agent.events.drain()
+
+        report.elapsed_s = time.perf_counter() - started
+        report.latency_p50_ms = _percentile(latencies, 0.50)
+        report.latency_p95_ms = _percentile(latencies, 0.95)
+        return report
+
+    def _session_lock(self, script: BatchScript) -> asyncio.Lock:
+        return self._session_locks.setdefault(f"{script.user_id}/{script.session_id}", asyncio.Lock())
+
+    def _on_request(self, event: AgentEvent) -> None:
+        if event.run_id is not None:
+            self._queue_wait[event.run_id] = self._queue_wait.get(event.run_id, 0.0) + (event.data.get("queue_wait") or 0.0)
+
+    async def _queue_ms(self, run_id: str) -> float:
+        await self._queue_events.drain()
+        return self._queue_wait.pop(run_id, 0.0) * 1000
+
+    async def _run_script(self, script: BatchScript) -> List[TurnResult]:
+        results: List[TurnResult] = []
+        for turn, agent_input in enumerate(script.inputs):
+            result = await self._run_turn(script, turn, agent_input)
+            results.append(result)
+            if result.status == "error":
+                # Los turnos siguientes dependerían de un estado inconsistente
+                break
+        return results
+
+    async def _run_turn(self, script: BatchScript, turn: int, agent_input: str) -> TurnResult:
+        base = dict(experiment=self.experiment, script_id=script.key, user_id=script.user_id,
+                    session_id=script.session_id, turn=turn, input=agent_input)
+        run_id = f"{self.experiment}:{script.key}:{turn}"
+        started = time.perf_counter()
+        try:
+            run = await self.agent.run_detailed(script.user_id, script.session_id, agent_input, run_id=run_id)
+        except Exception as ex:
+            logger.error(f"Error en {script.key} turno {turn}: {ex}")
+            latency_ms = (time.perf_counter() - started) * 1000
+            return TurnResult(**base, status="error", run_id=run_id, error=str(ex),
+                              queue_ms=await self._queue_ms(run_id), latency_ms=latency_ms)
+        latency_ms = (time.perf_counter() - started) * 1000
+        usage = run.usage
+        total = usage.get("total_tokens", 0)
+        return TurnResult(
+            **base,
+            output=run.output,
+            status=run.status,
+            run_id=run.run_id,
+            latency_ms=latency_ms,
+            queue_ms=await self._queue_ms(run_id),
+            steps=run.steps,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=total,
+        )
+
+
+def _load_factory(path: str) -> AgentFactory:
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError("La factory debe tener la forma 'paquete.modulo:funcion'")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Ejecuta conversaciones grabadas (JSONL) contra un Agent.")
+    parser.add_argument("input", help="JSONL con {user_id, session_id, inputs[, script_id]} por línea")
+    parser.add_argument("output", help="JSONL de resultados (se reanuda si ya existe)")
+    parser.add_argument("--agent", required=True, help="factory 'modulo:funcion' que recibe el repositorio y devuelve un Agent")
+    parser.add_argument("--experiment", default="default")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=None)
+    parser.add_argument("--tpm", type=float, default=None)
+    parser.add_argument("--node", default=None, help="nombre de este proceso en el anillo de afinidad")
+    membership = parser.add_mutually_exclusive_group()
+    membership.add_argument("--nodes", default=None, help="lista de nodos separada por comas")
+    membership.add_argument("--membership", default=None, help="archivo con un nodo (y peso opcional) por línea")
+    args = parser.parse_args(argv)
+
+    affinity = None
+    if args.nodes or args.membership:
+        source = FileMembership(args.membership) if args.membership else StaticMembership(args.nodes.split(","))
+        affinity = AffinityRouter(source)
+    runner = BatchRunner(_load_factory(args.agent), experiment=args.experiment, concurrency=args.concurrency,
+                         rpm=args.rpm, tpm=args.tpm, affinity=affinity, node=args.node)
+    report = asyncio.run(runner.run_file(args.input, args.output))
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
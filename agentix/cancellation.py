@@ -0,0 +1,92 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Motivos registrados en el run
+REASON_DEADLINE = "deadline"
+REASON_CANCELLED = "cancelled"
+
+CANCELLED_MESSAGE = "La respuesta se canceló antes de completarse."
+
+
+class RunCancelled(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"Run cancelado: {reason}")
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cancelación de un run: a mano (p.ej. el cliente HTTP se desconectó) o al vencer el deadline.
+
+    El Agent lo consulta entre pasos, lo propaga como timeout a litellm y corta las llamadas al
+    LLM y las tools en curso. Las tools pueden recibirlo declarando un parámetro `CancellationToken`
+    (igual que AgentContext) para cortar su propio trabajo.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline: Optional[float] = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def set_timeout(self, timeout: float) -> None:
+        # Nunca se extiende un deadline ya fijado
+        deadline = time.monotonic() + timeout
+        self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+
+    def cancel(self, reason: str = REASON_CANCELLED) -> None:
+        if self.reason is None:
+            self.reason = reason
+        if self._event is not None:
+            self._event.set()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        if self.reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(REASON_DEADLINE)
+        return self.reason is not None
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise RunCancelled(self.reason)
+
+    async def guard(self, awaitable: Awaitable[T]) -> T:
+        """
+        Espera `awaitable` y lo cancela si el token se cancela o vence el deadline antes.
+        """
+        if self.cancelled:
+            # La corrutina no llega a ejecutarse: se cierra para que no quede sin esperar
+            close = getattr(awaitable, "close", None)
+            if close is not None:
+                close()
+            raise RunCancelled(self.reason)
+        if self._event is None:
+            self._event = asyncio.Event()
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            await asyncio.wait({task, waiter}, timeout=self.remaining(), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        try:
+            await task
+        except BaseException:
+            pass
+        if self.reason is None:
+            # Sin cancel() explícito: venció el deadline
+            self.cancel(REASON_DEADLINE)
+        raise RunCancelled(self.reason)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .models import AssistantMessage, MessageType, ToolResultMessage
+
+
+class CompactionPolicy(BaseModel):
+    """
+    Compactación sin LLM del tráfico de tools de los runs viejos.
+
+    Los últimos `keep_recent_runs` runs quedan textuales; en los anteriores cada par
+    tool call/resultado se reemplaza por una línea de digest (tool, argumentos clave, estado y
+    resultado truncado). La auditoría conserva los mensajes originales.
+    """
+    keep_recent_runs: int = 3
+    arg_chars: int = 40
+    max_args: int = 4
+    result_chars: int = 160
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _format_args(arguments: str, policy: CompactionPolicy) -> str:
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        return _clip(arguments, policy.arg_chars)
+    if not isinstance(args, dict):
+        return _clip(json.dumps(args, ensure_ascii=False), policy.arg_chars)
+    parts = [f"{k}={_clip(json.dumps(v, ensure_ascii=False, default=str), policy.arg_chars)}"
+             for k, v in list(args.items())[:policy.max_args]]
+    if len(args) > policy.max_args:
+        parts.append("…")
+    return ", ".join(parts)
+
+
+def _status(content: Optional[str]) -> str:
+    try:
+        data = json.loads(content or "")
+    except ValueError:
+        return "ok"
+    if isinstance(data, dict) and data.get("status") in ("error", "stored", "expired"):
+        return data["status"]
+    return "ok"
+
+
+def is_compacted(run: List[MessageType]) -> bool:
+    return any(m.meta.get("compacted") for m in run)
+
+
+def compact_run(run: List[MessageType], policy: CompactionPolicy) -> List[MessageType]:
+    """
+    Reemplaza los mensajes intermedios de tools de un run por un único mensaje de digest,
+    en la posición del primer tool call. Los mensajes de usuario y respuestas finales se mantienen.
+    """
+    if is_compacted(run):
+        return run
+    results: Dict[str, ToolResultMessage] = {m.tool_call_id: m for m in run if isinstance(m, ToolResultMessage)}
+    lines: List[str] = []
+    handle: Any = None
+    out: List[MessageType] = []
+    digest_at: Optional[int] = None
+    for m in run:
+        if isinstance(m, AssistantMessage) and m.tool_calls:
+            if digest_at is None:
+                digest_at = len(out)
+            if m.content:
+                lines.append(f"- (nota) {_clip(m.content, policy.result_chars)}")
+            for tc in m.tool_calls:
+                result = results.get(tc.tool_call_id)
+                content = result.content if result is not None else None
+                status = _status(content) if result is not None else "sin resultado"
+                line = f"- {tc.function_name}({_format_args(tc.arguments, policy)}) -> {status}"
+                if content:
+                    line += f": {_clip(content, policy.result_chars)}"
+                if result is not None and result.meta.get("result_handle"):
+                    handle = result.meta["result_handle"]
+                    line += f" [handle {handle}]"
+                lines.append(line)
+        elif not isinstance(m, ToolResultMessage):
+            out.append(m)
+    if digest_at is None:
+        return run
+
+    digest = AssistantMessage(
+        run_id=run[0].run_id,
+        content="[Herramientas usadas en este turno]\n" + "\n".join(lines),
+        finish_reason="compacted",
+        meta={"compacted": True},
+    )
+    if handle:
+        # Sigue habilitando read_result para los resultados guardados fuera de banda
+        digest.meta["result_handle"] = handle
+    out.insert(digest_at, digest)
+    return out
+
+
+def compact_runs(runs: List[List[MessageType]], policy: CompactionPolicy) -> List[List[MessageType]]:
+    if policy.keep_recent_runs < 0 or len(runs) <= policy.keep_recent_runs:
+        return runs
+    cut = len(runs) - policy.keep_recent_runs
+    return [compact_run(r, policy) for r in runs[:cut]] + runs[cut:]
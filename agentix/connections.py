@@ -0,0 +1,176 @@
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import litellm
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Extensión de request que marca los pings: no cuentan como tráfico ni para el reuso
+_PING = "agentix_ping"
+
+
+def _h2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpPoolPolicy(BaseModel):
+    """
+    - max_connections / max_keepalive: tamaño del pool y conexiones ociosas que se conservan.
+    - keepalive_expiry: segundos que una conexión ociosa sigue abierta.
+    - http2: se usa solo si está instalado `h2` (httpx[http2]).
+    - warmup_urls: URLs de los proveedores (p.ej. "https://api.openai.com/v1/models") que se
+      tocan al arrancar para abrir conexiones (DNS + TCP + TLS) antes del primer turno.
+    - ping_interval: tras ese tiempo sin tráfico se vuelven a tocar, para que el pool no se
+      quede frío; None = sin pings.
+    """
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 120.0
+    http2: bool = True
+    connect_timeout: float = 10.0
+    timeout: float = 600.0
+    warmup_urls: List[str] = []
+    ping_interval: Optional[float] = 60.0
+
+
+class ConnectionStats(BaseModel):
+    # Requests de litellm (sin warm-up ni pings) y conexiones que tuvieron que abrir
+    requests: int = 0
+    new_connections: int = 0
+    pings: int = 0
+    ping_errors: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.new_connections)
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+
+class SharedHttpClient:
+    """
+    Cliente HTTP async de larga vida para todas las llamadas a litellm (turnos y tareas auxiliares).
+
+    Se instala como `litellm.aclient_session`, que litellm usa para los proveedores compatibles
+    con OpenAI; es un ajuste global del proceso, así que conviene un solo pool compartido.
+    Las conexiones nuevas se cuentan con el trace de httpcore: el resto de requests reusaron una.
+    """
+
+    def __init__(self, policy: Optional[HttpPoolPolicy] = None):
+        self.policy = policy or HttpPoolPolicy()
+        self.stats = ConnectionStats()
+        self.client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ping_task: Optional[asyncio.Task] = None
+        self._last_used = time.monotonic()
+
+    @property
+    def http2(self) -> bool:
+        return self.policy.http2 and _h2_available()
+
+    def _build(self) -> httpx.AsyncClient:
+        policy = self.policy
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(max_connections=policy.max_connections,
+                                max_keepalive_connections=policy.max_keepalive,
+                                keepalive_expiry=policy.keepalive_expiry),
+            timeout=httpx.Timeout(policy.timeout, connect=policy.connect_timeout),
+            follow_redirects=True,
+            event_hooks={"request": [self._on_request]},
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        if request.extensions.get(_PING):
+            return
+        self.stats.requests += 1
+        self._last_used = time.monotonic()
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.stats.new_connections += 1
+
+    def ensure_started(self, warmup: bool = True) -> httpx.AsyncClient:
+        """
+        Crea el cliente (uno por event loop) y lo instala en litellm; el warm-up corre en segundo plano.
+        """
+        loop = asyncio.get_running_loop()
+        if self.client is None or self._loop is not loop:
+            # Un cliente de otro event loop (p.ej. varios asyncio.run) no se puede reutilizar
+            self._discard(loop)
+            self.client = self._build()
+            self._loop = loop
+            litellm.aclient_session = self.client
+            if warmup and self.policy.warmup_urls:
+                loop.create_task(self.warmup())
+            if self.policy.ping_interval:
+                self._ping_task = loop.create_task(self._ping_loop())
+        return self.client
+
+    def _discard(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Cierra el cliente y el ping del loop anterior en vez de dejarlos huérfanos
+        ping_task, self._ping_task = self._ping_task, None
+        if ping_task is not None and not ping_task.done():
+            old_loop = ping_task.get_loop()
+            if not old_loop.is_closed():
+                old_loop.call_soon_threadsafe(ping_task.cancel)
+        stale, self.client = self.client, None
+        if stale is not None:
+            loop.create_task(self._close_stale(stale))
+
+    @staticmethod
+    async def _close_stale(client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception as ex:
+            # Sus conexiones pertenecían a otro loop: lo que no se pudo cerrar lo libera el GC
+            logger.debug(f"No se pudo cerrar el cliente HTTP anterior: {ex}")
+
+    async def start(self) -> None:
+        """
+        Arranque explícito (al levantar el worker): deja las conexiones abiertas antes del primer turno.
+        """
+        self.ensure_started(warmup=False)
+        await self.warmup()
+
+    async def warmup(self) -> None:
+        await asyncio.gather(*(self._ping(url) for url in self.policy.warmup_urls))
+
+    async def _ping(self, url: str) -> None:
+        self.stats.pings += 1
+        self._last_used = time.monotonic()
+        try:
+            # Cualquier respuesta sirve (incluso 401/404): lo que importa es la conexión abierta
+            await self.client.head(url, extensions={_PING: True})
+        except Exception as ex:
+            self.stats.ping_errors += 1
+            logger.debug(f"Ping a {url} fallido: {ex}")
+
+    async def _ping_loop(self) -> None:
+        interval = self.policy.ping_interval
+        while True:
+            await asyncio.sleep(interval / 2)
+            if time.monotonic() - self._last_used >= interval:
+                await self.warmup()
+
+    async def close(self) -> None:
+        if self._ping_task is not None:
+            self._ping_task.cancel()
+            self._ping_task = None
+        if self.client is not None:
+            if litellm.aclient_session is self.client:
+                litellm.aclient_session = None
+            await self.client.aclose()
+            self.client = None
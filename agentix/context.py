@@ -1,11 +1,16 @@
 from __future__ import annotations
-from typing import Protocol, Tuple, List
-from .models import Tool, AgentContext
+from typing import Any, Dict, Optional, Protocol, Tuple, List
+from .models import Tool, AgentContext, Session
+from .speculation import SpeculativeCall
 from pydantic import BaseModel
 
 class LLMInput(BaseModel):
     system: str
     tools: list[Tool]
+    # Pantalla actual (screen_key de la vista), si el ContextManager la tiene
+    screen: Optional[str] = None
+    # Tool calls de solo lectura que probablemente pida el modelo (se adelantan en paralelo)
+    speculative: list[SpeculativeCall] = []
 
 
 class ContextManager(Protocol):
@@ -17,13 +22,80 @@ class ContextManager(Protocol):
         """
         ...
 
+    def begin_run(self, agent_state: AgentContext, session: Session) -> None:
+        """
+        Se invoca una vez al inicio del run con la sesión cargada (p.ej. para leer Session.state).
+        """
+        ...
+
+    def end_run(self, agent_state: AgentContext, session: Session) -> None:
+        """
+        Se invoca al terminar el run, antes de persistir la sesión, para volcar el estado propio en Session.state.
+        """
+        ...
+
+    def invalidate(self, agent_state: AgentContext) -> None:
+        """
+        Avisa que las tools del paso pudieron mutar el estado del que depende build() (invalida caches).
+        """
+        ...
+
+    async def handle_nav(self, agent_state: AgentContext, out: Dict[str, Any]) -> bool:
+        """
+        Recibe el resultado de una tool de navegación ({"nav": ...}).
+        Devuelve True si el contexto cambió y hay que reconstruir el LLMInput.
+        """
+        ...
+
+    def record_call(self, agent_state: AgentContext, tool_name: str) -> None:
+        """
+        Avisa que se ejecutó una tool que pidió el modelo (no las especulativas que se descartaron),
+        p.ej. para que speculate() de la vista deje de predecirla.
+        """
+        ...
+
+    def snapshot(self, agent_state: AgentContext) -> Optional[Any]:
+        """
+        Copia serializable del estado propio del run (p.ej. el stack de vistas) para el checkpoint;
+        None si no hay nada que guardar.
+        """
+        ...
+
+    def restore(self, agent_state: AgentContext, snapshot: Any) -> None:
+        """
+        Reanudación: reemplaza el estado del run por el de un snapshot() guardado.
+        """
+        ...
+
 
 class SimpleContextManager(ContextManager):
     
-    def __init__(self, system: str, tools: list[Tool] = []):
+    def __init__(self, system: str, tools: list[Tool] = [], speculative: list[SpeculativeCall] = []):
         super().__init__()
         self.system = system
         self.tools = tools
+        self.speculative = speculative
     
     def build(self, agent_state):
-        return LLMInput(system=self.system, tools=self.tools)
+        return LLMInput(system=self.system, tools=self.tools, speculative=self.speculative)
+
+    def begin_run(self, agent_state, session):
+        pass
+
+    def end_run(self, agent_state, session):
+        pass
+
+    def invalidate(self, agent_state):
+        pass
+
+    async def handle_nav(self, agent_state, out):
+        return False
+
+    def record_call(self, agent_state, tool_name):
+        pass
+
+    def snapshot(self, agent_state):
+        return None
+
+    def restore(self, agent_state, snapshot):
+        pass
@@ -0,0 +1,250 @@
+from __future__ import annotations
+import asyncio
+import inspect
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Final, List, Literal, Optional, Protocol, Set, Union
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+# Ciclo de vida de un run
+RUN_START: Final = "run_start"
+RUN_END: Final = "run_end"
+STEP: Final = "step"
+LLM_REQUEST: Final = "llm_request"
+LLM_RESPONSE: Final = "llm_response"
+TOOL_START: Final = "tool_start"
+TOOL_END: Final = "tool_end"
+SUMMARIZATION: Final = "summarization_completed"
+META_SUMMARIZATION: Final = "meta_summarization"
+SESSION_SAVED: Final = "session_saved"
+STEP_BUDGET: Final = "step_budget"
+
+EventType = Literal[
+    "run_start", "run_end", "step", "llm_request", "llm_response", "tool_start", "tool_end",
+    "summarization_completed", "meta_summarization", "session_saved", "step_budget",
+]
+
+
+class AgentEvent(BaseModel):
+    type: EventType
+    message: Optional[str] = None
+    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    run_id: Optional[str] = None
+    session_id: Optional[str] = None
+    user_id: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+
+EventListener = Union[
+    Callable[[AgentEvent], None],
+    Callable[[AgentEvent], Awaitable[None]],
+]
+
+# drop_new: descarta el evento entrante; drop_oldest: descarta el más viejo de la cola;
+# block: el publicador espera lugar en la cola (backpressure, solo para sinks críticos)
+OverflowPolicy = Literal["drop_new", "drop_oldest", "block"]
+
+
+class EventSink(Protocol):
+    """
+    Destino que recibe eventos en lotes (archivo, colector remoto...).
+    """
+    async def write(self, events: List[AgentEvent]) -> None: ...
+    async def close(self) -> None: ...
+
+
+class SubscriptionStats(BaseModel):
+    delivered: int = 0
+    dropped: int = 0
+    errors: int = 0
+
+
+class Subscription:
+    """
+    Un suscriptor con su cola acotada y su worker. El worker entrega en lotes de hasta
+    `batch_size` eventos (los listeners simples los reciben de a uno).
+    """
+
+    def __init__(self, handler: Union[EventListener, EventSink], types: Optional[Set[EventType]],
+                 max_queue: int, overflow: OverflowPolicy, batch_size: int):
+        self.handler = handler
+        self.types = types
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.is_sink = hasattr(handler, "write")
+        self.stats = SubscriptionStats()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            if self._loop is not loop:
+                # Cola de otro event loop (p.ej. varios asyncio.run): no se puede reutilizar
+                self._queue = asyncio.Queue(self.max_queue)
+            self._loop = loop
+            self._worker = loop.create_task(self._run())
+        return self._queue
+
+    async def put(self, event: AgentEvent) -> None:
+        if self.types is not None and event.type not in self.types:
+            return
+        queue = self._ensure_worker()
+        if self.overflow == "block":
+            await queue.put(event)
+            return
+        if queue.full():
+            self.stats.dropped += 1
+            if self.overflow == "drop_new":
+                return
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._deliver(batch)
+                self.stats.delivered += len(batch)
+            except Exception as ex:
+                self.stats.errors += 1
+                logger.warning(f"Error entregando eventos a {self.handler!r}: {ex}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver(self, batch: List[AgentEvent]) -> None:
+        if self.is_sink:
+            await self.handler.write(batch)
+            return
+        for event in batch:
+            result = self.handler(event)
+            if inspect.isawaitable(result):
+                await result
+
+    async def drain(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+        if self.is_sink:
+            await self.handler.close()
+
+
+class EventBus:
+    """
+    Bus de eventos del Agent: varios suscriptores, entrega asíncrona por colas acotadas.
+
+    publish no espera a los suscriptores (salvo los de política "block"), así que un listener
+    lento o caído no suma latencia al run.
+    """
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+
+    def subscribe(self, handler: Union[EventListener, EventSink], types: Optional[Set[EventType]] = None,
+                  max_queue: int = 1000, overflow: OverflowPolicy = "drop_oldest",
+                  batch_size: int = 1) -> Subscription:
+        subscription = Subscription(handler, types, max_queue, overflow, batch_size)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscriptions.remove(subscription)
+
+    async def publish(self, event: AgentEvent) -> None:
+        for subscription in self.subscriptions:
+            await subscription.put(event)
+
+    async def drain(self) -> None:
+        """
+        Espera a que se entreguen los eventos encolados.
+        """
+        for subscription in self.subscriptions:
+            await subscription.drain()
+
+    async def close(self) -> None:
+        for subscription in self.subscriptions:
+            await subscription.close()
+
+
+class JsonlSink(EventSink):
+    """
+    Agrega cada evento como una línea JSON. Usar con batch_size > 1 para escribir por lotes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def write(self, events: List[AgentEvent]) -> None:
+        await asyncio.to_thread(self._append, "".join(e.model_dump_json() + "\n" for e in events))
+
+    async def close(self) -> None:
+        pass
+
+
+class OtlpSink(EventSink):
+    """
+    Exporta los eventos como logs OTLP/HTTP (JSON) a un colector OpenTelemetry.
+    Requiere httpx (dependencia de litellm).
+    """
+
+    def __init__(self, endpoint: str = "http://localhost:4318", service_name: str = "agentix",
+                 headers: Optional[Dict[str, str]] = None, timeout: float = 5.0):
+        import httpx
+        self.url = endpoint.rstrip("/") + "/v1/logs"
+        self.service_name = service_name
+        self.client = httpx.AsyncClient(headers=headers, timeout=timeout)
+
+    @staticmethod
+    def _attr(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        if not isinstance(value, str):
+            value = json.dumps(value, ensure_ascii=False, default=str)
+        return {"key": key, "value": {"stringValue": value}}
+
+    def _record(self, event: AgentEvent) -> Dict[str, Any]:
+        attributes = {"event.type": event.type, "run_id": event.run_id, "session_id": event.session_id,
+                      "user_id": event.user_id, **{f"data.{k}": v for k, v in event.data.items()}}
+        return {
+            "timeUnixNano": str(int(event.timestamp.timestamp() * 1e9)),
+            "observedTimeUnixNano": str(time.time_ns()),
+            "severityText": "INFO",
+            "body": {"stringValue": event.message or event.type},
+            "attributes": [self._attr(k, v) for k, v in attributes.items() if v is not None],
+        }
+
+    async def write(self, events: List[AgentEvent]) -> None:
+        payload = {"resourceLogs": [{
+            "resource": {"attributes": [self._attr("service.name", self.service_name)]},
+            "scopeLogs": [{"scope": {"name": "agentix"}, "logRecords": [self._record(e) for e in events]}],
+        }]}
+        response = await self.client.post(self.url, json=payload)
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Literal, Optional
+
+from pydantic import BaseModel
+
+from .agent_repository import AgentRepository
+from .cancellation import CancellationToken
+from .models import SessionLease
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseUnavailable(Exception):
+    """
+    La sesión está tomada por otro worker y no se liberó dentro del tiempo de espera.
+    """
+
+
+class StaleLeaseError(Exception):
+    """
+    Guardado rechazado: otro worker adquirió la sesión después (fencing token viejo).
+    """
+
+
+class LeasePolicy(BaseModel):
+    """
+    - ttl: segundos de validez del lease sin renovar (cubre caídas del worker).
+    - heartbeat: cada cuánto se renueva mientras dura el run.
+    - on_busy: "wait" espera (sondeando con backoff) hasta `wait_timeout`; "fail" falla de inmediato.
+    """
+    ttl: float = 30.0
+    heartbeat: float = 10.0
+    on_busy: Literal["wait", "fail"] = "wait"
+    wait_timeout: float = 60.0
+    poll_interval: float = 0.2
+    max_poll_interval: float = 2.0
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """
+    Adquiere, renueva (heartbeat) y libera leases de sesión sobre el repositorio.
+    """
+
+    def __init__(self, repository: AgentRepository, policy: Optional[LeasePolicy] = None, owner: Optional[str] = None):
+        self.repo = repository
+        self.policy = policy or LeasePolicy()
+        self.owner = owner or default_owner()
+
+    async def acquire(self, session_id: str, user_id: str) -> SessionLease:
+        policy = self.policy
+        deadline = time.monotonic() + policy.wait_timeout
+        interval = policy.poll_interval
+        while True:
+            lease = await self.repo.acquire_lease(session_id, user_id, self.owner, policy.ttl)
+            if lease is not None:
+                return lease
+            if policy.on_busy == "fail" or time.monotonic() + interval > deadline:
+                raise LeaseUnavailable(f"La sesión {session_id} está en uso por otro worker")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, policy.max_poll_interval)
+
+    @asynccontextmanager
+    async def hold(self, session_id: str, user_id: str,
+                   cancellation: Optional[CancellationToken] = None) -> AsyncIterator[SessionLease]:
+        # La espera por una sesión ocupada también corta con el deadline del run
+        acquire = self.acquire(session_id, user_id)
+        lease = await (cancellation.guard(acquire) if cancellation is not None else acquire)
+        heartbeat = asyncio.create_task(self._heartbeat(lease))
+        try:
+            yield lease
+        finally:
+            heartbeat.cancel()
+            try:
+                await self.repo.release_lease(lease)
+            except Exception as ex:
+                # Expira solo por TTL
+                logger.error(f"No se pudo liberar el lease de la sesión {session_id}: {ex}")
+
+    async def _heartbeat(self, lease: SessionLease) -> None:
+        while True:
+            await asyncio.sleep(self.policy.heartbeat)
+            try:
+                renewed = await self.repo.renew_lease(lease, self.policy.ttl)
+            except Exception as ex:
+                logger.warning(f"Falló la renovación del lease de {lease.session_id}: {ex}")
+                continue
+            if not renewed:
+                # Otro worker la tomó: el guardado final será rechazado por el fencing token
+                logger.error(f"Se perdió el lease de la sesión {lease.session_id} (token {lease.token})")
+                return
@@ -0,0 +1,12 @@
+from .index import BM25Index, EmbeddingIndex, MemoryIndex, NumpyBackend, VectorBackend, litellm_embedder
+from .store import UserMemoryManager
+
+__all__ = [
+    "BM25Index",
+    "EmbeddingIndex",
+    "MemoryIndex",
+    "NumpyBackend",
+    "VectorBackend",
+    "litellm_embedder",
+    "UserMemoryManager",
+]
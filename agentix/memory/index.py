@@ -0,0 +1,126 @@
+from __future__ import annotations
+import math
+import re
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Protocol, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class MemoryIndex(Protocol):
+    """
+    Índice local sobre los textos de las memorias de un usuario.
+    search devuelve (posición del documento, score) ordenado de mayor a menor.
+    """
+    async def add(self, docs: Sequence[str]) -> None: ...
+    async def search(self, query: str, k: int) -> List[Tuple[int, float]]: ...
+
+
+class BM25Index(MemoryIndex):
+    """
+    BM25 en memoria, sin dependencias. Adecuado para cientos/miles de memorias por usuario.
+    """
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._tfs: List[Counter] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+
+    async def add(self, docs: Sequence[str]) -> None:
+        for doc in docs:
+            pos = len(self._tfs)
+            tf = Counter(tokenize(doc))
+            self._tfs.append(tf)
+            self._lengths.append(sum(tf.values()))
+            for term in tf:
+                self._postings.setdefault(term, []).append(pos)
+
+    async def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        n = len(self._tfs)
+        if n == 0:
+            return []
+        avgdl = (sum(self._lengths) / n) or 1.0
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for pos in postings:
+                tf = self._tfs[pos][term]
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[pos] / avgdl)
+                scores[pos] = scores.get(pos, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+# Recibe textos y devuelve sus vectores (p.ej. litellm.aembedding)
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class VectorBackend(Protocol):
+    """
+    Backend de vecinos más cercanos. NumpyBackend hace fuerza bruta; se puede enchufar un ANN
+    (hnswlib, faiss...) implementando esta interfaz.
+    """
+    def add(self, vectors: List[List[float]]) -> None: ...
+    def search(self, vector: List[float], k: int) -> List[Tuple[int, float]]: ...
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Similitud coseno por fuerza bruta con NumPy.
+    """
+    def __init__(self):
+        try:
+            import numpy as np
+        except ImportError as ex:
+            raise ImportError("NumpyBackend requiere numpy: pip install numpy") from ex
+        self._np = np
+        self._matrix: Any = None
+
+    def add(self, vectors: List[List[float]]) -> None:
+        np = self._np
+        if not vectors:
+            return
+        m = np.asarray(vectors, dtype=np.float32)
+        m /= np.linalg.norm(m, axis=1, keepdims=True) + 1e-12
+        self._matrix = m if self._matrix is None else np.vstack([self._matrix, m])
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        np = self._np
+        if self._matrix is None:
+            return []
+        q = np.asarray(vector, dtype=np.float32)
+        q /= np.linalg.norm(q) + 1e-12
+        sims = self._matrix @ q
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(int(i), float(sims[i])) for i in top]
+
+
+class EmbeddingIndex(MemoryIndex):
+    def __init__(self, embed: EmbedFn, backend: VectorBackend | None = None):
+        self.embed = embed
+        self.backend = backend or NumpyBackend()
+
+    async def add(self, docs: Sequence[str]) -> None:
+        if docs:
+            self.backend.add(await self.embed(list(docs)))
+
+    async def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        vectors = await self.embed([query])
+        return self.backend.search(vectors[0], k)
+
+
+def litellm_embedder(model: str, **kwargs: Any) -> EmbedFn:
+    async def embed(texts: List[str]) -> List[List[float]]:
+        import litellm
+        response = await litellm.aembedding(model=model, input=texts, **kwargs)
+        return [item["embedding"] for item in response.data]
+    return embed
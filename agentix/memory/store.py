@@ -0,0 +1,151 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from textwrap import dedent
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from agentix.agent_repository import AgentRepository
+from agentix.models import AgentContext, MessageType, UserInfo, UserMemory
+from agentix.prompts.memory import MEMORY_EXTRACTION_PROMPT
+from agentix.routing import AUX_MEMORY
+from agentix.summarization import format_transcript
+from agentix.utils.collections import LRUCache
+from agentix.utils.tokens import estimate_tokens, truncate_to_tokens
+from .index import BM25Index, MemoryIndex
+
+logger = logging.getLogger(__name__)
+
+# ask(system, user, max_tokens, task=...) -> texto
+AskFn = Callable[..., Awaitable[str]]
+IndexFactory = Callable[[], MemoryIndex]
+
+
+class UserMemoryManager:
+    """
+    Memoria de largo plazo por usuario.
+
+    - retrieve: recupera las top-K memorias relevantes para el input, acotadas por `token_budget`.
+    - schedule_extraction: en segundo plano extrae hechos duraderos del run y los guarda en el repo.
+
+    El índice de cada usuario se construye una vez y se cachea (LRU) hasta que se le agregan memorias.
+    """
+
+    def __init__(
+        self,
+        repository: AgentRepository,
+        index_factory: IndexFactory = BM25Index,
+        top_k: int = 5,
+        token_budget: int = 400,
+        extraction_tokens: int = 400,
+        cache_size: int = 1024,
+    ):
+        self.repo = repository
+        self.index_factory = index_factory
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.extraction_tokens = extraction_tokens
+        self._indexes: LRUCache[str, Tuple[UserInfo, MemoryIndex]] = LRUCache(cache_size)
+        self._tasks: Set[asyncio.Task] = set()
+
+    # --------- recuperación ----------
+    async def _get_index(self, user_id: str) -> Tuple[UserInfo, MemoryIndex]:
+        cached = self._indexes.get(user_id)
+        if cached is None:
+            info = await self.repo.get_user_info(user_id)
+            index = self.index_factory()
+            await index.add([m.content for m in info.memories])
+            cached = (info, index)
+            self._indexes.put(user_id, cached)
+        return cached
+
+    async def retrieve(self, user_id: str, query: str) -> List[UserMemory]:
+        info, index = await self._get_index(user_id)
+        if not info.memories:
+            return []
+        selected: List[UserMemory] = []
+        used = 0
+        for pos, _score in await index.search(query, self.top_k):
+            memory = info.memories[pos]
+            cost = estimate_tokens(memory.content)
+            if used + cost > self.token_budget:
+                break
+            selected.append(memory)
+            used += cost
+        return selected
+
+    @staticmethod
+    def render(memories: List[UserMemory]) -> str:
+        if not memories:
+            return ""
+        facts = "\n".join(f"* {m.content}" for m in memories)
+        return dedent("""
+            ## Memoria del usuario
+            Hechos conocidos del usuario de conversaciones anteriores, relevantes para este mensaje:
+            <user_memory>
+            {facts}
+            </user_memory>
+        """).format(facts=facts)
+
+    # --------- extracción ----------
+    def schedule_extraction(self, agent_context: AgentContext, run_messages: List[MessageType], ask: AskFn) -> None:
+        """
+        Lanza la extracción en segundo plano; no bloquea la respuesta del run.
+        """
+        task = asyncio.create_task(self.extract(agent_context, run_messages, ask))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def extract(self, agent_context: AgentContext, run_messages: List[MessageType], ask: AskFn) -> List[UserMemory]:
+        transcript = format_transcript(run_messages)
+        if not transcript:
+            return []
+        try:
+            info, _ = await self._get_index(agent_context.user_id)
+            known = "\n".join(f"- {m.content}" for m in info.memories[-50:])
+            message = dedent("""
+                ## Memorias existentes
+                <memories>
+                {known}
+                </memories>
+
+                ## Conversación
+                <conversation>
+                {transcript}
+                </conversation>
+            """).format(known=known, transcript=truncate_to_tokens(transcript, 4 * self.extraction_tokens))
+            raw = await ask(MEMORY_EXTRACTION_PROMPT, message, self.extraction_tokens, task=AUX_MEMORY)
+            facts = _parse_facts(raw)
+            existing = {m.content.strip().lower() for m in info.memories}
+            memories = [
+                UserMemory(content=f, session_id=agent_context.session_id, run_id=agent_context.run_id)
+                for f in facts if f.strip().lower() not in existing
+            ]
+            if memories:
+                await self.repo.add_user_memories(agent_context.user_id, memories)
+                self._indexes.pop(agent_context.user_id)
+            return memories
+        except Exception as ex:
+            logger.error(f"Error extrayendo memorias del usuario {agent_context.user_id}: {ex}")
+            return []
+
+    async def drain(self) -> None:
+        """
+        Espera las extracciones pendientes (apagado ordenado / tests).
+        """
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+def _parse_facts(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return []
+    text = raw.strip()
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return []
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    return [str(f).strip() for f in data if isinstance(f, str) and f.strip()]
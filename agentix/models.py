@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional, List, Union
+import uuid
+from typing import Annotated, Any, Dict, Literal, Optional, List, Union
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field
 
@@ -25,10 +26,10 @@ class Message(BaseModel):
         return wired
     
 class UserMessage(Message):
-    role: str = Field(default="user", frozen=True)
+    role: Literal["user"] = Field(default="user", frozen=True)
     
 class SystemMessage(Message):
-    role: str = Field(default="system", frozen=True)
+    role: Literal["system"] = Field(default="system", frozen=True)
 
 class ToolCall(BaseModel):
     tool_call_id: str
@@ -46,7 +47,7 @@ class ToolCall(BaseModel):
         }
 
 class AssistantMessage(Message):
-    role: str = Field(default="assistant", frozen=True)
+    role: Literal["assistant"] = Field(default="assistant", frozen=True)
     finish_reason: str
     tool_calls: list[ToolCall] = []
 
@@ -58,7 +59,7 @@ class AssistantMessage(Message):
 
 
 class ToolResultMessage(Message):
-    role: str = Field(default="tool", frozen=True)
+    role: Literal["tool"] = Field(default="tool", frozen=True)
     tool_call_id: str
     name: str
 
@@ -68,18 +69,25 @@ class ToolResultMessage(Message):
         wired["name"] = self.name
         return wired
 
+SummaryLevel = Literal["chunk", "period", "session"]
+
 class SessionSummary(BaseModel):
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     content: str
+    # Nivel en el árbol de resúmenes: chunk (un bloque de runs) -> period -> session
+    level: SummaryLevel = "chunk"
 
 
 
 class UserMemory(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     content: str
+    session_id: Optional[str] = None
+    run_id: Optional[str] = None
 
 class UserInfo(BaseModel):
-    id: str
+    user_id: str
     memories: list[UserMemory] = []
 
 class Param(BaseModel):
@@ -90,13 +98,56 @@ class Param(BaseModel):
     default_value: Optional[Any] = None
     enum_values: Optional[List[str]] = None
 
+class ToolCachePolicy(BaseModel):
+    """
+    Cache de resultados de una tool de solo lectura.
+
+    - ttl: segundos de validez.
+    - scope: "global" (mismos argumentos = mismo resultado para todos), "user" o "session".
+    - tags: etiquetas de las entradas; admiten campos de los argumentos, p.ej. "property:{property_id}".
+    """
+    ttl: float
+    scope: Literal["global", "user", "session"] = "global"
+    tags: List[str] = []
+
+
+class ResultEncoding(BaseModel):
+    """
+    Cómo se serializa el resultado de una tool para el contexto.
+
+    - columnar: las listas de registros homogéneos (al menos `min_rows`) van como tabla: una
+      fila de encabezado y una fila por registro, separadas por `separator`, en vez de repetir
+      las claves en cada registro.
+    - omit: campos que no se envían al modelo.
+    - drop_empty: celdas nulas o vacías quedan en blanco y las columnas sin ningún valor se quitan.
+    - defaults: valores por defecto de campos; las celdas con ese valor quedan en blanco y el
+      encabezado lo aclara. No se aplica en columnas con nulos o vacíos (el blanco sería ambiguo).
+    - timestamp_format: formato corto de fechas (strftime, UTC); None = ISO completo.
+    """
+    columnar: bool = True
+    min_rows: int = 3
+    separator: str = "\t"
+    omit: List[str] = []
+    drop_empty: bool = True
+    defaults: Dict[str, Any] = {}
+    timestamp_format: Optional[str] = "%Y-%m-%d %H:%M"
+
+
 class Tool(BaseModel):
     name: str
     desc: str
     params: List[Param]
     fn: Any
+    cache: Optional[ToolCachePolicy] = None
+    # Tags que invalida al ejecutarse (tools de escritura); mismo formato que ToolCachePolicy.tags
+    invalidates: List[str] = []
+    # Sin efectos secundarios: puede ejecutarse de forma especulativa
+    read_only: bool = False
+    # None = JSON tal cual (o el result_encoding por defecto del Agent)
+    encoding: Optional[ResultEncoding] = None
 
-MessageType = Union[UserMessage, SystemMessage, AssistantMessage, ToolResultMessage]
+# Unión discriminada por `role`: se elige el modelo directamente en vez de probar cada uno
+MessageType = Annotated[Union[UserMessage, SystemMessage, AssistantMessage, ToolResultMessage], Field(discriminator="role")]
 
 class Session(BaseModel):
     session_id: Optional[str] = None
@@ -106,3 +157,66 @@ class Session(BaseModel):
     messages: list[MessageType] = []
     summaries: list[SessionSummary] = []
     state: Dict[str, Any] = {}
+
+
+RunStatus = Literal["running", "completed", "exhausted", "budget_exceeded", "cancelled", "failed"]
+
+class RunCheckpoint(BaseModel):
+    """
+    Mensajes de un run guardados a medida que se producen, para poder reanudarlo.
+    """
+    run_id: str
+    session_id: str
+    user_id: str
+    status: RunStatus = "running"
+    messages: list[MessageType] = []
+    # Snapshot del ContextManager (stack de vistas) tras el último resultado de tool guardado
+    state: Optional[Any] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: Optional[datetime] = None
+
+
+class SessionLease(BaseModel):
+    """
+    Lease exclusivo sobre una sesión. `token` crece en cada adquisición (fencing token): un
+    guardado con un token viejo se rechaza.
+    """
+    session_id: str
+    user_id: str
+    owner: str
+    token: int
+    expires_at: datetime
+
+
+UsageScope = Literal["run", "session", "user", "model"]
+
+
+class UsageTotals(BaseModel):
+    """
+    Consumo acumulado de un ámbito (run, sesión, usuario o modelo), incluidas tareas auxiliares.
+    """
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+    cost: float = 0.0
+    # Mismo desglose por modelo
+    models: Dict[str, Dict[str, float]] = {}
+
+
+# trusted: documentos escritos por agentix; strict: entrada externa, sin conversiones de tipo
+LoadMode = Literal["trusted", "strict"]
+
+
+def load_session(doc: Dict[str, Any], mode: LoadMode = "trusted") -> Session:
+    """
+    Session a partir de un documento del storage (las claves propias del storage se ignoran).
+    Con la unión discriminada el validador compilado elige el modelo de cada mensaje por `role`;
+    en pydantic v2 es más rápido que armar los mensajes con model_construct desde Python.
+    """
+    return Session.model_validate(doc, strict=mode == "strict")
+
+
+def load_run_checkpoint(doc: Dict[str, Any], mode: LoadMode = "trusted") -> RunCheckpoint:
+    return RunCheckpoint.model_validate(doc, strict=mode == "strict")
@@ -0,0 +1,27 @@
+from textwrap import dedent
+
+
+MEMORY_EXTRACTION_PROMPT = dedent(
+        """
+Eres un experto en identificar **hechos duraderos sobre el usuario** a partir de una conversación.
+
+### Objetivo
+
+* Extraer solo información estable y útil en futuras conversaciones: datos personales, preferencias,
+  restricciones, objetivos, decisiones y entidades relevantes (proyectos, propiedades, clientes...).
+* Ignorar saludos, datos efímeros del turno y cualquier cosa que ya esté en las memorias existentes.
+* Cada hecho debe ser una frase corta, autocontenida y en tercera persona ("El usuario vive en Bogotá").
+
+### Respuesta
+
+Devuelve únicamente un arreglo JSON de strings, sin explicaciones. Si no hay hechos nuevos devuelve [].
+
+### Ejemplo
+
+**Entrada:**
+- user: Hola, soy Roman y vivo en Bogotá. Quiero ver apartamentos de máximo 2 habitaciones.
+- assistant: Claro Roman, te muestro las opciones.
+
+**Salida:**
+["El usuario se llama Roman.", "El usuario vive en Bogotá.", "El usuario busca apartamentos de máximo 2 habitaciones."]
+        """)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """
+    Token bucket clásico: `rate` unidades por minuto, ráfaga hasta `capacity`.
+
+    Admite deuda: `charge` descuenta consumo real conocido a posteriori (p.ej. tokens de la
+    respuesta) aunque deje el balance negativo; las siguientes admisiones esperan a que se pague.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute debe ser > 0")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.clock = clock
+        self.tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float) -> float:
+        """
+        Toma `amount` si hay saldo y devuelve 0; si no, devuelve los segundos a esperar.
+        Pedidos mayores que la capacidad se recortan a la capacidad (si no, nunca se admitirían).
+        """
+        amount = min(amount, self.capacity)
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def charge(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        # Devuelve lo tomado sin superar la capacidad (el refill pudo haberla completado)
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    Límites de proveedor por requests (RPM) y tokens (TPM) por minuto. None = sin límite.
+    """
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock=clock) if tpm else None
+
+    def try_acquire(self, tokens: int) -> float:
+        wait = self.requests.try_acquire(1) if self.requests else 0.0
+        if wait > 0:
+            return wait
+        if self.tokens:
+            wait = self.tokens.try_acquire(tokens)
+            if wait > 0:
+                # No se admitió: se devuelve la request tomada
+                if self.requests:
+                    self.requests.refund(1)
+                return wait
+        return 0.0
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Espera hasta poder admitir una request de `tokens` estimados. Devuelve los segundos esperados.
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """
+        Ajusta el bucket de tokens con el consumo real (positivo = deuda, negativo = devolución).
+        """
+        if self.tokens and actual != estimated:
+            self.tokens.charge(actual - estimated)
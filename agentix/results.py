@@ -0,0 +1,227 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import math
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Protocol, Tuple
+
+from pydantic import BaseModel
+
+from .cancellation import RunCancelled
+from .models import AgentContext, Param, Tool
+from .prompts.condensation import CONDENSATION_PROMPT
+from .routing import AUX_CONDENSATION
+from .utils.collections import LRUCache
+from .utils.tokens import CHARS_PER_TOKEN, estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+READ_RESULT_TOOL = "read_result"
+
+# ask(system, user, max_tokens, task=...) -> texto
+AskFn = Callable[..., Awaitable[str]]
+
+
+class ResultSizePolicy(BaseModel):
+    """
+    Tope de tamaño de un resultado de tool dentro del contexto.
+
+    Los resultados de más de `max_tokens` se guardan fuera de banda y en el mensaje queda una
+    vista previa de `preview_tokens` con un handle; el modelo lee el resto con
+    read_result(handle, page) en páginas de `page_tokens`.
+
+    Con `condense` la vista previa se reemplaza por un resumen de hasta `condense_tokens` que
+    escribe el modelo auxiliar (ruta "condensation" del ModelRouter) a partir de los primeros
+    `condense_input_tokens` del resultado; si falla se usa la vista previa.
+    """
+    max_tokens: int = 1500
+    preview_tokens: int = 300
+    page_tokens: int = 1500
+    condense: bool = False
+    condense_tokens: int = 200
+    condense_input_tokens: int = 6000
+
+
+class ResultStore(Protocol):
+    """
+    Almacén de resultados grandes. `owner` es el user_id: solo su dueño puede leerlos.
+    """
+    async def put(self, handle: str, content: str, owner: str) -> None: ...
+    async def get(self, handle: str) -> Optional[Tuple[str, str]]: ...
+
+
+class InMemoryResultStore(ResultStore):
+    """
+    Almacén local del proceso, acotado (los resultados más viejos se descartan). Los handles
+    no sobreviven a un reinicio: para sesiones persistentes conviene un store persistente.
+    """
+    def __init__(self, max_entries: int = 256):
+        self._data: LRUCache[str, Tuple[str, str]] = LRUCache(max_entries)
+
+    async def put(self, handle: str, content: str, owner: str) -> None:
+        self._data.put(handle, (content, owner))
+
+    async def get(self, handle: str) -> Optional[Tuple[str, str]]:
+        return self._data.get(handle)
+
+
+class LocalFileResultStore(ResultStore):
+    """
+    Un archivo JSON por resultado en `directory`. Sirve para un solo host; la limpieza de
+    archivos viejos queda a cargo del despliegue.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, handle: str) -> str:
+        if not handle.isalnum():
+            raise ValueError(f"Handle inválido: {handle}")
+        return os.path.join(self.directory, f"{handle}.json")
+
+    def _write(self, path: str, data: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def put(self, handle: str, content: str, owner: str) -> None:
+        data = json.dumps({"owner": owner, "content": content}, ensure_ascii=False)
+        await asyncio.to_thread(self._write, self._path(handle), data)
+
+    async def get(self, handle: str) -> Optional[Tuple[str, str]]:
+        raw = await asyncio.to_thread(self._read, self._path(handle))
+        if raw is None:
+            return None
+        doc = json.loads(raw)
+        return doc["content"], doc["owner"]
+
+
+def _shape(content: str) -> Dict[str, Any]:
+    """
+    Describe la forma de un resultado JSON (cantidad de elementos, claves) para la vista previa.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return {}
+    if isinstance(data, list):
+        return {"items": len(data)}
+    if isinstance(data, dict):
+        shape: Dict[str, Any] = {"keys": list(data)[:20]}
+        lists = {k: len(v) for k, v in data.items() if isinstance(v, list)}
+        if lists:
+            shape["items"] = lists
+        return shape
+    return {}
+
+
+class ResultOffloader:
+    """
+    Aplica la ResultSizePolicy: guarda los resultados grandes en el store y devuelve el
+    contenido compacto que va al contexto, y expone la tool read_result para paginarlos.
+    """
+    def __init__(self, store: Optional[ResultStore] = None, policy: Optional[ResultSizePolicy] = None,
+                 ask: Optional[AskFn] = None):
+        self.store = store or InMemoryResultStore()
+        self.policy = policy or ResultSizePolicy()
+        self.ask = ask
+        self.tool = self._build_tool()
+
+    def pages(self, content: str) -> int:
+        return max(1, math.ceil(len(content) / (self.policy.page_tokens * CHARS_PER_TOKEN)))
+
+    async def bound(self, content: str, tool_name: str, agent_context: AgentContext) -> Tuple[str, Optional[str]]:
+        """
+        Devuelve (contenido para el contexto, handle). handle es None si el resultado entra completo
+        o si el store falló (queda solo la vista previa).
+        """
+        size = estimate_tokens(content)
+        if size <= self.policy.max_tokens or tool_name == READ_RESULT_TOOL:
+            return content, None
+        handle = uuid.uuid4().hex
+        try:
+            await self.store.put(handle, content, agent_context.user_id)
+        except Exception as ex:
+            # La tool ya se ejecutó: su resultado se guarda en el checkpoint aunque sea recortado
+            logger.error(f"No se pudo guardar el resultado de {tool_name}: {ex}")
+            return json.dumps({
+                "status": "truncated",
+                "tool": tool_name,
+                "size_tokens": size,
+                "preview": truncate_to_tokens(content, self.policy.preview_tokens),
+                "hint": "Resultado truncado y no disponible completo.",
+            }, ensure_ascii=False), None
+        compact = {
+            "status": "stored",
+            "handle": handle,
+            "tool": tool_name,
+            "size_tokens": size,
+            "pages": self.pages(content),
+            **_shape(content),
+        }
+        summary = await self._condense(content, tool_name)
+        if summary:
+            compact["summary"] = summary
+        else:
+            compact["preview"] = truncate_to_tokens(content, self.policy.preview_tokens)
+        compact["hint"] = f"Resultado truncado. Usa {READ_RESULT_TOOL}(handle, page) para leerlo completo."
+        return json.dumps(compact, ensure_ascii=False), handle
+
+    async def _condense(self, content: str, tool_name: str) -> Optional[str]:
+        if not self.policy.condense or self.ask is None:
+            return None
+        message = f"Herramienta: {tool_name}\n\n{truncate_to_tokens(content, self.policy.condense_input_tokens)}"
+        try:
+            return await self.ask(CONDENSATION_PROMPT, message, self.policy.condense_tokens, task=AUX_CONDENSATION)
+        except RunCancelled:
+            raise
+        except Exception as ex:
+            logger.error(f"No se pudo condensar el resultado de {tool_name}: {ex}")
+            return None
+
+    async def read(self, handle: str, page: int, agent_context: AgentContext) -> Dict[str, Any]:
+        stored = await self.store.get(handle)
+        if stored is None:
+            # Los handles quedan en el historial de la sesión pero el store puede descartarlos
+            # (TTL, LRU en memoria, reinicio del proceso)
+            return {
+                "status": "expired",
+                "handle": handle,
+                "message": (f"El resultado '{handle}' ya no está disponible. Vuelve a llamar a la tool "
+                            "original si necesitas esos datos."),
+            }
+        if stored[1] != agent_context.user_id:
+            return {"status": "error", "message": f"Resultado '{handle}' no encontrado"}
+        content = stored[0]
+        pages = self.pages(content)
+        if page < 1 or page > pages:
+            return {"status": "error", "message": f"Página fuera de rango (1..{pages})"}
+        size = self.policy.page_tokens * CHARS_PER_TOKEN
+        return {"handle": handle, "page": page, "pages": pages, "content": content[(page - 1) * size:page * size]}
+
+    def _build_tool(self) -> Tool:
+        offloader = self
+
+        async def read_result(handle: str, page: int = 1, agent_context: AgentContext = None):
+            return await offloader.read(handle, page, agent_context)
+        # Con `from __future__ import annotations` la anotación es un string y el Agent no la reconocería
+        read_result.__annotations__["agent_context"] = AgentContext
+
+        return Tool(
+            name=READ_RESULT_TOOL,
+            desc="Lee por páginas un resultado de tool guardado fuera del contexto",
+            params=[
+                Param(name="handle", type="str", desc="handle devuelto en el resultado truncado"),
+                Param(name="page", type="int", desc="número de página (desde 1)", optional=True, default_value=1),
+            ],
+            fn=read_result,
+            read_only=True,
+        )
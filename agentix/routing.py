@@ -0,0 +1,108 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .models import AgentContext, Tool
+
+# Tareas auxiliares conocidas (no son turnos de conversación)
+AUX_SUMMARIZATION = "summarization"
+AUX_COMPRESSION = "compression"
+AUX_CONDENSATION = "condensation"
+AUX_MEMORY = "memory_extraction"
+
+
+class ModelRoute(BaseModel):
+    name: str
+    model: str
+    timeout: Optional[float] = None
+    # kwargs extra para litellm.acompletion (temperature, api_base, ...)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class RouteStats(BaseModel):
+    calls: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+class TurnInfo(BaseModel):
+    """
+    Datos de un paso principal disponibles para decidir la ruta.
+    """
+    agent_context: AgentContext
+    step: int
+    tools: List[Tool] = []
+
+    @property
+    def has_tools(self) -> bool:
+        return len(self.tools) > 0
+
+
+RoutingRule = Callable[[TurnInfo], Optional[ModelRoute]]
+
+
+def by_tools(without_tools: ModelRoute, with_tools: ModelRoute) -> RoutingRule:
+    """
+    Regla: modelo pequeño si el paso no ofrece tools, grande si se esperan tool calls.
+    """
+    def rule(turn: TurnInfo) -> Optional[ModelRoute]:
+        return with_tools if turn.has_tools else without_tools
+    return rule
+
+
+class ModelRouter:
+    """
+    Política de selección de modelo.
+
+    - Turnos principales: se evalúan `rules` en orden; la primera que devuelva una ruta gana,
+      si ninguna aplica se usa `default`.
+    - Tareas auxiliares (resúmenes, compresión, condensación de resultados): usan la ruta de
+      `aux_routes[task]`, o `auxiliary`, o `default` si no hay ninguna configurada.
+
+    Lleva estadísticas de latencia/tokens/costo por nombre de ruta.
+    """
+
+    def __init__(
+        self,
+        default: ModelRoute,
+        auxiliary: Optional[ModelRoute] = None,
+        rules: Optional[List[RoutingRule]] = None,
+        aux_routes: Optional[Dict[str, ModelRoute]] = None,
+    ):
+        self.default = default
+        self.auxiliary = auxiliary
+        self.rules = rules or []
+        self.aux_routes = aux_routes or {}
+        self.stats: Dict[str, RouteStats] = {}
+
+    def select(self, turn: TurnInfo) -> ModelRoute:
+        for rule in self.rules:
+            route = rule(turn)
+            if route is not None:
+                return route
+        return self.default
+
+    def select_aux(self, task: str) -> ModelRoute:
+        return self.aux_routes.get(task) or self.auxiliary or self.default
+
+    def record(self, route: ModelRoute, latency: float, usage: Optional[Dict[str, Any]] = None,
+               cost: float = 0.0, error: bool = False) -> None:
+        stats = self.stats.setdefault(route.name, RouteStats())
+        stats.calls += 1
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+        if error:
+            stats.errors += 1
+        if usage:
+            stats.prompt_tokens += usage.get("prompt_tokens") or 0
+            stats.completion_tokens += usage.get("completion_tokens") or 0
+        stats.cost += cost or 0.0
@@ -0,0 +1,59 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .models import AssistantMessage, MessageType
+
+
+class StepBudgetPolicy(BaseModel):
+    """
+    Qué hacer cuando un run agota `max_steps`.
+
+    - final_completion: pide una última respuesta sin tools (tool_choice="none") para cerrar el turno
+      con lo que ya se obtuvo, en lugar de fallar.
+    - persist_partial: guarda el run parcial (tool calls y resultados) en la sesión para que el
+      siguiente turno no repita el trabajo.
+    - max_nav_steps: pasos de navegación pura por run que no consumen `max_steps`; los que
+      excedan el tope cuentan como pasos normales.
+    """
+    final_completion: bool = True
+    persist_partial: bool = True
+    max_nav_steps: int = 3
+    final_notice: str = (
+        "Se alcanzó el límite de pasos de este turno: no puedes llamar más funciones. "
+        "Responde al usuario con la información que ya obtuviste e indica qué quedó pendiente."
+    )
+    fallback_message: str = "No se obtuvo respuesta final dentro del límite de pasos."
+
+
+class RunResult(BaseModel):
+    run_id: str
+    output: Optional[str]
+    status: str
+    steps: int
+    max_steps: int
+    # El run agotó max_steps (haya o no cerrado con la respuesta forzada)
+    exhausted: bool = False
+    resumed: bool = False
+    usage: Dict[str, int] = {}
+    # Costo estimado del run y tokens de llamadas auxiliares (no incluidos en `usage`)
+    cost: float = 0.0
+    aux_tokens: int = 0
+    # Motivo si el run se canceló ("deadline", "cancelled" u otro indicado al cancelar)
+    cancel_reason: Optional[str] = None
+
+    @property
+    def budget_utilization(self) -> float:
+        return self.steps / self.max_steps if self.max_steps else 0.0
+
+
+def sum_usage(messages: List[MessageType]) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for m in messages:
+        if not isinstance(m, AssistantMessage):
+            continue
+        for key, value in (m.usage_data or {}).items():
+            if isinstance(value, int):
+                totals[key] = totals.get(key, 0) + value
+    return totals
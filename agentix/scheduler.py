@@ -0,0 +1,243 @@
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+
+from pydantic import BaseModel
+
+from .ratelimit import RateLimiter
+from .utils.tokens import estimate_tokens
+
+# Menor = más prioritario
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class Limiter(Protocol):
+    def try_acquire(self, tokens: int) -> float: ...
+    def settle(self, estimated: int, actual: int) -> None: ...
+
+
+def estimate_request_tokens(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]] = None,
+                            max_tokens: Optional[int] = None) -> int:
+    """
+    Estimación barata de lo que consumirá una llamada: prompt (mensajes + specs de tools) y la
+    salida máxima pedida. El error se corrige después con `settle`.
+    """
+    prompt = estimate_tokens(json.dumps(messages, ensure_ascii=False, default=str))
+    if tools:
+        prompt += estimate_tokens(json.dumps(tools, ensure_ascii=False, default=str))
+    return prompt + (max_tokens or 0)
+
+
+class QueueStats(BaseModel):
+    admitted: int = 0
+    queued: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def avg_wait(self) -> float:
+        return self.total_wait / self.admitted if self.admitted else 0.0
+
+
+class FileRateLimiter(Limiter):
+    """
+    Buckets RPM/TPM guardados en un archivo y protegidos con flock: coordina varios procesos de la
+    misma máquina contra el mismo límite del proveedor. Solo POSIX.
+
+    El lock se pide sin bloquear (LOCK_NB): si otro proceso lo tiene, try_acquire devuelve
+    `retry_after` segundos y el scheduler reintenta con su timer, sin frenar el event loop.
+    Los ajustes de `settle` que no consiguen el lock se aplican en la siguiente actualización.
+    """
+
+    def __init__(self, path: str, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 retry_after: float = 0.005):
+        import fcntl  # noqa: F401  (falla temprano en plataformas sin flock)
+        self.path = path
+        self.limits = {"requests": rpm, "tokens": tpm}
+        self.retry_after = retry_after
+        self._unsettled = 0.0
+
+    def _update(self, fn: Callable[[Dict[str, float], float], float]) -> Optional[float]:
+        """
+        Aplica `fn` al estado del archivo bajo el lock. None si el lock estaba tomado.
+        """
+        import fcntl
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                raw = os.read(fd, 4096)
+                now = time.time()
+                state: Dict[str, float] = json.loads(raw) if raw else {}
+                last = state.get("ts", now)
+                for key, limit in self.limits.items():
+                    if limit:
+                        state[key] = min(limit, state.get(key, limit) + (now - last) * limit / 60.0)
+                state["ts"] = now
+                if self._unsettled and self.limits["tokens"]:
+                    state["tokens"] -= self._unsettled
+                self._unsettled = 0.0
+                result = fn(state, now)
+                data = json.dumps(state).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, data)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def try_acquire(self, tokens: int) -> float:
+        def fn(state: Dict[str, float], _now: float) -> float:
+            wants = {"requests": 1.0, "tokens": float(tokens)}
+            wait = 0.0
+            for key, limit in self.limits.items():
+                if limit:
+                    amount = min(wants[key], limit)
+                    if state[key] < amount:
+                        wait = max(wait, (amount - state[key]) * 60.0 / limit)
+            if wait > 0:
+                return wait
+            for key, limit in self.limits.items():
+                if limit:
+                    state[key] -= min(wants[key], limit)
+            return 0.0
+        wait = self._update(fn)
+        return self.retry_after if wait is None else wait
+
+    def settle(self, estimated: int, actual: int) -> None:
+        if not self.limits["tokens"] or actual == estimated:
+            return
+        # Se aplica dentro de _update; si el lock está tomado queda para la próxima actualización
+        self._unsettled += actual - estimated
+        self._update(lambda _state, _now: 0.0)
+
+
+class _Queue:
+    __slots__ = ("limiter", "heap", "timer")
+
+    def __init__(self, limiter: Limiter):
+        self.limiter = limiter
+        self.heap: List[Tuple[int, int, int, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class LLMScheduler:
+    """
+    Admisión de llamadas LLM con token buckets (RPM/TPM) delante del proveedor.
+
+    Cada modelo tiene su cola con prioridad: los turnos interactivos se admiten antes que las
+    tareas de fondo (resúmenes, extracción de memoria). Las llamadas esperan en la cola en lugar
+    de recibir 429 y reintentar. Sin límites configurados admite todo de inmediato.
+
+    `limits` define (rpm, tpm) por modelo; `default_limits` aplica al resto. `limiter_factory`
+    permite cambiar el backend (p.ej. FileRateLimiter para coordinar procesos).
+    """
+
+    def __init__(
+        self,
+        default_limits: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        limits: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        limiter_factory: Optional[Callable[[str, Optional[float], Optional[float]], Limiter]] = None,
+    ):
+        self.default_limits = default_limits
+        self.limits = limits or {}
+        self.limiter_factory = limiter_factory or (lambda _model, rpm, tpm: RateLimiter(rpm=rpm, tpm=tpm))
+        self._queues: Dict[str, Optional[_Queue]] = {}
+        self._seq = itertools.count()
+        self.stats: Dict[int, QueueStats] = {}
+
+    def _queue(self, model: str) -> Optional[_Queue]:
+        if model not in self._queues:
+            rpm, tpm = self.limits.get(model) or self.default_limits or (None, None)
+            self._queues[model] = _Queue(self.limiter_factory(model, rpm, tpm)) if (rpm or tpm) else None
+        return self._queues[model]
+
+    def queue_depth(self, model: Optional[str] = None) -> int:
+        queues = [self._queues.get(model)] if model else list(self._queues.values())
+        return sum(1 for q in queues if q is not None for entry in q.heap if not entry[3].done())
+
+    async def acquire(self, model: str, tokens: int, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """
+        Espera turno para una llamada de ~`tokens` tokens. Devuelve los segundos de espera en cola.
+        """
+        queue = self._queue(model)
+        if queue is None:
+            self._record(priority, 0.0, queued=False)
+            return 0.0
+        if not queue.heap and queue.limiter.try_acquire(tokens) <= 0:
+            self._record(priority, 0.0, queued=False)
+            return 0.0
+
+        started = time.perf_counter()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.heap, (priority, next(self._seq), tokens, future))
+        self._pump(queue)
+        try:
+            await future
+        finally:
+            # Si se canceló mientras esperaba, el pump lo descarta al llegar a la cabeza
+            if not future.done():
+                future.cancel()
+        waited = time.perf_counter() - started
+        self._record(priority, waited, queued=True)
+        return waited
+
+    def settle(self, model: str, estimated: int, actual: int) -> None:
+        queue = self._queues.get(model)
+        if queue is not None:
+            queue.limiter.settle(estimated, actual)
+
+    def _pump(self, queue: _Queue) -> None:
+        while queue.heap:
+            _priority, _seq, tokens, future = queue.heap[0]
+            if future.done():
+                heapq.heappop(queue.heap)
+                continue
+            wait = queue.limiter.try_acquire(tokens)
+            if wait > 0:
+                if queue.timer is None:
+                    queue.timer = asyncio.get_running_loop().call_later(wait, self._on_timer, queue)
+                return
+            heapq.heappop(queue.heap)
+            future.set_result(None)
+
+    def _on_timer(self, queue: _Queue) -> None:
+        queue.timer = None
+        self._pump(queue)
+
+    def _record(self, priority: int, waited: float, queued: bool) -> None:
+        stats = self.stats.setdefault(priority, QueueStats())
+        stats.admitted += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        if queued:
+            stats.queued += 1
+
+
+_default_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Scheduler compartido por todo el proceso (sin límites hasta que se configure).
+    """
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = LLMScheduler()
+    return _default_scheduler
+
+
+def set_scheduler(scheduler: LLMScheduler) -> None:
+    global _default_scheduler
+    _default_scheduler = scheduler
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .models import Tool
+
+logger = logging.getLogger(__name__)
+
+# (tool, argumentos) -> (contenido serializado, resultado)
+SpeculativeLaunch = Callable[[Tool, Dict[str, Any]], Awaitable[Tuple[str, Any]]]
+
+
+class SpeculativeCall(BaseModel):
+    """
+    Tool call que la vista predice para el próximo paso; debe ser de solo lectura.
+    """
+    tool_name: str
+    arguments: Dict[str, Any] = {}
+
+
+class SpeculationPolicy(BaseModel):
+    # Máximo de llamadas especulativas lanzadas por paso
+    max_calls: int = 2
+
+
+class SpeculationStats(BaseModel):
+    launched: int = 0
+    hits: int = 0
+    wasted: int = 0
+    # Predicciones descartadas por no ser de solo lectura, no estar disponibles o exceder el presupuesto
+    skipped: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.launched if self.launched else 0.0
+
+
+def _call_key(tool_name: str, arguments: Dict[str, Any]) -> str:
+    return json.dumps([tool_name, arguments], sort_keys=True, ensure_ascii=False, default=str)
+
+
+class Speculation:
+    """
+    Tool calls de solo lectura lanzadas en paralelo con la llamada al modelo.
+
+    Si el modelo pide exactamente esa llamada (mismo nombre y argumentos) se usa el resultado
+    especulado; las que no se piden se cancelan al cerrar el paso.
+    """
+
+    def __init__(self, stats: SpeculationStats):
+        self.stats = stats
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def launch(self, calls: List[SpeculativeCall], tools: List[Tool], policy: SpeculationPolicy,
+               run: SpeculativeLaunch) -> "Speculation":
+        tools_by_name = {t.name: t for t in tools}
+        for call in calls:
+            tool = tools_by_name.get(call.tool_name)
+            key = _call_key(call.tool_name, call.arguments)
+            if (tool is None or not (tool.read_only or tool.cache) or key in self._tasks
+                    or len(self._tasks) >= policy.max_calls):
+                self.stats.skipped += 1
+                continue
+            self._tasks[key] = asyncio.create_task(run(tool, call.arguments))
+            self.stats.launched += 1
+        return self
+
+    async def take(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Tuple[str, Any]]:
+        task = self._tasks.pop(_call_key(tool_name, arguments), None)
+        if task is None:
+            return None
+        try:
+            outcome = await task
+        except Exception as ex:
+            # Se ejecuta de nuevo por el camino normal, que reporta el error al modelo
+            logger.warning(f"Falló la ejecución especulativa de {tool_name}: {ex}")
+            self.stats.wasted += 1
+            return None
+        self.stats.hits += 1
+        return outcome
+
+    def discard(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self.stats.wasted += len(self._tasks)
+        self._tasks.clear()
+
+    async def __aenter__(self) -> "Speculation":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.discard()
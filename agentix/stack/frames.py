@@ -1,10 +1,72 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 
-@dataclass
+
+@dataclass(slots=True)
 class StackFrame:
     screen_key: str
     params: Dict[str, Any]
     view_state: Dict[str, Any]
     return_path: Optional[str] = None
+    # Hash de view_state calculado perezosamente; None = hay que recalcularlo
+    digest: Optional[str] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "StackFrame":
+        # Se reutilizan los mismos dicts de Session.state: las mutaciones de view_state
+        # que hacen las tools quedan aplicadas en sitio, sin re-serializar el stack.
+        return cls(
+            screen_key=raw["screen_key"],
+            params=raw.setdefault("params", {}),
+            view_state=raw.setdefault("view_state", {}),
+            return_path=raw.get("return_path"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "screen_key": self.screen_key,
+            "params": self.params,
+            "view_state": self.view_state,
+            "return_path": self.return_path,
+        }
+
+
+class FrameStack:
+    """
+    Stack de frames de un run. Se parsea una sola vez desde Session.state y solo se
+    vuelve a escribir (flush) si la navegación lo modificó (dirty).
+    """
+    __slots__ = ("frames", "dirty")
+
+    def __init__(self, frames: Optional[List[StackFrame]] = None):
+        self.frames: List[StackFrame] = frames or []
+        self.dirty = False
+
+    @classmethod
+    def from_state(cls, raw: Any) -> "FrameStack":
+        if not isinstance(raw, list):
+            return cls()
+        return cls([StackFrame.from_dict(f) for f in raw if isinstance(f, dict) and "screen_key" in f])
+
+    def to_state(self) -> List[Dict[str, Any]]:
+        return [f.to_dict() for f in self.frames]
+
+    def current(self) -> Optional[StackFrame]:
+        return self.frames[-1] if self.frames else None
+
+    def push(self, frame: StackFrame) -> None:
+        self.frames.append(frame)
+        self.dirty = True
+
+    def pop(self) -> Optional[StackFrame]:
+        if not self.frames:
+            return None
+        self.dirty = True
+        return self.frames.pop()
+
+    def breadcrumb(self, depth: int = 3) -> str:
+        return " / ".join(f.screen_key for f in self.frames[-depth:])
+
+    def __len__(self) -> int:
+        return len(self.frames)
@@ -1,117 +1,185 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Tuple
+import copy
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
-from agentix.models import AgentContext, Tool
-from agentix.context import ContextManager
-from .frames import StackFrame
-from .view import ViewRouter
+from agentix.models import AgentContext, Session, Tool
+from agentix.context import ContextManager, LLMInput
+from agentix.utils.collections import LRUCache
+from .frames import FrameStack, StackFrame
+from .view import View, ViewRouter
+
+
+def _state_digest(view_state: Dict[str, Any]) -> str:
+    raw = json.dumps(view_state, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
 
 class StackContextManager(ContextManager):
     """
-    Impl de ContextManager usando un stack de vistas guardado en agent_state.memory['ui_stack'].
+    Impl de ContextManager usando un stack de vistas guardado en Session.state['ui_stack'].
+
+    El stack se parsea una vez por run (begin_run) y se mantiene en memoria hasta end_run,
+    donde solo se escribe de vuelta en la sesión si la navegación lo cambió.
+
+    El bloque de sistema y las tools de cada vista se memoizan por
+    (screen_key, hash de view_state, campos de AgentContext de la vista). El hash se recalcula
+    solo tras invalidate(), que el Agent invoca después de ejecutar tools. Las tools cacheadas
+    solo se reutilizan para el mismo dict view_state, porque sus closures lo referencian.
     """
     STATE_KEY = "ui_stack"
 
-    def __init__(self, router: ViewRouter, state_key: str | None = None):
+    def __init__(self, router: ViewRouter, state_key: str | None = None, system: str = "", cache_size: int = 512):
         self.router = router
+        self.system = system
         self.state_key = state_key or self.STATE_KEY
+        self._stacks: Dict[str, FrameStack] = {}
+        # El texto depende solo del contenido: se comparte entre runs y sesiones
+        self._system_cache: LRUCache[Tuple[Any, ...], str] = LRUCache(cache_size)
+        # Las tools suelen cerrar sobre el dict view_state (y el AgentContext del run): la entrada
+        # guarda el dict para el que se armaron y solo la reutiliza ese mismo frame
+        self._tools_cache: LRUCache[Tuple[Any, ...], Tuple[Dict[str, Any], List[Tool]]] = LRUCache(cache_size)
+
+    # --------- ciclo de vida del run ----------
+    def begin_run(self, agent_state: AgentContext, session: Session) -> None:
+        self._stacks[agent_state.run_id] = FrameStack.from_state(session.state.get(self.state_key))
+
+    def end_run(self, agent_state: AgentContext, session: Session) -> None:
+        stack = self._stacks.pop(agent_state.run_id, None)
+        if stack is not None and stack.dirty:
+            session.state[self.state_key] = stack.to_state()
+
+    def snapshot(self, agent_state: AgentContext) -> Optional[Any]:
+        stack = self._stacks.get(agent_state.run_id)
+        # Copia: las tools siguen mutando view_state en sitio
+        return copy.deepcopy(stack.to_state()) if stack is not None else None
+
+    def restore(self, agent_state: AgentContext, snapshot: Any) -> None:
+        stack = FrameStack.from_state(copy.deepcopy(snapshot))
+        # Difiere de la sesión cargada: end_run tiene que escribirlo
+        stack.dirty = True
+        self._stacks[agent_state.run_id] = stack
 
     # --------- helpers de stack ----------
-    def _get_frames(self, agent_state: AgentContext) -> List[StackFrame]:
-        raw = agent_state.memory.get(self.state_key, [])
-        frames: List[StackFrame] = []
-        if isinstance(raw, list):
-            for f in raw:
-                frames.append(StackFrame(
-                    screen_key=f["screen_key"],
-                    params=f.get("params", {}),
-                    view_state=f.get("view_state", {}),
-                    return_path=f.get("return_path"),
-                ))
-        return frames
-
-    def _save_frames(self, agent_state: AgentContext, frames: List[StackFrame]) -> None:
-        agent_state.memory[self.state_key] = [
-            {
-                "screen_key": fr.screen_key,
-                "params": fr.params,
-                "view_state": fr.view_state,
-                "return_path": fr.return_path,
-            }
-            for fr in frames
-        ]
-
-    @staticmethod
-    def _breadcrumb(frames: List[StackFrame]) -> str:
-        return " / ".join(f.screen_key for f in frames[-3:])
-
-    # --------- ContextManager API ----------
-    def build(self, agent_state: AgentContext, user_id: str, session_id: str) -> Tuple[str, List[Tool]]:
-        frames = self._get_frames(agent_state)
-
-        # Si no hay frame, empujar index si está configurado
-        if not frames:
+    def _get_stack(self, agent_state: AgentContext) -> FrameStack:
+        stack = self._stacks.get(agent_state.run_id)
+        if stack is None:
+            # build() sin begin_run: stack efímero, no se persiste
+            stack = self._stacks[agent_state.run_id] = FrameStack()
+        if not stack.frames:
+            # Si no hay frame, empujar index si está configurado
             idx = self.router.index_key()
             if idx:
-                frames.append(StackFrame(screen_key=idx, params={}, view_state={}))
-                self._save_frames(agent_state, frames)
-
-        system_message = ""
-        tools: List[Tool] = []
-        if frames:
-            frame = frames[-1]
-            view = self.router.get(frame.screen_key)
-            instr = view.instructions(agent_state, frame.view_state) or ""
-            memi = view.memory_instructions(agent_state, frame.view_state) or ""
-            breadcrumb = self._breadcrumb(frames)
-
-            parts = []
-            if breadcrumb:
-                parts.append(f"[RUTA] {breadcrumb}")
-            if instr:
-                parts.append("[VENTANA]\n" + instr)
-            if memi:
-                parts.append("[MEMORIA]\n" + memi)
-            system_message = "\n\n".join(parts)
+                stack.push(StackFrame(screen_key=idx, params={}, view_state={}))
+        return stack
 
+    # --------- ContextManager API ----------
+    def build(self, agent_state: AgentContext) -> LLMInput:
+        stack = self._get_stack(agent_state)
+        frame = stack.current()
+        if frame is None:
+            return LLMInput(system=self.system, tools=[])
+
+        view = self.router.get(frame.screen_key)
+        if frame.digest is None:
+            frame.digest = _state_digest(frame.view_state)
+        key = (frame.screen_key, frame.digest) + tuple(getattr(agent_state, k, None) for k in view.context_keys)
+
+        breadcrumb = stack.breadcrumb()
+        system_key = (breadcrumb,) + key
+        system_message = self._system_cache.get(system_key)
+        if system_message is None:
+            system_message = self._render_system(view, frame, breadcrumb, agent_state)
+            self._system_cache.put(system_key, system_message)
+
+        cached = self._tools_cache.get(key)
+        if cached is not None and cached[0] is frame.view_state:
+            tools = cached[1]
+        else:
+            # En otro run se vuelven a crear las closures; el parseo de cada tool (docstring,
+            # firma) queda memoizado en tool_from_fn
             tools = view.build_tools(agent_state, frame.view_state)
-        
-        return system_message, tools
-
-    async def handle_nav(self, agent_state: AgentContext, user_id: str, session_id: str, out: Dict[str, Any]) -> None:
+            self._tools_cache.put(key, (frame.view_state, tools))
+
+        return LLMInput(system=system_message, tools=tools, screen=frame.screen_key,
+                        speculative=view.speculate(agent_state, frame.view_state))
+
+    def invalidate(self, agent_state: AgentContext) -> None:
+        """
+        Marca que view_state de la vista actual pudo cambiar (p.ej. lo mutó una tool).
+        """
+        stack = self._stacks.get(agent_state.run_id)
+        frame = stack.current() if stack is not None else None
+        if frame is not None:
+            frame.digest = None
+
+    def record_call(self, agent_state: AgentContext, tool_name: str) -> None:
+        """
+        Anota en view_state["__calls"] las tools que el modelo ya usó en la vista actual.
+        """
+        stack = self._stacks.get(agent_state.run_id)
+        frame = stack.current() if stack is not None else None
+        if frame is not None:
+            calls = frame.view_state.setdefault("__calls", [])
+            if tool_name not in calls:
+                calls.append(tool_name)
+                frame.digest = None
+
+    def _render_system(self, view: View, frame: StackFrame, breadcrumb: str, agent_state: AgentContext) -> str:
+        template = self.router.template(frame.screen_key)
+        instr = "\n".join(p for p in (
+            template.render(frame.view_state) if template else "",
+            view.instructions(agent_state, frame.view_state) or "",
+        ) if p)
+        memi = view.memory_instructions(agent_state, frame.view_state) or ""
+
+        parts = [self.system] if self.system else []
+        if breadcrumb:
+            parts.append(f"[RUTA] {breadcrumb}")
+        if instr:
+            parts.append("[VENTANA]\n" + instr)
+        if memi:
+            parts.append("[MEMORIA]\n" + memi)
+        return "\n\n".join(parts)
+
+    async def handle_nav(self, agent_state: AgentContext, out: Dict[str, Any]) -> bool:
+        """
+        Aplica el resultado de navegación de una tool. Devuelve True si el stack cambió.
+        """
         nav = out.get("nav")
         if not nav:
-            return
+            return False
 
-        frames = self._get_frames(agent_state)
+        stack = self._get_stack(agent_state)
 
         if nav == "push_view":
             target = out.get("target")
             params = out.get("params") or {}
-            return_path = out.get("return_path")
             if not target:
-                return
-            frames.append(StackFrame(
+                return False
+            stack.push(StackFrame(
                 screen_key=target,
                 params=params,
                 view_state=params.copy(),
-                return_path=return_path,
+                return_path=out.get("return_path"),
             ))
-            self._save_frames(agent_state, frames)
-            return
+            return True
 
         if nav in ("confirm", "cancel"):
-            if not frames:
-                return
+            if not stack.frames:
+                return False
             canceled = (nav == "cancel")
-            child = frames.pop()
+            child = stack.pop()
             result = child.view_state.get("__pending_result")
-            if frames:
-                caller = frames[-1]
+            caller = stack.current()
+            if caller is not None:
+                caller.digest = None
                 caller.view_state["__last_call"] = {"canceled": canceled, "result": None if canceled else result}
                 if child.return_path and not canceled:
                     self._assign_path(caller.view_state, child.return_path, result)
-            self._save_frames(agent_state, frames)
+            return True
+
+        return False
 
     # --------- utils ----------
     @staticmethod
@@ -1,7 +1,9 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Callable, Optional
+from typing import Any, Dict, List, Callable, Optional, Tuple
 from dataclasses import dataclass
+from string import Formatter
 from agentix.models import Tool, AgentContext
+from agentix.speculation import SpeculativeCall
 
 @dataclass
 class NavIntent:
@@ -12,26 +14,76 @@ class NavIntent:
 
 class View:
     screen_key: str
+    # Campos de AgentContext de los que dependen instructions/build_tools (parte de la clave de cache)
+    context_keys: Tuple[str, ...] = ("user_id", "session_id")
     def instructions(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> str: return ""
     def memory_instructions(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> str: return ""
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]: return []
+    # Tool calls de solo lectura que se pueden adelantar mientras el modelo responde
+    def speculate(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[SpeculativeCall]: return []
     @staticmethod
     def call_view(target_screen_key: str, params: Dict[str, Any] | None = None, return_path: str | None = None) -> Dict[str, Any]:
         return {"nav": "push_view", "target": target_screen_key, "params": params or {}, "return_path": return_path}
 
+class ViewTemplate:
+    """
+    Instrucciones estáticas de una vista, parseadas una sola vez al registrarla.
+    Admite campos de view_state ("{property_id}", "{client.name}"); se ignoran format specs.
+    """
+    __slots__ = ("source", "fields", "_parts", "_static")
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _spec, _conv in Formatter().parse(source)
+        ]
+        self.fields = tuple(f for _, f in self._parts if f)
+        self._static = "".join(literal for literal, _ in self._parts) if not self.fields else None
+
+    def render(self, view_state: Dict[str, Any]) -> str:
+        if self._static is not None:
+            return self._static
+        out: List[str] = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field:
+                value = self._lookup(view_state, field)
+                out.append("" if value is None else str(value))
+        return "".join(out)
+
+    @staticmethod
+    def _lookup(obj: Any, path: str) -> Any:
+        for part in path.split("."):
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(part)
+        return obj
+
 class ViewRouter:
     def __init__(self):
         self._factories: Dict[str, Callable[[], View]] = {}
+        self._views: Dict[str, View] = {}
+        self._templates: Dict[str, ViewTemplate] = {}
         self._index_key: Optional[str] = None
-    def register(self, screen_key: str, factory: Callable[[], View]) -> None:
+    def register(self, screen_key: str, factory: Callable[[], View], instructions: Optional[str] = None) -> None:
         self._factories[screen_key] = factory
+        self._views.pop(screen_key, None)
+        self._templates.pop(screen_key, None)
+        if instructions:
+            self._templates[screen_key] = ViewTemplate(instructions)
     def set_index(self, screen_key: str) -> None:
         if screen_key not in self._factories:
             raise KeyError(f"View '{screen_key}' no registrada")
         self._index_key = screen_key
     def get(self, screen_key: str) -> View:
-        if screen_key not in self._factories:
-            raise KeyError(f"View '{screen_key}' no registrada")
-        return self._factories[screen_key]()
+        # Las vistas no guardan estado propio (vive en view_state): una instancia por screen_key
+        view = self._views.get(screen_key)
+        if view is None:
+            if screen_key not in self._factories:
+                raise KeyError(f"View '{screen_key}' no registrada")
+            view = self._views[screen_key] = self._factories[screen_key]()
+        return view
+    def template(self, screen_key: str) -> Optional[ViewTemplate]:
+        return self._templates.get(screen_key)
     def index_key(self) -> Optional[str]:
         return self._index_key
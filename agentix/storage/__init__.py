@@ -1,3 +1,15 @@
-from .mongo_repository import MongoAgentRepository
+from .memory_repository import InMemoryAgentRepository
 
-__all__ = ["MongoAgentRepository"]
+__all__ = ["InMemoryAgentRepository"]
+
+try:
+    from .mongo_repository import MongoAgentRepository
+    from .mongo_tool_cache import MongoToolCache
+    from .mongo_result_store import MongoResultStore
+    from .audit_writer import AuditWriter
+    from .retention import LocalArchiveStore, RetentionPolicy
+    __all__ += ["MongoAgentRepository", "MongoToolCache", "MongoResultStore", "AuditWriter",
+                "LocalArchiveStore", "RetentionPolicy"]
+except ImportError:
+    # pymongo es opcional (extra "mongo")
+    pass
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from pydantic import BaseModel
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+_DUPLICATE_KEY = 11000
+
+
+class AuditWriterStats(BaseModel):
+    enqueued: int = 0
+    written: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    spilled: int = 0
+    recovered: int = 0
+    # Veces que un enqueue tuvo que esperar por buffer lleno
+    backpressure_waits: int = 0
+
+
+class AuditWriter:
+    """
+    Escritor en segundo plano de la auditoría de mensajes.
+
+    - Acumula documentos de todas las sesiones y los inserta en lotes unordered, al juntar
+      `batch_size` documentos o cada `flush_interval` segundos.
+    - Memoria acotada: con `max_buffer` documentos pendientes, enqueue espera (backpressure).
+    - Un lote fallido se agrega al archivo `spill_path` (JSONL extendido de bson) y se reintenta
+      en los ciclos siguientes; los duplicados de un reintento parcial se ignoran.
+    - close() vacía el buffer antes de terminar.
+    """
+
+    def __init__(self, collection: Any, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_buffer: int = 10_000, spill_path: Optional[str] = "agentix_audit_spill.jsonl",
+                 retry_interval: float = 30.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+        self.stats = AuditWriterStats()
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._last_retry = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._space.set()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, docs: List[Dict[str, Any]]) -> None:
+        if not docs:
+            return
+        if self._closing:
+            raise RuntimeError("AuditWriter cerrado")
+        self._ensure_started()
+        while len(self._buffer) >= self.max_buffer:
+            self.stats.backpressure_waits += 1
+            self._space.clear()
+            self._wakeup.set()
+            await self._space.wait()
+        self._buffer.extend(docs)
+        self.stats.enqueued += len(docs)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+            await self._retry_spill()
+            if self._closing and not self._buffer:
+                return
+
+    async def _flush(self) -> None:
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._space.set()
+            if not await self._insert(batch):
+                await asyncio.to_thread(self._spill, batch)
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> bool:
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as ex:
+            errors = ex.details.get("writeErrors", [])
+            if any(e.get("code") != _DUPLICATE_KEY for e in errors) or ex.details.get("writeConcernErrors"):
+                self.stats.failed_batches += 1
+                logger.error(f"Lote de auditoría fallido ({len(batch)} docs): {ex}")
+                return False
+        except Exception as ex:
+            self.stats.failed_batches += 1
+            logger.error(f"Lote de auditoría fallido ({len(batch)} docs): {ex}")
+            return False
+        self.stats.batches += 1
+        self.stats.written += len(batch)
+        return True
+
+    def _spill(self, batch: List[Dict[str, Any]]) -> None:
+        if not self.spill_path:
+            logger.error(f"Se descartan {len(batch)} documentos de auditoría (sin spill_path)")
+            return
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write("".join(json_util.dumps(doc) + "\n" for doc in batch))
+        self.stats.spilled += len(batch)
+
+    def _take_spill(self) -> List[Dict[str, Any]]:
+        # Se renombra antes de leer: si el reintento falla se vuelve a escribir un spill nuevo
+        pending = f"{self.spill_path}.retry"
+        os.replace(self.spill_path, pending)
+        with open(pending, encoding="utf-8") as f:
+            docs = [json_util.loads(line) for line in f if line.strip()]
+        os.remove(pending)
+        return docs
+
+    async def _retry_spill(self) -> None:
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        now = asyncio.get_running_loop().time()
+        if not self._closing and now - self._last_retry < self.retry_interval:
+            return
+        self._last_retry = now
+        docs = await asyncio.to_thread(self._take_spill)
+        for start in range(0, len(docs), self.batch_size):
+            batch = docs[start:start + self.batch_size]
+            if await self._insert(batch):
+                self.stats.recovered += len(batch)
+            else:
+                await asyncio.to_thread(self._spill, batch)
+
+    async def flush(self) -> None:
+        """
+        Escribe todo lo pendiente (sin cerrar el writer).
+        """
+        if self._task is not None:
+            await self._flush()
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
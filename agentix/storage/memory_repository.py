@@ -0,0 +1,116 @@
+from __future__ import annotations
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+from agentix.models import (LoadMode, Message, RunCheckpoint, Session, SessionLease, UsageTotals, UserInfo, UserMemory,
+                            load_run_checkpoint, load_session)
+from agentix.agent_repository import AgentRepository
+from agentix.leases import StaleLeaseError
+
+
+class InMemoryAgentRepository(AgentRepository):
+    """
+    Repositorio en memoria: tests, evaluaciones offline y experimentos aislados.
+    Guarda documentos (model_dump) y no instancias, para comportarse como un storage real: lo que
+    entra y lo que sale son copias profundas, así mutar un modelo leído no cambia lo guardado
+    hasta que se vuelve a escribir.
+    """
+
+    def __init__(self, max_user_memories: int = 500, load_mode: LoadMode = "trusted"):
+        self.sessions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.messages: List[Dict[str, Any]] = []
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.usage: Dict[str, Dict[str, Any]] = {}
+        self.leases: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Último fencing token emitido por sesión (nunca decrece)
+        self.lease_seq: Dict[Tuple[str, str], int] = {}
+        self.max_user_memories = max_user_memories
+        self.load_mode = load_mode
+
+    async def get_or_create_session(self, session_id: str, user_id: str) -> Session:
+        doc = self.sessions.get((session_id, user_id))
+        if doc:
+            return load_session(copy.deepcopy(doc), self.load_mode)
+        new_doc = Session(session_id=session_id, user_id=user_id)
+        self.sessions[(session_id, user_id)] = copy.deepcopy(new_doc.model_dump())
+        return new_doc
+
+    async def save_session(self, session: Session, fencing_token: Optional[int] = None) -> None:
+        key = (session.session_id, session.user_id)
+        if fencing_token is not None and self.lease_seq.get(key) != fencing_token:
+            raise StaleLeaseError(f"La sesión {session.session_id} fue tomada por otro worker (token {fencing_token})")
+        session.updated_at = datetime.now(timezone.utc)
+        self.sessions[(session.session_id, session.user_id)] = copy.deepcopy(session.model_dump())
+
+    async def append_messages(self, session_id: str, user_id: str, messages: List[Message]) -> None:
+        now = datetime.now(timezone.utc)
+        self.messages.extend(copy.deepcopy(m.model_dump()) | {"session_id": session_id, "user_id": user_id, "ts": now} for m in messages)
+
+    async def get_user_info(self, user_id: str) -> UserInfo:
+        doc = self.users.get(user_id)
+        return UserInfo(**copy.deepcopy(doc)) if doc else UserInfo(user_id=user_id)
+
+    async def add_user_memories(self, user_id: str, memories: List[UserMemory]) -> None:
+        if not memories:
+            return
+        doc = self.users.setdefault(user_id, {"user_id": user_id, "memories": []})
+        doc["memories"] = (doc["memories"] + [copy.deepcopy(m.model_dump()) for m in memories])[-self.max_user_memories:]
+
+    async def append_run_messages(self, run_id: str, session_id: str, user_id: str, messages: List[Message],
+                                  state: Optional[Any] = None) -> None:
+        now = datetime.now(timezone.utc)
+        doc = self.runs.setdefault(run_id, RunCheckpoint(run_id=run_id, session_id=session_id, user_id=user_id).model_dump())
+        doc["messages"].extend(copy.deepcopy(m.model_dump()) for m in messages)
+        if state is not None:
+            doc["state"] = copy.deepcopy(state)
+        doc["updated_at"] = now
+
+    async def get_run(self, run_id: str) -> Optional[RunCheckpoint]:
+        doc = self.runs.get(run_id)
+        return load_run_checkpoint(copy.deepcopy(doc), self.load_mode) if doc else None
+
+    async def set_run_status(self, run_id: str, status: str) -> None:
+        doc = self.runs.get(run_id)
+        if doc is not None:
+            doc["status"] = status
+            doc["updated_at"] = datetime.now(timezone.utc)
+
+    async def add_usage(self, scopes: List[Tuple[str, str]], model: str, delta: Dict[str, float]) -> None:
+        for scope, key in scopes:
+            doc = self.usage.setdefault(f"{scope}:{key}", {"scope": scope, "key": key, "models": {}})
+            per_model = doc["models"].setdefault(model, {})
+            for field, value in delta.items():
+                doc[field] = doc.get(field, 0) + value
+                per_model[field] = per_model.get(field, 0) + value
+
+    async def get_usage(self, scope: str, key: str) -> UsageTotals:
+        doc = self.usage.get(f"{scope}:{key}")
+        return UsageTotals(**copy.deepcopy(doc)) if doc else UsageTotals()
+
+    async def acquire_lease(self, session_id: str, user_id: str, owner: str, ttl: float) -> Optional[SessionLease]:
+        key = (session_id, user_id)
+        now = datetime.now(timezone.utc)
+        current = self.leases.get(key)
+        if current is not None and current["expires_at"] > now:
+            return None
+        await self.get_or_create_session(session_id, user_id)
+        self.lease_seq[key] = self.lease_seq.get(key, 0) + 1
+        lease = SessionLease(session_id=session_id, user_id=user_id, owner=owner, token=self.lease_seq[key],
+                             expires_at=now + timedelta(seconds=ttl))
+        self.leases[key] = lease.model_dump()
+        return lease
+
+    async def renew_lease(self, lease: SessionLease, ttl: float) -> bool:
+        current = self.leases.get((lease.session_id, lease.user_id))
+        if current is None or current["token"] != lease.token:
+            return False
+        current["expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        return True
+
+    async def release_lease(self, lease: SessionLease) -> None:
+        key = (lease.session_id, lease.user_id)
+        current = self.leases.get(key)
+        if current is not None and current["token"] == lease.token:
+            del self.leases[key]
@@ -1,11 +1,17 @@
 from __future__ import annotations
-from typing import List
-from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
-from pymongo import AsyncMongoClient, ASCENDING
+from pymongo import AsyncMongoClient, ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
-from agentix.models import Message, Session
+from agentix.models import (LoadMode, Message, RunCheckpoint, Session, SessionLease, UsageTotals, UserInfo, UserMemory,
+                            load_run_checkpoint, load_session)
 from agentix.agent_repository import AgentRepository
+from agentix.leases import StaleLeaseError
+from .audit_writer import AuditWriter
+from .mongo_result_store import MongoResultStore
+from .retention import ArchiveStore, LocalArchiveStore, RetentionPolicy, SessionArchiver
 
 
 class MongoAgentRepository(AgentRepository):
@@ -16,36 +22,192 @@ class MongoAgentRepository(AgentRepository):
         sessions_col: str = "sessions",
         messages_col: str = "messages",
         users_col: str = "users",
+        runs_col: str = "runs",
+        usage_col: str = "usage",
+        results_col: str = "tool_results",
+        results_ttl_seconds: Optional[int] = 7 * 24 * 3600,
         audit_messages: bool = True,
+        max_user_memories: int = 500,
+        batch_audit: bool = False,
+        audit_options: Optional[dict] = None,
+        retention: Optional[RetentionPolicy] = None,
+        archive_store: Optional[ArchiveStore] = None,
+        load_mode: LoadMode = "trusted",
     ):
         self.client = AsyncMongoClient(uri)
         self.db = self.client[db_name]
         self.sessions = self.db[sessions_col]
         self.messages = self.db[messages_col]
         self.users = self.db[users_col]
+        self.runs = self.db[runs_col]
+        self.usage = self.db[usage_col]
+        # Resultados grandes de tools: el Agent lo usa por defecto, así los handles que quedan en
+        # el historial siguen resolviendo después de un reinicio o en otro worker
+        self.result_store = MongoResultStore(db_name=db_name, collection=results_col,
+                                             ttl_seconds=results_ttl_seconds, client=self.client)
         self.audit_messages = audit_messages
+        # Con batch_audit la auditoría se escribe en segundo plano; llamar a close() al terminar
+        self.audit_writer = AuditWriter(self.messages, **(audit_options or {})) if batch_audit else None
+        self.retention = retention
+        self.archiver = SessionArchiver(self.sessions, archive_store or LocalArchiveStore(), retention) if retention else None
+        self.max_user_memories = max_user_memories
+        # "strict" si la colección puede tener documentos que no escribió agentix
+        self.load_mode = load_mode
 
     # ---------- Setup ----------
     async def ensure_indexes(self) -> None:
         await self.sessions.create_index([("session_id", ASCENDING), ("user_id", ASCENDING)], unique=True)
         await self.messages.create_index([("session_id", ASCENDING), ("ts", ASCENDING)])
         await self.users.create_index([("user_id", ASCENDING)], unique=True)
+        await self.runs.create_index([("run_id", ASCENDING)], unique=True)
+        await self.runs.create_index([("session_id", ASCENDING), ("status", ASCENDING)])
+        await self.usage.create_index([("scope", ASCENDING), ("total_tokens", ASCENDING)])
+        await self.result_store.ensure_indexes()
+        if self.retention is not None:
+            if self.retention.audit_ttl_days:
+                await self.messages.create_index([("ts", ASCENDING)], expireAfterSeconds=int(self.retention.audit_ttl_days * 86400))
+            if self.retention.runs_ttl_days:
+                await self.runs.create_index([("updated_at", ASCENDING)], expireAfterSeconds=int(self.retention.runs_ttl_days * 86400))
+            await self.sessions.create_index([("archived", ASCENDING), ("updated_at", ASCENDING)])
+
+    async def archive_idle_sessions(self) -> int:
+        """
+        Archiva un lote de sesiones inactivas. Con `retention.archive_interval` el repositorio ya lo
+        hace solo en segundo plano; sirve para forzarlo (p.ej. desde un job con archive_interval=None).
+        """
+        if self.archiver is None:
+            return 0
+        return await self.archiver.archive_idle()
         
+    async def close(self) -> None:
+        if self.archiver is not None:
+            await self.archiver.close()
+        if self.audit_writer is not None:
+            await self.audit_writer.close()
+        await self.client.close()
+
     # ---------- Repo API ----------
     async def get_or_create_session(self, session_id: str, user_id: str) -> Session:
+        if self.archiver is not None:
+            # El archivado periódico arranca con el primer uso del repositorio (ya hay event loop)
+            self.archiver.ensure_started()
         doc = await self.sessions.find_one({"session_id": session_id, "user_id": user_id})
         if doc:
-            return Session(**doc)
+            if doc.get("archived") and self.archiver is not None:
+                doc = await self.archiver.rehydrate(doc)
+            return load_session(doc, self.load_mode)
         new_doc = Session(session_id=session_id, user_id=user_id)
         await self.sessions.insert_one(new_doc.model_dump())
         return new_doc
 
-    async def save_session(self, session: Session):
+    async def save_session(self, session: Session, fencing_token: Optional[int] = None):
         session.updated_at = datetime.now(timezone.utc)
-        await self.sessions.find_one_and_update(
-            {"session_id": session.session_id, "user_id": session.user_id},
-            {"$set": session.model_dump()}
+        update = {"$set": session.model_dump()}
+        if self.archiver is not None:
+            # Si se archivó mientras estaba en uso, el guardado la vuelve a dejar activa
+            update["$unset"] = {"archived": "", "archive_key": "", "archived_at": ""}
+        query = {"session_id": session.session_id, "user_id": session.user_id}
+        if fencing_token is not None:
+            # Solo si nadie adquirió la sesión después (lease_seq crece en cada adquisición)
+            query["lease_seq"] = fencing_token
+        doc = await self.sessions.find_one_and_update(query, update, projection={"_id": 1})
+        if doc is None and fencing_token is not None:
+            raise StaleLeaseError(f"La sesión {session.session_id} fue tomada por otro worker (token {fencing_token})")
+
+    # ---------- Leases ----------
+    async def acquire_lease(self, session_id: str, user_id: str, owner: str, ttl: float) -> Optional[SessionLease]:
+        key = {"session_id": session_id, "user_id": user_id}
+        try:
+            await self.sessions.update_one(key, {"$setOnInsert": Session(session_id=session_id, user_id=user_id).model_dump()}, upsert=True)
+        except DuplicateKeyError:
+            # Otro worker la creó al mismo tiempo
+            pass
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=ttl)
+        # Atómico: solo gana quien la encuentra libre o con el lease vencido
+        doc = await self.sessions.find_one_and_update(
+            {**key, "$or": [{"lease": None}, {"lease.expires_at": {"$lte": now}}]},
+            {"$set": {"lease": {"owner": owner, "expires_at": expires_at}}, "$inc": {"lease_seq": 1}},
+            projection={"lease_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return None
+        return SessionLease(session_id=session_id, user_id=user_id, owner=owner, token=doc["lease_seq"], expires_at=expires_at)
+
+    async def renew_lease(self, lease: SessionLease, ttl: float) -> bool:
+        result = await self.sessions.update_one(
+            {"session_id": lease.session_id, "user_id": lease.user_id, "lease_seq": lease.token, "lease.owner": lease.owner},
+            {"$set": {"lease.expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)}},
+        )
+        return result.matched_count == 1
+
+    async def release_lease(self, lease: SessionLease) -> None:
+        await self.sessions.update_one(
+            {"session_id": lease.session_id, "user_id": lease.user_id, "lease_seq": lease.token},
+            {"$unset": {"lease": ""}},
         )
 
     async def append_messages(self, session_id: str, user_id: str, messages: List[Message]) -> None:
-        await self.messages.insert_many([m.model_dump() | {"session_id": session_id, "user_id": user_id, "ts": datetime.now(timezone.utc)} for m in messages])
+        docs = [m.model_dump() | {"session_id": session_id, "user_id": user_id, "ts": datetime.now(timezone.utc)} for m in messages]
+        if self.audit_writer is not None:
+            await self.audit_writer.enqueue(docs)
+        else:
+            await self.messages.insert_many(docs)
+
+    async def get_user_info(self, user_id: str) -> UserInfo:
+        doc = await self.users.find_one({"user_id": user_id})
+        if doc:
+            return UserInfo(**doc)
+        return UserInfo(user_id=user_id)
+
+    async def add_user_memories(self, user_id: str, memories: List[UserMemory]) -> None:
+        if not memories:
+            return
+        # $slice negativo: se conservan solo las memorias más recientes
+        await self.users.update_one(
+            {"user_id": user_id},
+            {"$push": {"memories": {"$each": [m.model_dump() for m in memories], "$slice": -self.max_user_memories}}},
+            upsert=True,
+        )
+
+    async def append_run_messages(self, run_id: str, session_id: str, user_id: str, messages: List[Message],
+                                  state: Optional[Any] = None) -> None:
+        now = datetime.now(timezone.utc)
+        # Mensajes y snapshot en la misma escritura: el checkpoint nunca queda con uno sin el otro
+        updates: Dict[str, Any] = {"updated_at": now}
+        if state is not None:
+            updates["state"] = state
+        await self.runs.update_one(
+            {"run_id": run_id},
+            {
+                "$push": {"messages": {"$each": [m.model_dump() for m in messages]}},
+                "$set": updates,
+                "$setOnInsert": {"session_id": session_id, "user_id": user_id, "status": "running", "created_at": now},
+            },
+            upsert=True,
+        )
+
+    async def get_run(self, run_id: str) -> Optional[RunCheckpoint]:
+        doc = await self.runs.find_one({"run_id": run_id})
+        return load_run_checkpoint(doc, self.load_mode) if doc else None
+
+    async def set_run_status(self, run_id: str, status: str) -> None:
+        await self.runs.update_one({"run_id": run_id}, {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}})
+
+    async def add_usage(self, scopes: List[Tuple[str, str]], model: str, delta: Dict[str, float]) -> None:
+        # Un documento por ámbito ("user:u1", "session:u1/s1"...): $inc es atómico entre procesos
+        inc = {**delta, **{f"models.{model}.{field}": value for field, value in delta.items()}}
+        now = datetime.now(timezone.utc)
+        await self.usage.bulk_write([
+            UpdateOne(
+                {"_id": f"{scope}:{key}"},
+                {"$inc": inc, "$set": {"updated_at": now}, "$setOnInsert": {"scope": scope, "key": key}},
+                upsert=True,
+            )
+            for scope, key in scopes
+        ], ordered=False)
+
+    async def get_usage(self, scope: str, key: str) -> UsageTotals:
+        doc = await self.usage.find_one({"_id": f"{scope}:{key}"})
+        return UsageTotals(**doc) if doc else UsageTotals()
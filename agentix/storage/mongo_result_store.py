@@ -0,0 +1,33 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pymongo import ASCENDING, AsyncMongoClient
+
+from agentix.results import ResultStore
+
+
+class MongoResultStore(ResultStore):
+    """
+    Resultados grandes de tools en una colección aparte (fuera de sesiones y auditoría).
+    Con `ttl_seconds` se crea un índice TTL para expirarlos. `client` permite compartir el
+    cliente del repositorio.
+    """
+    def __init__(self, uri: str = "mongodb://localhost:27017", db_name: str = "agentix",
+                 collection: str = "tool_results", ttl_seconds: Optional[int] = 7 * 24 * 3600,
+                 client: Optional[AsyncMongoClient] = None):
+        self.client = client or AsyncMongoClient(uri)
+        self.col = self.client[db_name][collection]
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self) -> None:
+        if self.ttl_seconds:
+            await self.col.create_index([("created_at", ASCENDING)], expireAfterSeconds=self.ttl_seconds)
+
+    async def put(self, handle: str, content: str, owner: str) -> None:
+        await self.col.insert_one({"_id": handle, "owner": owner, "content": content,
+                                   "created_at": datetime.now(timezone.utc)})
+
+    async def get(self, handle: str) -> Optional[Tuple[str, str]]:
+        doc = await self.col.find_one({"_id": handle})
+        return (doc["content"], doc["owner"]) if doc else None
@@ -0,0 +1,36 @@
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from pymongo import ASCENDING, AsyncMongoClient
+
+from agentix.tools.cache import ToolCacheBackend
+
+
+class MongoToolCache(ToolCacheBackend):
+    """
+    Cache de resultados de tools compartido entre procesos. La expiración la hace el índice TTL
+    de Mongo (con retraso de hasta un minuto), por eso get también compara expires_at.
+    """
+    def __init__(self, uri: str = "mongodb://localhost:27017", db_name: str = "agentix",
+                 collection: str = "tool_cache"):
+        self.client = AsyncMongoClient(uri)
+        self.col = self.client[db_name][collection]
+
+    async def ensure_indexes(self) -> None:
+        await self.col.create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        await self.col.create_index([("tags", ASCENDING)])
+
+    async def get(self, key: str) -> Optional[str]:
+        doc = await self.col.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+                                      {"content": 1})
+        return doc["content"] if doc else None
+
+    async def set(self, key: str, content: str, ttl: float, tags: List[str]) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        await self.col.replace_one({"_id": key}, {"content": content, "tags": tags, "expires_at": expires_at},
+                                   upsert=True)
+
+    async def invalidate(self, tags: List[str]) -> int:
+        result = await self.col.delete_many({"tags": {"$in": tags}})
+        return result.deleted_count
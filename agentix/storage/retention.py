@@ -0,0 +1,191 @@
+from __future__ import annotations
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Protocol
+
+from bson import json_util
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ("messages", "summaries", "state")
+
+
+class RetentionPolicy(BaseModel):
+    """
+    Retención por niveles.
+
+    - audit_ttl_days: los mensajes de auditoría se borran por índice TTL (None = para siempre).
+    - runs_ttl_days: checkpoints de runs (solo sirven para reanudar runs recientes).
+    - idle_session_days: sesiones sin actividad por más tiempo se archivan comprimidas fuera
+      de Mongo; en la colección queda un stub y se rehidratan al volver a usarlas.
+    - archive_interval: cada cuántos segundos el repositorio archiva en segundo plano (lotes
+      de `archive_batch_size` hasta no encontrar más); None = solo al llamar archive_idle_sessions().
+    """
+    audit_ttl_days: Optional[int] = 90
+    runs_ttl_days: Optional[int] = 7
+    idle_session_days: Optional[float] = 30
+    archive_batch_size: int = 200
+    archive_interval: Optional[float] = 3600.0
+
+
+class ArchiveStore(Protocol):
+    async def put(self, key: str, data: bytes) -> None: ...
+    async def get(self, key: str) -> Optional[bytes]: ...
+    async def delete(self, key: str) -> None: ...
+
+
+class LocalArchiveStore(ArchiveStore):
+    """
+    Almacenamiento frío en disco local: un archivo por sesión (ya comprimido por el archivador).
+    """
+    def __init__(self, directory: str = "agentix_archive"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Dos niveles de subdirectorio para no juntar millones de archivos en uno
+        return os.path.join(self.directory, key[:2], f"{key}.json.gz")
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+
+def archive_key(session_id: str, user_id: str) -> str:
+    return hashlib.blake2b(f"{user_id}/{session_id}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SessionArchiver:
+    """
+    Mueve el contenido de sesiones inactivas (mensajes, resúmenes, estado) a un ArchiveStore y
+    lo trae de vuelta cuando la sesión se vuelve a abrir.
+    """
+    def __init__(self, sessions: Any, store: ArchiveStore, policy: RetentionPolicy):
+        self.sessions = sessions
+        self.store = store
+        self.policy = policy
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def ensure_started(self) -> None:
+        """
+        Arranca el archivado periódico (una tarea por event loop) si la política lo pide.
+        """
+        if self.policy.archive_interval is None or self.policy.idle_session_days is None:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Un lote lleno indica que quedan más sesiones inactivas
+                while await self.archive_idle() >= self.policy.archive_batch_size:
+                    pass
+            except Exception as ex:
+                logger.error(f"Falló el archivado de sesiones inactivas: {ex}")
+            await asyncio.sleep(self.policy.archive_interval or 0)
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+    async def archive_idle(self, now: Optional[datetime] = None) -> int:
+        """
+        Archiva un lote de sesiones inactivas. Devuelve cuántas se archivaron.
+        """
+        if self.policy.idle_session_days is None:
+            return 0
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.policy.idle_session_days)
+        cursor = self.sessions.find({
+            "archived": {"$ne": True},
+            "$or": [
+                {"updated_at": {"$lt": cutoff}},
+                # Sesiones creadas y nunca guardadas
+                {"updated_at": None, "created_at": {"$lt": cutoff}},
+            ],
+        }).limit(self.policy.archive_batch_size)
+        archived = 0
+        async for doc in cursor:
+            if await self._archive(doc):
+                archived += 1
+        return archived
+
+    async def _archive(self, doc: Dict[str, Any]) -> bool:
+        key = archive_key(doc["session_id"], doc["user_id"])
+        payload = {field: doc.get(field) for field in ARCHIVE_FIELDS}
+        data = await asyncio.to_thread(lambda: gzip.compress(json_util.dumps(payload).encode("utf-8")))
+        await self.store.put(key, data)
+        # Solo si nadie la tocó mientras tanto (updated_at igual); si no, el archivo se pisa en el próximo intento
+        result = await self.sessions.update_one(
+            {"_id": doc["_id"], "updated_at": doc.get("updated_at")},
+            {
+                "$set": {"archived": True, "archive_key": key, "archived_at": datetime.now(timezone.utc)},
+                "$unset": {field: "" for field in ARCHIVE_FIELDS},
+            },
+        )
+        return result.modified_count == 1
+
+    async def rehydrate(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Restaura el contenido archivado de `doc` (un stub) en Mongo y devuelve el documento completo.
+        """
+        key = doc.get("archive_key") or archive_key(doc["session_id"], doc["user_id"])
+        data = await self.store.get(key)
+        if data is None:
+            # Otro proceso pudo haberla rehidratado recién (y borrado el archivo)
+            fresh = await self.sessions.find_one({"_id": doc["_id"]})
+            if fresh is not None and not fresh.get("archived"):
+                return fresh
+            logger.error(f"Archivo de la sesión {doc['session_id']} no encontrado; se restaura vacía")
+            payload: Dict[str, Any] = {}
+        else:
+            payload = await asyncio.to_thread(lambda: json_util.loads(gzip.decompress(data).decode("utf-8")))
+        restored = {field: payload.get(field) for field in ARCHIVE_FIELDS if payload.get(field) is not None}
+        result = await self.sessions.update_one(
+            {"_id": doc["_id"], "archived": True},
+            {"$set": restored, "$unset": {"archived": "", "archive_key": "", "archived_at": ""}},
+        )
+        if data is not None and result.modified_count == 1:
+            await self.store.delete(key)
+        full = {k: v for k, v in doc.items() if k not in ("archived", "archive_key", "archived_at")}
+        full.update(restored)
+        return full
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Optional, Sequence, Set, TypeVar
+
+import litellm
+
+from .models import ToolCall
+
+T = TypeVar("T")
+
+
+class ToolCallAccumulator:
+    """
+    Arma las tool calls a partir de los deltas de un stream y avisa de cada una apenas está
+    completa: cuando sus argumentos ya forman un JSON válido o cuando empieza la siguiente.
+    """
+
+    def __init__(self, on_complete: Callable[[ToolCall], None]):
+        self.on_complete = on_complete
+        self._calls: Dict[int, Dict[str, str]] = {}
+        self._emitted: Set[int] = set()
+
+    def _index(self, delta: Any) -> int:
+        index = getattr(delta, "index", None)
+        if index is not None:
+            return index
+        # Proveedores sin índice: un id nuevo abre la siguiente tool call
+        known = {call["id"] for call in self._calls.values()}
+        if delta.id and delta.id not in known:
+            return len(self._calls)
+        return max(self._calls, default=0)
+
+    def feed(self, chunk: Any) -> None:
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = getattr(choice, "delta", None)
+            for tc in getattr(delta, "tool_calls", None) or []:
+                index = self._index(tc)
+                if index not in self._calls:
+                    # Empezó otra tool call: las anteriores ya no van a cambiar
+                    for previous in sorted(self._calls):
+                        self._emit(previous)
+                    self._calls[index] = {"id": "", "name": "", "arguments": ""}
+                call = self._calls[index]
+                function = getattr(tc, "function", None)
+                call["id"] = tc.id or call["id"]
+                call["name"] = getattr(function, "name", None) or call["name"]
+                call["arguments"] += getattr(function, "arguments", None) or ""
+                if call["arguments"].rstrip().endswith("}") and _is_complete(call["arguments"]):
+                    self._emit(index)
+
+    def _emit(self, index: int) -> None:
+        call = self._calls[index]
+        if index in self._emitted or not call["id"] or not call["name"]:
+            return
+        self._emitted.add(index)
+        self.on_complete(ToolCall(tool_call_id=call["id"], function_name=call["name"], arguments=call["arguments"]))
+
+
+def _is_complete(arguments: str) -> bool:
+    try:
+        return isinstance(json.loads(arguments), dict)
+    except ValueError:
+        return False
+
+
+async def collect_stream(stream: Any, on_tool_call: Callable[[ToolCall], None],
+                         messages: Optional[Sequence[Dict[str, Any]]] = None) -> litellm.ModelResponse:
+    """
+    Consume un stream de litellm avisando de cada tool call completa y devuelve la respuesta
+    entera, igual a la de una llamada sin stream.
+    """
+    accumulator = ToolCallAccumulator(on_tool_call)
+    chunks: List[Any] = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        accumulator.feed(chunk)
+    return litellm.stream_chunk_builder(chunks, messages=list(messages) if messages else None)
+
+
+class ToolCallPipeline(Generic[T]):
+    """
+    Ejecución anticipada de las tool calls de un paso: `put` las encola a medida que el stream
+    las completa y `run` las consume en orden (una tras otra, igual que sin stream) mientras el
+    modelo sigue generando las siguientes.
+
+    Durante el stream solo se despachan las que `eager` acepta (sin efectos secundarios) y solo
+    como prefijo: la primera que no califica y las siguientes esperan a `result`, que se llama
+    con el mensaje del modelo ya guardado. Los resultados anticipados se retienen hasta entonces
+    y desde ahí cada uno se entrega a `on_result` apenas termina; si el paso falla o no pide tools,
+    lo anticipado se descarta sin consecuencias porque no escribió nada.
+    """
+
+    def __init__(self, run: Callable[[AsyncIterator[ToolCall], Callable[[Any], Awaitable[None]]], Awaitable[T]],
+                 eager: Callable[[ToolCall], bool] = lambda tool_call: True):
+        self._queue: asyncio.Queue[Optional[ToolCall]] = asyncio.Queue()
+        self._eager = eager
+        self._held = False
+        self._early: List[Any] = []
+        self._sink: Optional[Callable[[Any], Awaitable[None]]] = None
+        self._task = asyncio.create_task(run(self._calls(), self._on_result))
+        self.dispatched: List[str] = []
+
+    async def _calls(self) -> AsyncIterator[ToolCall]:
+        while True:
+            tool_call = await self._queue.get()
+            if tool_call is None:
+                return
+            yield tool_call
+
+    async def _on_result(self, item: Any) -> None:
+        if self._sink is None:
+            self._early.append(item)
+        else:
+            await self._sink(item)
+
+    def _dispatch(self, tool_call: ToolCall) -> None:
+        self.dispatched.append(tool_call.tool_call_id)
+        self._queue.put_nowait(tool_call)
+
+    def put(self, tool_call: ToolCall) -> None:
+        if self._held or not self._eager(tool_call):
+            # Puede tener efectos: espera al mensaje guardado, y las siguientes van detrás en orden
+            self._held = True
+            return
+        self._dispatch(tool_call)
+
+    async def result(self, tool_calls: List[ToolCall], on_result: Callable[[Any], Awaitable[None]]) -> T:
+        """
+        Cierra el pipeline con la lista final del paso (agrega las que no se despacharon durante
+        el stream), entrega los resultados anticipados a `on_result` y espera el resto.
+        """
+        while self._early:
+            await on_result(self._early.pop(0))
+        self._sink = on_result
+        for tool_call in tool_calls:
+            if tool_call.tool_call_id not in self.dispatched:
+                self._dispatch(tool_call)
+        self._queue.put_nowait(None)
+        return await self._task
+
+    async def __aenter__(self) -> ToolCallPipeline[T]:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if not self._task.done():
+            # Paso sin tool calls o que falló: nada más que ejecutar
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
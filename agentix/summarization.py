@@ -0,0 +1,152 @@
+from __future__ import annotations
+from textwrap import dedent
+from typing import Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+from .models import AssistantMessage, MessageType, SessionSummary, SummaryLevel
+from . import events
+from .events import EventType
+from .routing import AUX_COMPRESSION, AUX_SUMMARIZATION
+from .prompts.summarization import SUMMARIZATION_SYSTEM_PROMPT, META_SUMMARIZATION_PROMPT
+from .utils.tokens import truncate_to_tokens
+
+# ask(system, user, max_tokens, task=...) -> texto
+AskFn = Callable[..., Awaitable[str]]
+EventFn = Callable[[EventType, Optional[str]], Awaitable[None]]
+
+_LEVEL_ORDER = {"session": 0, "period": 1, "chunk": 2}
+
+
+class SummaryPolicy(BaseModel):
+    """
+    Forma del árbol de resúmenes y topes de tokens por nivel.
+    """
+    chunks_per_period: int = 5
+    periods_per_session: int = 5
+    chunk_tokens: int = 300
+    period_tokens: int = 600
+    session_tokens: int = 1000
+    # Tope para los mensajes posteriores que se muestran solo como contexto
+    context_tokens: int = 1000
+
+    def cap(self, level: SummaryLevel) -> int:
+        return {"chunk": self.chunk_tokens, "period": self.period_tokens, "session": self.session_tokens}[level]
+
+
+def summarizable(message: MessageType) -> bool:
+    return message.role == "user" or isinstance(message, AssistantMessage) and len(message.tool_calls) == 0
+
+
+def format_transcript(messages: List[MessageType]) -> str:
+    return "\n".join(f"- {m.role}: {m.content}" for m in messages if summarizable(m))
+
+
+def ordered(summaries: List[SessionSummary]) -> List[SessionSummary]:
+    """
+    session -> periods -> chunks, cada nivel en orden cronológico.
+    """
+    return sorted(summaries, key=lambda s: (_LEVEL_ORDER[s.level], s.timestamp))
+
+
+class IncrementalSummarizer:
+    """
+    Resumen jerárquico e incremental de la sesión (chunk -> period -> session).
+
+    Cada chunk nuevo se resume contra el último resumen consolidado, no contra todo el
+    historial. Cuando se acumulan `chunks_per_period` chunks se consolidan en un period, y
+    cuando se acumulan `periods_per_session` periods se integran al resumen de sesión. Solo
+    se recalcula la rama que cambió, así que el costo es O(contenido nuevo).
+    """
+
+    def __init__(self, ask: AskFn, policy: Optional[SummaryPolicy] = None, send_event: Optional[EventFn] = None):
+        self.ask = ask
+        self.policy = policy or SummaryPolicy()
+        self.send_event = send_event
+
+    async def add_chunk(self, summaries: List[SessionSummary], to_summarize: List[MessageType],
+                        context: List[MessageType]) -> List[SessionSummary]:
+        summaries = ordered(summaries)
+        chunk = await self._summarize_chunk(summaries, to_summarize, context)
+        summaries.append(chunk)
+        await self._event(events.SUMMARIZATION, chunk.content[:64])
+
+        chunks = [s for s in summaries if s.level == "chunk"]
+        if len(chunks) >= self.policy.chunks_per_period:
+            summaries = [s for s in summaries if s.level != "chunk"]
+            summaries.append(await self._merge("period", chunks))
+            await self._event(events.META_SUMMARIZATION, "period")
+
+        periods = [s for s in summaries if s.level == "period"]
+        if len(periods) >= self.policy.periods_per_session:
+            # El resumen de sesión anterior entra como una pieza más del merge
+            parts = [s for s in summaries if s.level == "session"] + periods
+            summaries = [s for s in summaries if s.level == "chunk"]
+            summaries.append(await self._merge("session", parts))
+            await self._event(events.META_SUMMARIZATION, "session")
+        return ordered(summaries)
+
+    async def _summarize_chunk(self, summaries: List[SessionSummary], to_summarize: List[MessageType],
+                               context: List[MessageType]) -> SessionSummary:
+        latest = self._latest_rollup(summaries)
+        cap = self.policy.cap("chunk")
+        message = dedent("""
+            Resume la siguiente conversación en máximo {words} palabras.
+            ---
+
+            ## Resumen previo
+
+            <previous_summary>
+            {previous}
+            </previous_summary>
+
+            ---
+
+            ## Mensajes a resumir
+
+            <conversation>
+            {conversation}
+            </conversation>
+
+            # Mensajes posteriores (No incluir en el resumen, solo dan contexto)
+
+            <messages_to_keep>
+            {context}
+            </messages_to_keep>
+        """).format(
+            words=_words(cap),
+            previous=latest.content if latest else "",
+            conversation=format_transcript(to_summarize),
+            context=truncate_to_tokens(format_transcript(context), self.policy.context_tokens),
+        )
+        content = await self.ask(SUMMARIZATION_SYSTEM_PROMPT, message, cap, task=AUX_SUMMARIZATION)
+        return SessionSummary(content=truncate_to_tokens(content or "", cap), level="chunk")
+
+    async def _merge(self, level: SummaryLevel, parts: List[SessionSummary]) -> SessionSummary:
+        cap = self.policy.cap(level)
+        summaries = "\n".join(f"* {s.content}" for s in parts)
+        message = dedent("""
+            Sintetiza los siguientes resumenes en máximo {words} palabras:
+            <summaries>
+            {summaries}
+            </summaries>
+        """).format(words=_words(cap), summaries=summaries)
+        content = await self.ask(META_SUMMARIZATION_PROMPT, message, cap, task=AUX_COMPRESSION)
+        return SessionSummary(content=truncate_to_tokens(content or "", cap), level=level)
+
+    @staticmethod
+    def _latest_rollup(summaries: List[SessionSummary]) -> Optional[SessionSummary]:
+        # El consolidado más reciente (period o session); si aún no hay, el último chunk
+        rollups = [s for s in summaries if s.level != "chunk"]
+        if rollups:
+            return max(rollups, key=lambda s: s.timestamp)
+        return summaries[-1] if summaries else None
+
+    async def _event(self, type: EventType, message: Optional[str] = None) -> None:
+        if self.send_event is not None:
+            await self.send_event(type, message)
+
+
+def _words(max_tokens: int) -> int:
+    return max(20, int(max_tokens * 0.75))
+
@@ -1,3 +1,6 @@
 from .tool_parser import tool_from_fn
+from .cache import InMemoryToolCache, ToolCache, ToolCacheBackend, cached, invalidates
+from .encoding import encode_result, result_encoding
 
-__all__ = ["tool_from_fn"]
\ No newline at end of file
+__all__ = ["tool_from_fn", "cached", "invalidates", "ToolCache", "ToolCacheBackend", "InMemoryToolCache",
+           "encode_result", "result_encoding"]
\ No newline at end of file
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Set, Tuple
+
+from pydantic import BaseModel
+
+from ..models import AgentContext, Tool, ToolCachePolicy
+from ..utils.collections import LRUCache
+
+CACHE_ATTR = "__agentix_cache__"
+INVALIDATES_ATTR = "__agentix_invalidates__"
+
+
+def cached(ttl: float, scope: str = "global", tags: Iterable[str] = ()) -> Callable[[Any], Any]:
+    """
+    Marca una función como cacheable; tool_from_fn toma la política del atributo.
+
+        @cached(ttl=60, scope="user", tags=["properties"])
+        async def list_properties(...): ...
+    """
+    policy = ToolCachePolicy(ttl=ttl, scope=scope, tags=list(tags))
+    def decorator(fn: Any) -> Any:
+        setattr(fn, CACHE_ATTR, policy)
+        return fn
+    return decorator
+
+
+def invalidates(*tags: str) -> Callable[[Any], Any]:
+    """
+    Marca una tool de escritura: al ejecutarse invalida las entradas con esos tags.
+    """
+    def decorator(fn: Any) -> Any:
+        setattr(fn, INVALIDATES_ATTR, list(tags))
+        return fn
+    return decorator
+
+
+def render_tags(tags: Iterable[str], params: Dict[str, Any]) -> List[str]:
+    """
+    Resuelve los campos de los tags con los argumentos de la llamada. Un tag que referencia
+    un argumento ausente se omite.
+    """
+    rendered = []
+    for tag in tags:
+        try:
+            rendered.append(tag.format(**params))
+        except (KeyError, IndexError):
+            continue
+    return rendered
+
+
+class ToolCacheBackend(Protocol):
+    """
+    Almacén de resultados (contenido ya serializado, tal como se envía al modelo).
+    """
+    async def get(self, key: str) -> Optional[str]: ...
+    async def set(self, key: str, content: str, ttl: float, tags: List[str]) -> None: ...
+    async def invalidate(self, tags: List[str]) -> int: ...
+
+
+class InMemoryToolCache(ToolCacheBackend):
+    """
+    Backend local del proceso, LRU acotado con expiración perezosa.
+    """
+    def __init__(self, max_entries: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._entries: LRUCache[str, Tuple[float, str, List[str]]] = LRUCache(max_entries)
+        self._by_tag: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, content, _tags = entry
+        if expires <= self.clock():
+            self._drop(key)
+            return None
+        return content
+
+    async def set(self, key: str, content: str, ttl: float, tags: List[str]) -> None:
+        self._drop(key)
+        self._entries.put(key, (self.clock() + ttl, content, tags))
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: List[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            for key in self._by_tag.pop(tag, set()):
+                if self._drop(key):
+                    dropped += 1
+        return dropped
+
+    def _drop(self, key: str) -> bool:
+        entry = self._entries.pop(key)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+        return True
+
+
+class ToolCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ToolCache:
+    """
+    Cache de resultados de tools delante del backend elegido.
+
+    La clave combina nombre de la tool, argumentos canónicos y, según el scope, el usuario o la
+    sesión. Solo se cachean ejecuciones exitosas de tools con `cache`; las tools con `invalidates`
+    borran las entradas de esos tags tras ejecutarse (en cualquier usuario/sesión).
+    """
+    def __init__(self, backend: Optional[ToolCacheBackend] = None):
+        self.backend = backend or InMemoryToolCache()
+        self.stats: Dict[str, ToolCacheStats] = {}
+
+    @staticmethod
+    def key(tool: Tool, params: Dict[str, Any], agent_context: AgentContext) -> str:
+        scope = tool.cache.scope if tool.cache else "global"
+        owner = {"global": "", "user": agent_context.user_id, "session": agent_context.session_id}[scope]
+        raw = json.dumps([tool.name, scope, owner, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    async def get(self, tool: Tool, params: Dict[str, Any], agent_context: AgentContext) -> Optional[str]:
+        content = await self.backend.get(self.key(tool, params, agent_context))
+        stats = self.stats.setdefault(tool.name, ToolCacheStats())
+        if content is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return content
+
+    async def set(self, tool: Tool, params: Dict[str, Any], agent_context: AgentContext, content: str) -> None:
+        policy = tool.cache
+        tags = render_tags(policy.tags, params) + [f"tool:{tool.name}"]
+        await self.backend.set(self.key(tool, params, agent_context), content, policy.ttl, tags)
+
+    async def invalidate(self, tool: Tool, params: Dict[str, Any]) -> int:
+        tags = render_tags(tool.invalidates, params)
+        if not tags:
+            return 0
+        dropped = await self.backend.invalidate(tags)
+        self.stats.setdefault(tool.name, ToolCacheStats()).invalidations += dropped
+        return dropped
@@ -0,0 +1,143 @@
+from __future__ import annotations
+import json
+import re
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List
+
+from pydantic import BaseModel
+
+from ..models import ResultEncoding
+
+ENCODING_ATTR = "__agentix_encoding__"
+
+_ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+
+def result_encoding(**options: Any) -> Callable[[Any], Any]:
+    """
+    Configura cómo se serializa el resultado de la tool; tool_from_fn toma la política del atributo.
+
+        @result_encoding(omit=["internal_notes"], defaults={"currency": "USD"})
+        async def list_properties(...): ...
+    """
+    encoding = ResultEncoding(**options)
+    def decorator(fn: Any) -> Any:
+        setattr(fn, ENCODING_ATTR, encoding)
+        return fn
+    return decorator
+
+
+def _timestamp(value: datetime, encoding: ResultEncoding) -> str:
+    if encoding.timestamp_format is None:
+        return value.isoformat()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(encoding.timestamp_format)
+
+
+def _plain(value: Any, encoding: ResultEncoding) -> Any:
+    """
+    Lleva el resultado a tipos JSON: modelos a dict, fechas al formato corto, sin campos omitidos
+    ni nulos (con drop_empty).
+    """
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {
+            str(k): _plain(v, encoding) for k, v in value.items()
+            if k not in encoding.omit and not (encoding.drop_empty and v is None)
+        }
+    if isinstance(value, (list, tuple)):
+        return [_plain(v, encoding) for v in value]
+    if isinstance(value, datetime):
+        return _timestamp(value, encoding)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str) and encoding.timestamp_format and _ISO_TIMESTAMP.match(value):
+        try:
+            return _timestamp(datetime.fromisoformat(value.replace("Z", "+00:00")), encoding)
+        except ValueError:
+            return value
+    return value
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def is_table(value: Any, encoding: ResultEncoding) -> bool:
+    """
+    Lista de registros homogéneos: todos dicts y con casi las mismas claves.
+    """
+    if not encoding.columnar or not isinstance(value, list) or len(value) < encoding.min_rows:
+        return False
+    if not all(isinstance(row, dict) for row in value):
+        return False
+    columns = {k for row in value for k in row}
+    average = sum(len(row) for row in value) / len(value)
+    # Registros dispares dejarían la tabla llena de celdas vacías
+    return bool(columns) and len(columns) <= 1.5 * average
+
+
+def _cell(value: Any, encoding: ResultEncoding) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        text = "true" if value else "false"
+    elif isinstance(value, (int, float, str)):
+        text = str(value)
+    else:
+        text = _compact_json(value)
+    if encoding.separator in text or "\n" in text or text.startswith('"'):
+        # Entre comillas (JSON) para que no rompa la fila
+        text = json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _table(rows: List[Dict[str, Any]], encoding: ResultEncoding, name: str = "") -> str:
+    columns: Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    # En una columna con nulos o vacíos la celda en blanco sería ambigua: ahí no se aplica el default
+    defaults = {
+        k: v for k, v in encoding.defaults.items()
+        if k in columns and not any(_is_empty(row.get(k)) for row in rows)
+    }
+
+    def value(row: Dict[str, Any], column: str) -> Any:
+        v = row.get(column)
+        if column in defaults and v == defaults[column]:
+            return None
+        return None if encoding.drop_empty and _is_empty(v) else v
+
+    header = [c for c in columns if not encoding.drop_empty or any(value(row, c) is not None for row in rows)]
+    lines = [f"{name}: {len(rows)} filas" if name else f"{len(rows)} filas"]
+    if defaults:
+        lines.append("vacío = " + ", ".join(f"{k}={_cell(v, encoding)}" for k, v in defaults.items()))
+    lines.append(encoding.separator.join(header))
+    lines += [encoding.separator.join(_cell(value(row, c), encoding) for c in header) for row in rows]
+    return "\n".join(lines)
+
+
+def encode_result(result: Any, encoding: ResultEncoding) -> str:
+    """
+    Serializa el resultado de una tool para el contexto: tablas para las listas de registros
+    (en la raíz o como campos de un dict) y JSON compacto para el resto.
+    """
+    data = _plain(result, encoding)
+    if is_table(data, encoding):
+        return _table(data, encoding)
+    if isinstance(data, dict) and any(is_table(v, encoding) for v in data.values()):
+        parts = [
+            _table(v, encoding, name=k) if is_table(v, encoding) else f"{k}: {_compact_json(v)}"
+            for k, v in data.items()
+        ]
+        return "\n\n".join(parts)
+    return _compact_json(data)
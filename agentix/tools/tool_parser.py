@@ -1,14 +1,47 @@
-from typing import List, Any
+from typing import List, Any, Optional, Tuple
 import inspect
 import re
 from enum import Enum
 from ..models import AgentContext
+from ..cancellation import CancellationToken
 
-from agentix.models import Param, Tool
+from agentix.models import Param, ResultEncoding, Tool, ToolCachePolicy
+from .cache import CACHE_ATTR, INVALIDATES_ATTR
+from .encoding import ENCODING_ATTR
+from ..utils.collections import LRUCache
 
+# Descripción y parámetros parseados por función: las vistas recrean sus closures en cada
+# build_tools, pero el código (docstring, firma) es el mismo
+_parsed: LRUCache[Tuple[Any, ...], Tuple[str, List[Param]]] = LRUCache(1024)
 
-def tool_from_fn(fn: Any) -> Tool:
-    name = fn.__name__
+
+def tool_from_fn(fn: Any, cache: Optional[ToolCachePolicy] = None, invalidates: Optional[List[str]] = None,
+                 read_only: bool = False, encoding: Optional[ResultEncoding] = None) -> Tool:
+    """
+    cache / invalidates / encoding tienen prioridad sobre los decoradores @cached / @invalidates /
+    @result_encoding de la función.
+    """
+    key = (getattr(fn, "__code__", fn), getattr(fn, "__doc__", None),
+           repr(getattr(fn, "__defaults__", None)), repr(getattr(fn, "__kwdefaults__", None)))
+    parsed = _parsed.get(key)
+    if parsed is None:
+        parsed = _parse(fn)
+        _parsed.put(key, parsed)
+    desc, params = parsed
+
+    return Tool(
+        name=fn.__name__,
+        desc=desc,
+        params=params,
+        fn=fn,
+        cache=cache or getattr(fn, CACHE_ATTR, None),
+        invalidates=invalidates if invalidates is not None else getattr(fn, INVALIDATES_ATTR, []),
+        read_only=read_only,
+        encoding=encoding or getattr(fn, ENCODING_ATTR, None),
+    )
+
+
+def _parse(fn: Any) -> Tuple[str, List[Param]]:
     doc = inspect.getdoc(fn) or ""
 
     # Parse docstring (igual que antes)
@@ -37,8 +70,8 @@ def tool_from_fn(fn: Any) -> Tool:
 
         annotation = param.annotation
 
-        # 🔥 Ignorar si es AgentContext
-        if annotation is AgentContext:
+        # 🔥 Ignorar si es AgentContext o CancellationToken (los inyecta el Agent)
+        if annotation is AgentContext or annotation is CancellationToken:
             continue
 
         ptype = "Any"
@@ -63,4 +96,4 @@ def tool_from_fn(fn: Any) -> Tool:
             enum_values=enum_values
         ))
 
-    return Tool(name=name, desc=desc, params=params, fn=fn)
+    return desc, params
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .agent_repository import AgentRepository
+from .models import AgentContext, UsageTotals
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens", "cost")
+
+
+def model_key(model: str) -> str:
+    # Los nombres de modelo llevan puntos ("gpt-4.1"), que Mongo interpreta como rutas
+    return model.replace(".", "_").replace("$", "_")
+
+
+def usage_delta(usage: Dict[str, Any], cost: float = 0.0) -> Dict[str, float]:
+    """
+    Incremento de una llamada a partir del `usage` de litellm (incluye tokens cacheados si el
+    proveedor los informa).
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    if not isinstance(details, dict):
+        details = getattr(details, "__dict__", {}) or {}
+    prompt = usage.get("prompt_tokens") or 0
+    completion = usage.get("completion_tokens") or 0
+    return {
+        "calls": 1,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": details.get("cached_tokens") or 0,
+        "total_tokens": usage.get("total_tokens") or prompt + completion,
+        "cost": cost or 0.0,
+    }
+
+
+def apply_delta(totals: UsageTotals, model: str, delta: Dict[str, float]) -> None:
+    per_model = totals.models.setdefault(model_key(model), {})
+    for field in USAGE_FIELDS:
+        setattr(totals, field, getattr(totals, field) + delta[field])
+        per_model[field] = per_model.get(field, 0) + delta[field]
+
+
+def usage_scopes(agent_context: AgentContext) -> List[Tuple[str, str]]:
+    return [
+        ("run", agent_context.run_id),
+        ("session", f"{agent_context.user_id}/{agent_context.session_id}"),
+        ("user", agent_context.user_id),
+    ]
+
+
+class UsageBudget(BaseModel):
+    """
+    Topes de consumo; None = sin tope. Se verifican antes de cada paso del run.
+    """
+    max_user_tokens: Optional[int] = None
+    max_session_tokens: Optional[int] = None
+    max_run_tokens: Optional[int] = None
+    max_user_cost: Optional[float] = None
+    exceeded_message: str = "Se alcanzó el límite de uso disponible. Intenta nuevamente más tarde."
+
+
+class UsageAccountant:
+    """
+    Contabilidad de tokens y costo por run, sesión, usuario y modelo.
+
+    Cada llamada (turnos y tareas auxiliares) se suma en memoria y se escribe con $inc en segundo
+    plano: los deltas pendientes se agrupan por ámbitos y modelo y se vuelcan cada `flush_interval`
+    segundos o al terminar un run, fuera del camino crítico de cada paso. Un volcado fallido se
+    reintenta en el ciclo siguiente; close() escribe lo pendiente antes de terminar.
+
+    Para los runs en curso mantiene además los totales de usuario/sesión en memoria (leídos al
+    empezar el run), así la verificación del presupuesto no consulta el storage en cada paso.
+    """
+
+    def __init__(self, repository: AgentRepository, budget: Optional[UsageBudget] = None,
+                 flush_interval: float = 1.0):
+        self.repo = repository
+        self.budget = budget
+        self.flush_interval = flush_interval
+        self._runs: Dict[str, Dict[str, UsageTotals]] = {}
+        self._pending: Dict[Tuple[Tuple[Tuple[str, str], ...], str], Dict[str, float]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self._closing = False
+
+    async def begin_run(self, agent_context: AgentContext) -> None:
+        totals = {"run": UsageTotals()}
+        if self.budget is not None:
+            try:
+                # Lo pendiente de runs anteriores tiene que estar escrito antes de leer los acumulados
+                await self.flush()
+                totals["session"] = await self.repo.get_usage("session", usage_scopes(agent_context)[1][1])
+                totals["user"] = await self.repo.get_usage("user", agent_context.user_id)
+            except Exception as ex:
+                logger.error(f"No se pudo leer el consumo acumulado: {ex}")
+        self._runs[agent_context.run_id] = totals
+
+    def end_run(self, agent_context: AgentContext) -> Optional[UsageTotals]:
+        totals = self._runs.pop(agent_context.run_id, None)
+        if self._pending and self._wakeup is not None:
+            # El consumo del run queda escrito apenas termina, sin esperar al próximo ciclo
+            self._wakeup.set()
+        return totals["run"] if totals else None
+
+    def run_totals(self, agent_context: AgentContext) -> Optional[UsageTotals]:
+        totals = self._runs.get(agent_context.run_id)
+        return totals["run"] if totals else None
+
+    async def record(self, agent_context: Optional[AgentContext], model: str, usage: Dict[str, Any],
+                     cost: float = 0.0) -> None:
+        delta = usage_delta(usage, cost)
+        if agent_context is not None:
+            for totals in self._runs.get(agent_context.run_id, {}).values():
+                apply_delta(totals, model, delta)
+        scopes = (usage_scopes(agent_context) if agent_context is not None else []) + [("model", model_key(model))]
+        self._merge((tuple(scopes), model_key(model)), delta)
+        self._ensure_started()
+
+    def _merge(self, key: Tuple[Tuple[Tuple[str, str], ...], str], delta: Dict[str, float]) -> None:
+        pending = self._pending.setdefault(key, dict.fromkeys(USAGE_FIELDS, 0))
+        for field in USAGE_FIELDS:
+            pending[field] += delta[field]
+
+    def _ensure_started(self) -> None:
+        if self._closing:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+            if self._closing:
+                return
+
+    async def flush(self) -> None:
+        """
+        Escribe los deltas pendientes; los que fallan vuelven a la cola para el próximo ciclo.
+        """
+        if self._flushing is None:
+            self._flushing = asyncio.Lock()
+        async with self._flushing:
+            pending, self._pending = self._pending, {}
+            for (scopes, model), delta in pending.items():
+                try:
+                    await self.repo.add_usage(list(scopes), model, delta)
+                except Exception as ex:
+                    # La contabilidad no debe tumbar el turno
+                    logger.error(f"No se pudo registrar el consumo: {ex}")
+                    self._merge((scopes, model), delta)
+
+    async def close(self) -> None:
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await self._task
+            finally:
+                self._task = None
+        else:
+            await self.flush()
+
+    def exceeded(self, agent_context: AgentContext) -> Optional[str]:
+        """
+        Devuelve el ámbito cuyo presupuesto se superó, o None.
+        """
+        budget = self.budget
+        totals = self._runs.get(agent_context.run_id)
+        if budget is None or totals is None:
+            return None
+        run = totals["run"]
+        session = totals.get("session", UsageTotals())
+        user = totals.get("user", UsageTotals())
+        checks = [
+            ("run", budget.max_run_tokens, run.total_tokens),
+            ("session", budget.max_session_tokens, session.total_tokens),
+            ("user", budget.max_user_tokens, user.total_tokens),
+            ("user_cost", budget.max_user_cost, user.cost),
+        ]
+        for scope, limit, used in checks:
+            if limit is not None and used >= limit:
+                return scope
+        return None
@@ -1,4 +1,5 @@
-from typing import List, TypeVar
+from collections import OrderedDict
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
@@ -10,3 +11,35 @@ def flatten(list_of_lists: List[List[T]]) -> List[T]:
 def model_dump_list(list: List[BaseModel]) -> list[dict]:
     return [item.model_dump() for item in list]
 
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+class LRUCache(Generic[K, V]):
+    """
+    Cache LRU acotado en memoria (no thread-safe, pensado para un event loop).
+    """
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        return self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
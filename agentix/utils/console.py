@@ -8,14 +8,14 @@ from agentix.agent_repository import AgentRepository
 from agentix.models import MessageType, Session
 
 # Tipo para función que imprime/serializa el "stack" según tu ContextManager
-StackDumpFn = Callable[[AgentContext], Sequence[dict]]
+StackDumpFn = Callable[[Session], Sequence[dict]]
 
-def _default_stack_dump(state: AgentContext) -> Sequence[dict]:
+def _default_stack_dump(session: Session) -> Sequence[dict]:
     """
     Implementación por defecto: asume que el ContextManager tipo 'stack'
-    guarda los frames en state.memory['ui_stack'] como lista de dicts.
+    guarda los frames en session.state['ui_stack'] como lista de dicts.
     """
-    stack = state.memory.get("ui_stack", [])
+    stack = session.state.get("ui_stack", [])
     if isinstance(stack, list):
         return [dict(x) for x in stack]
     return []
@@ -49,7 +49,7 @@ async def console_loop(
     - prompt: prefijo del input
     - intro: mensaje de bienvenida
     - messages_tail: cuántos mensajes mostrar en ':messages'
-    - stack_dump_fn: cómo volcar el stack desde AgentContext (por defecto lee 'ui_stack')
+    - stack_dump_fn: cómo volcar el stack desde la Session (por defecto lee state['ui_stack'])
     - input_fn: función de entrada (inyectable para tests)
 
     Comandos soportados:
@@ -82,6 +82,11 @@ async def console_loop(
             print(f"\033[92mResumenes: \n===\n{summaries}\n===\n\033[0m")
             continue
 
+        if low == ":stack":
+            session = await agent.get_session_data(user_id, session_id)
+            pprint.pprint(list(stack_dump_fn(session)))
+            continue
+
         if low == ":messages":
             session = await agent.get_session_data(user_id, session_id)
             print_messages(session)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+# Aproximación barata (~4 caracteres por token). Suficiente para presupuestos y topes,
+# no para facturación.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = "…") -> str:
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - len(marker)].rstrip() + marker
@@ -0,0 +1,107 @@
+"""
+Tokens de resultados de tools: JSON (to_json) vs encode_result con la política por defecto.
+
+    python examples/benchmarks/result_encoding.py
+
+Usa el tokenizer de litellm si puede (cl100k/o200k según el modelo) y si no la estimación
+de agentix (~4 caracteres por token).
+"""
+from __future__ import annotations
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from agentix.models import ResultEncoding
+from agentix.tools.encoding import encode_result
+from agentix.utils.tokens import estimate_tokens
+
+MODEL = "gpt-4o"
+
+CITIES = ["Montevideo", "Punta del Este", "Colonia", "Maldonado", "Salto"]
+KINDS = ["apartamento", "casa", "local", "terreno"]
+STREETS = ["Av. Brasil", "Bulevar Artigas", "Rambla República de México", "Calle 20", "Sarandí"]
+
+
+def _counter() -> Tuple[str, Callable[[str], int]]:
+    try:
+        import litellm
+        litellm.token_counter(model=MODEL, text="ok")
+        return f"litellm ({MODEL})", lambda text: litellm.token_counter(model=MODEL, text=text)
+    except Exception:
+        return "estimate_tokens", estimate_tokens
+
+
+def _property(rng: random.Random, i: int, now: datetime) -> Dict[str, Any]:
+    created = now - timedelta(days=rng.randint(0, 400), seconds=rng.randint(0, 86400), microseconds=rng.randint(0, 10**6))
+    return {
+        "property_id": f"{rng.getrandbits(96):024x}",
+        "title": f"{rng.choice(KINDS).capitalize()} en {rng.choice(CITIES)} #{i}",
+        "kind": rng.choice(KINDS),
+        "address": {"street": rng.choice(STREETS), "number": rng.randint(100, 3000), "city": rng.choice(CITIES)},
+        "price": rng.randrange(60_000, 900_000, 500),
+        "currency": "USD" if rng.random() < 0.9 else "UYU",
+        "bedrooms": rng.randint(0, 5) if rng.random() < 0.8 else None,
+        "bathrooms": rng.randint(1, 3),
+        "area_m2": round(rng.uniform(35, 400), 1),
+        "garage": rng.random() < 0.4,
+        "status": "available" if rng.random() < 0.85 else "reserved",
+        "owner_notes": None,
+        "tags": rng.sample(["vista al mar", "reciclado", "amueblado", "parrillero", "piscina"], rng.randint(0, 2)),
+        "created_at": created,
+        "updated_at": created + timedelta(days=rng.randint(0, 30)),
+    }
+
+
+def _clients(rng: random.Random, n: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "client_id": f"c{i:05d}", "name": f"Cliente {i}", "email": f"cliente{i}@example.com",
+            "phone": None if rng.random() < 0.3 else f"+598 9{rng.randint(1000000, 9999999)}",
+            "last_contact": datetime(2025, rng.randint(1, 12), rng.randint(1, 28), rng.randint(8, 19), tzinfo=timezone.utc).isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def _payloads() -> Dict[str, Any]:
+    rng = random.Random(7)
+    now = datetime(2025, 10, 1, 12, tzinfo=timezone.utc)
+    properties = [_property(rng, i, now) for i in range(50)]
+    return {
+        "list_properties(10)": {"properties": properties[:10]},
+        "list_properties(50)": {"properties": properties},
+        "search_clients(25)": _clients(rng, 25),
+        "get_property": properties[0],
+    }
+
+
+def _as_json(result: Any) -> str:
+    # Lo mismo que to_json, con default=str para las fechas que json.dumps no serializa
+    return json.dumps(result, default=str)
+
+
+def main() -> None:
+    counter_name, count = _counter()
+    encodings = {
+        "columnar": ResultEncoding(),
+        "columnar+defaults": ResultEncoding(omit=["updated_at"], defaults={"currency": "USD", "status": "available"}),
+    }
+    print(f"tokenizer: {counter_name}\n")
+    print(f"{'payload':<22}{'json':>8}" + "".join(f"{name:>20}" for name in encodings))
+    totals = {"json": 0, **{name: 0 for name in encodings}}
+    for name, result in _payloads().items():
+        base = count(_as_json(result))
+        totals["json"] += base
+        row = f"{name:<22}{base:>8}"
+        for enc_name, encoding in encodings.items():
+            tokens = count(encode_result(result, encoding))
+            totals[enc_name] += tokens
+            row += f"{tokens:>10} ({1 - tokens / base:>5.0%})"
+        print(row)
+    print(f"{'total':<22}{totals['json']:>8}" + "".join(
+        f"{totals[n]:>10} ({1 - totals[n] / totals['json']:>5.0%})" for n in encodings))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,7 @@ from typing import Optional
 
 from agentix import Agent, AgentEvent
 from agentix.storage import MongoAgentRepository
-from agentix.context import ContextManager, SimpleContextManager
-from agentix.tools import tool_from_fn
+from agentix.context import ContextManager
 from agentix.stack import StackContextManager
 from agentix.utils.console import console_loop
 from .router import build_router
@@ -32,16 +31,16 @@ async def get_weather(city: str) -> int:
 
 async def interactive_loop():
     # Storage (sesiones/mensajes/estado)
-    repo = MongoAgentRepository(uri="mongodb://localhost:27017", db_name="agentix_demo")
+    repo = MongoAgentRepository(uri="mongodb://localhost:27017", db_name="agentix_demo", batch_audit=True)
     await repo.ensure_indexes()
 
     # Contexto UI (stack) + router de vistas
     router = build_router()
 
-    system = dedent("""Eres Napoleón Bonaparte, responde al usuario en español antigüo y 
-        relacionandola con alguna de tus hazañas,se breve, como hablando por whatsapp
+    system = dedent("""Eres el asistente de un panel inmobiliario. Navega entre las vistas usando
+        sus tools y responde al usuario en español, de forma breve.
     """)
-    cm: ContextManager = SimpleContextManager(system, tools=[tool_from_fn(get_weather)])
+    cm: ContextManager = StackContextManager(router, system=system)
     os.environ["LANGFUSE_TRACING_ENABLED"] = "false"
 
     def log_events(event: AgentEvent):
@@ -60,13 +59,18 @@ async def interactive_loop():
     user_id = "user_demo"
     session_id = "session_demo"
 
-    await console_loop(
-        agent=agent,
-        repo=repo,
-        user_id=user_id,
-        session_id=session_id,
-        messages_tail=8
-    )
+    try:
+        await console_loop(
+            agent=agent,
+            repo=repo,
+            user_id=user_id,
+            session_id=session_id,
+            messages_tail=8
+        )
+    finally:
+        # Vacía el consumo y la auditoría pendientes
+        await agent.usage.close()
+        await repo.close()
 
 if __name__ == "__main__":
     asyncio.run(interactive_loop())
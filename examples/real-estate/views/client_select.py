@@ -1,18 +1,10 @@
 from __future__ import annotations
 from typing import Any, Dict, List
-from pydantic import BaseModel
 
+from agentix import tool_from_fn
 from agentix.models import Tool, AgentContext
 from agentix.stack.view import View
 
-class SearchClientsInput(BaseModel):
-    query: str
-    top_k: int = 5
-
-class SelectClientInput(BaseModel):
-    client_id: str
-    display_name: str | None = None
-
 class ClientSelectView(View):
     screen_key = "client_select"
 
@@ -21,36 +13,50 @@ class ClientSelectView(View):
             "Selector de clientes.\n"
             "- search_clients {query,top_k}\n"
             "- select_client {client_id,display_name}\n"
-            "- __confirm para devolver el cliente, __cancel para salir\n"
+            "- _confirm para devolver el cliente, _cancel para salir\n"
         )
 
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]:
         tools: List[Tool] = []
 
-        async def search_clients(inputs: SearchClientsInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
-            q = (inputs.query or "").strip().lower()
-            fake = [{"client_id": f"c_{i}", "name": f"{q.title()} {i}"} for i in range(1, inputs.top_k + 1)]
-            v["candidates"] = fake
+        async def search_clients(query: str, top_k: int = 5):
+            """
+            Busca clientes por nombre
+            :param str query: texto a buscar
+            :param int top_k: cantidad máxima de resultados
+            """
+            q = (query or "").strip().lower()
+            fake = [{"client_id": f"c_{i}", "name": f"{q.title()} {i}"} for i in range(1, top_k + 1)]
+            view_state["candidates"] = fake
             return {"results": fake}
 
-        async def select_client(inputs: SelectClientInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
-            client = {"client_id": inputs.client_id, "name": inputs.display_name}
-            v["selected"] = client
-            v["__pending_result"] = client
+        async def select_client(client_id: str, display_name: str = None):
+            """
+            Selecciona un cliente
+            :param str client_id: id del cliente
+            :param str display_name: nombre del cliente
+            """
+            client = {"client_id": client_id, "name": display_name}
+            view_state["selected"] = client
+            view_state["__pending_result"] = client
             return {"selected": client}
 
-        class NoInput(BaseModel): pass
-
-        async def _confirm(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
-            return {"nav": "confirm", "result": v.get("__pending_result")}
+        async def _confirm():
+            """
+            Devuelve el cliente seleccionado a la vista anterior
+            """
+            return {"nav": "confirm", "result": view_state.get("__pending_result")}
 
-        async def _cancel(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def _cancel():
+            """
+            Sale del selector sin elegir cliente
+            """
             return {"nav": "cancel"}
 
         tools += [
-            Tool(name="search_clients", desc="Buscar clientes", input_model=SearchClientsInput, fn=search_clients),
-            Tool(name="select_client", desc="Seleccionar cliente", input_model=SelectClientInput, fn=select_client),
-            Tool(name="__confirm", desc="Confirmar selección", input_model=NoInput, fn=_confirm),
-            Tool(name="__cancel", desc="Cancelar", input_model=NoInput, fn=_cancel),
+            tool_from_fn(search_clients),
+            tool_from_fn(select_client),
+            tool_from_fn(_confirm),
+            tool_from_fn(_cancel),
         ]
         return tools
@@ -19,15 +19,18 @@ class IndexView(View):
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]:
         tools: List[Tool] = []
 
-        async def open_list():
+        async def open_property_list():
             """
             Abre la lista de propiedades del usuario actual
             """
             return View.call_view("property_list")
 
-        async def open_create():
+        async def open_property_create():
+            """
+            Abre el formulario para crear una propiedad
+            """
             return View.call_view("property_create")
 
-        tools.append(tool_from_fn(open_list))
-        tools.append(tool_from_fn(open_create))
+        tools.append(tool_from_fn(open_property_list))
+        tools.append(tool_from_fn(open_property_create))
         return tools
@@ -1,6 +1,5 @@
 from __future__ import annotations
 from typing import Any, Dict, List
-from pydantic import BaseModel
 
 from agentix import tool_from_fn
 from agentix.models import Tool, AgentContext
@@ -11,21 +10,26 @@ class PropertyDeleteView(View):
     screen_key = "property_delete"
 
     def instructions(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> str:
-        return f"Eliminar propiedad {view_state.get('property_id')}. Usa __confirm o __cancel."
+        return f"Eliminar propiedad {view_state.get('property_id')}. Usa _confirm o _cancel."
 
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]:
-        class NoInput(BaseModel): pass
         tools: List[Tool] = []
 
-        async def _confirm(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def _confirm():
+            """
+            Elimina la propiedad y vuelve a la vista anterior
+            """
             repo = PropertyRepo()
-            pid = v.get("property_id")
+            pid = view_state.get("property_id")
             ok = await repo.delete(pid)
             res = {"deleted": ok, "property_id": pid}
-            v["__pending_result"] = res
+            view_state["__pending_result"] = res
             return {"nav": "confirm", "result": res}
 
-        async def _cancel(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def _cancel():
+            """
+            Cancela la eliminación y vuelve a la vista anterior
+            """
             return {"nav": "cancel"}
 
         tools += [
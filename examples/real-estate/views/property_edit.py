@@ -1,9 +1,9 @@
 from __future__ import annotations
 from typing import Any, Dict, List
-from pydantic import BaseModel
 
 from agentix import tool_from_fn
 from agentix.models import Tool, AgentContext
+from agentix.speculation import SpeculativeCall
 from agentix.stack.view import View
 from ..repo import PropertyRepo
 
@@ -15,35 +15,62 @@ class PropertyEditView(View):
         pid = view_state.get("property_id")
         return (
             f"Editando propiedad {pid}.\n"
+            "- get_property para ver los datos actuales\n"
             "- set_field {field,value}\n"
-            "- open_client_selector {hint}\n"
-            "- __confirm para guardar, __cancel para descartar\n"
+            "- open_client_selector\n"
+            "- _confirm para guardar, _cancel para descartar\n"
         )
 
+    def speculate(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[SpeculativeCall]:
+        # Al abrir el editor casi siempre se consulta primero la propiedad; después de que el
+        # modelo la leyó (__calls lo anota el stack) ya no vale la pena adelantarla
+        if view_state.get("changes") or "get_property" in view_state.get("__calls", []):
+            return []
+        return [SpeculativeCall(tool_name="get_property")]
+
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]:
         tools: List[Tool] = []
 
-        async def set_field():
-            print("set_field")
-            return {"nav": "cancel"}
+        async def get_property():
+            """
+            Devuelve los datos actuales de la propiedad en edición
+            """
+            return await PropertyRepo().get(view_state.get("property_id"))
 
-        async def open_client_selector():
-            return {"nav": "cancel"}
+        async def set_field(field: str, value: str):
+            """
+            Cambia un campo de la propiedad (se guarda al confirmar)
+            :param str field: nombre del campo
+            :param str value: nuevo valor
+            """
+            view_state.setdefault("changes", {})[field] = value
+            return {"ok": True, "changed": {field: value}}
 
-        class NoInput(BaseModel): pass
+        async def open_client_selector():
+            """
+            Abre el selector de clientes para asociar uno a la propiedad
+            """
+            return View.call_view("client_select", return_path="relations.client")
 
-        async def _confirm(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def _confirm():
+            """
+            Guarda los cambios y vuelve a la vista anterior
+            """
             repo = PropertyRepo()
-            pid = v.get("property_id")
-            changes = v.get("changes", {})
+            pid = view_state.get("property_id")
+            changes = {**view_state.get("changes", {}), **view_state.get("relations", {})}
             res = await repo.update(pid, changes)
-            v["__pending_result"] = res
+            view_state["__pending_result"] = res
             return {"nav": "confirm", "result": res}
 
-        async def _cancel(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def _cancel():
+            """
+            Descarta los cambios y vuelve a la vista anterior
+            """
             return {"nav": "cancel"}
 
         tools += [
+            tool_from_fn(get_property, read_only=True),
             tool_from_fn(set_field),
             tool_from_fn(open_client_selector),
             tool_from_fn(_confirm),
@@ -1,21 +1,12 @@
 from __future__ import annotations
 from typing import Any, Dict, List
-from pydantic import BaseModel
 
 from agentix import tool_from_fn
 from agentix.models import Tool, AgentContext
 from agentix.stack.view import View
+from agentix.tools import result_encoding
 from ..repo import PropertyRepo
 
-class ListInput(BaseModel):
-    limit: int = 10
-
-class OpenEditorInput(BaseModel):
-    property_id: str
-
-class OpenDeleteInput(BaseModel):
-    property_id: str
-
 class PropertyListView(View):
     screen_key = "property_list"
 
@@ -25,30 +16,46 @@ class PropertyListView(View):
             "- list_properties {limit}\n"
             "- open_property_editor {property_id}\n"
             "- open_property_delete {property_id}\n"
-            "- __cancel para volver\n"
+            "- _cancel para volver\n"
         )
 
     def build_tools(self, agent_state: AgentContext, view_state: Dict[str, Any]) -> List[Tool]:
         tools: List[Tool] = []
 
-        async def list_properties(inputs: ListInput, vstate: Dict[str, Any], astate: AgentContext, uid: str, sid: str):
+        # Registros homogéneos: van como tabla y sin los campos de auditoría
+        @result_encoding(omit=["updated_at"])
+        async def list_properties(limit: int = 10):
+            """
+            Lista las propiedades más recientes
+            :param int limit: cantidad máxima de propiedades
+            """
             repo = PropertyRepo()
-            items = await repo.list(limit=inputs.limit)
-            vstate["items"] = items
+            items = await repo.list(limit=limit)
+            view_state["items"] = items
             return {"properties": items}
 
-        async def open_editor(inputs: OpenEditorInput, vstate: Dict[str, Any], astate: AgentContext, uid: str, sid: str):
-            return View.call_view("property_edit", {"property_id": inputs.property_id, "changes": {}, "relations": {}}, return_path=None)
-
-        async def open_delete(inputs: OpenDeleteInput, vstate: Dict[str, Any], astate: AgentContext, uid: str, sid: str):
-            return View.call_view("property_delete", {"property_id": inputs.property_id}, return_path=None)
-
-        class NoInput(BaseModel): pass
-        async def _cancel(_i: NoInput, v: Dict[str, Any], a: AgentContext, uid: str, sid: str):
+        async def open_property_editor(property_id: str):
+            """
+            Abre el editor de una propiedad
+            :param str property_id: id de la propiedad
+            """
+            return View.call_view("property_edit", {"property_id": property_id, "changes": {}, "relations": {}}, return_path=None)
+
+        async def open_property_delete(property_id: str):
+            """
+            Abre la confirmación para eliminar una propiedad
+            :param str property_id: id de la propiedad
+            """
+            return View.call_view("property_delete", {"property_id": property_id}, return_path=None)
+
+        async def _cancel():
+            """
+            Vuelve a la vista anterior
+            """
             return {"nav": "cancel"}
 
         tools += [
-            tool_from_fn(list_properties), tool_from_fn(open_editor),
-            tool_from_fn(open_delete), tool_from_fn(_cancel),
+            tool_from_fn(list_properties), tool_from_fn(open_property_editor),
+            tool_from_fn(open_property_delete), tool_from_fn(_cancel),
         ]
         return tools
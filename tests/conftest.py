@@ -0,0 +1,21 @@
+from __future__ import annotations
+import os
+from typing import Any, List
+
+# Antes de importar agentix: sin trazas a Langfuse ni descarga del mapa de costos de litellm
+os.environ.setdefault("LANGFUSE_TRACING_ENABLED", "false")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import litellm
+import pytest
+
+from fakes import ScriptedLLM
+
+
+@pytest.fixture
+def scripted_llm(monkeypatch: pytest.MonkeyPatch):
+    def install(responses: List[Any]) -> ScriptedLLM:
+        llm = ScriptedLLM(responses)
+        monkeypatch.setattr(litellm, "acompletion", llm)
+        return llm
+    return install
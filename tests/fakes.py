@@ -0,0 +1,46 @@
+from __future__ import annotations
+import itertools
+import json
+from typing import Any, Dict, List, Optional
+
+import litellm
+
+# Ids únicos en todo el proceso: un run no puede tener dos tool calls con el mismo id
+_call_ids = itertools.count()
+
+
+def llm_response(content: Optional[str] = None, calls: Optional[List[tuple]] = None,
+                 finish_reason: Optional[str] = None) -> litellm.ModelResponse:
+    """
+    Respuesta de litellm con texto o tool calls ([(nombre, argumentos), ...]).
+    """
+    message: Dict[str, Any] = {"role": "assistant", "content": content}
+    if calls:
+        message["tool_calls"] = [
+            {"id": f"call_{next(_call_ids)}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+            for name, args in calls
+        ]
+    return litellm.ModelResponse(
+        choices=[{"finish_reason": finish_reason or ("tool_calls" if calls else "stop"), "index": 0, "message": message}],
+        usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    )
+
+
+class ScriptedLLM:
+    """
+    Reemplazo de litellm.acompletion que devuelve las respuestas en orden. Un elemento callable
+    se invoca con los kwargs de la llamada (sirve para fallar o para streams).
+    """
+
+    def __init__(self, responses: List[Any]):
+        self.responses = list(responses)
+        self.calls: List[Dict[str, Any]] = []
+
+    async def __call__(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        response = self.responses.pop(0)
+        if callable(response):
+            response = response(kwargs)
+            if hasattr(response, "__await__"):
+                response = await response
+        return response
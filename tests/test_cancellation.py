@@ -0,0 +1,94 @@
+from __future__ import annotations
+import asyncio
+import time
+
+import pytest
+
+from agentix import Agent, CancellationToken, LeasePolicy, RunCancelled, SimpleContextManager, tool_from_fn
+from agentix.cancellation import REASON_CANCELLED, REASON_DEADLINE
+from agentix.storage import InMemoryAgentRepository
+
+from fakes import llm_response
+
+
+async def _value() -> int:
+    return 1
+
+
+def test_guard_returns_the_result_in_time() -> None:
+    async def main() -> int:
+        return await CancellationToken(timeout=5).guard(_value())
+
+    assert asyncio.run(main()) == 1
+
+
+def test_guard_on_expired_token_closes_the_coroutine() -> None:
+    async def main() -> None:
+        coroutine = _value()
+        with pytest.raises(RunCancelled) as info:
+            await CancellationToken(timeout=0).guard(coroutine)
+        assert info.value.reason == REASON_DEADLINE
+        # Cerrada: no queda una corrutina sin esperar (RuntimeWarning al recolectarla)
+        assert coroutine.cr_frame is None
+
+    asyncio.run(main())
+
+
+def test_guard_stops_on_deadline_and_on_cancel() -> None:
+    async def main() -> None:
+        started = time.monotonic()
+        with pytest.raises(RunCancelled):
+            await CancellationToken(timeout=0.05).guard(asyncio.sleep(5))
+        assert time.monotonic() - started < 1
+
+        token = CancellationToken()
+        asyncio.get_running_loop().call_later(0.05, token.cancel)
+        with pytest.raises(RunCancelled) as info:
+            await token.guard(asyncio.sleep(5))
+        assert info.value.reason == REASON_CANCELLED
+
+    asyncio.run(main())
+
+
+def test_deadline_during_a_tool_closes_the_run_as_cancelled(scripted_llm) -> None:
+    async def slow(key: str) -> str:
+        """
+        Consulta lenta
+        :param str key: clave
+        """
+        await asyncio.sleep(5)
+        return "valor"
+
+    llm = scripted_llm([llm_response(calls=[("slow", {"key": "k"})]), llm_response("no debería llegar")])
+    repo = InMemoryAgentRepository()
+    agent = Agent("test", repo, SimpleContextManager("s", tools=[tool_from_fn(slow)]))
+
+    async def main():
+        return await agent.run_detailed("u", "s", "hola", run_id="R1", timeout=0.2)
+
+    started = time.monotonic()
+    result = asyncio.run(main())
+    assert time.monotonic() - started < 2
+    assert result.status == "cancelled" and result.cancel_reason == REASON_DEADLINE
+    assert len(llm.calls) == 1
+    # La tool call cortada queda con resultado, así el historial sigue siendo válido
+    messages = repo.sessions[("s", "u")]["messages"]
+    assert [m["role"] for m in messages] == ["user", "assistant", "tool", "assistant"]
+    assert '"cancelled"' in messages[2]["content"]
+    assert repo.runs["R1"]["status"] == "cancelled"
+
+
+def test_lease_wait_is_bounded_by_the_deadline(scripted_llm) -> None:
+    scripted_llm([llm_response("ok")])
+    repo = InMemoryAgentRepository()
+    agent = Agent("test", repo, SimpleContextManager("s"),
+                  lease_policy=LeasePolicy(wait_timeout=60, poll_interval=0.01, max_poll_interval=0.05))
+
+    async def main() -> None:
+        await repo.acquire_lease("s", "u", "otro worker", 30)
+        with pytest.raises(RunCancelled):
+            await agent.run_detailed("u", "s", "hola", timeout=0.2)
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - started < 2
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import litellm
+import pytest
+
+from agentix.connections import HttpPoolPolicy, SharedHttpClient
+
+COMPLETION = {
+    "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}
+
+
+class _MockOpenAI(BaseHTTPRequestHandler):
+    # Keep-alive: el pool puede reutilizar la conexión
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, body: bytes) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self) -> None:
+        self._reply(b"{}")
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(json.dumps(COMPLETION).encode())
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def mock_server() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockOpenAI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _policy(url: str) -> HttpPoolPolicy:
+    return HttpPoolPolicy(http2=False, warmup_urls=[f"{url}/v1/models"], ping_interval=None)
+
+
+def test_litellm_calls_reuse_the_warmed_connection(mock_server: str) -> None:
+    pool = SharedHttpClient(_policy(mock_server))
+
+    async def main() -> None:
+        await pool.start()
+        for _ in range(3):
+            response = await litellm.acompletion(model="openai/gpt-4o-mini", api_base=f"{mock_server}/v1",
+                                                 api_key="test", messages=[{"role": "user", "content": "hola"}])
+            assert response.choices[0].message.content == "ok"
+        await pool.close()
+
+    asyncio.run(main())
+    assert pool.stats.pings == 1
+    # El warm-up no cuenta como request ni como conexión nueva: las 3 llamadas reusaron la suya
+    assert pool.stats.requests == 3
+    assert pool.stats.new_connections == 0
+    assert pool.stats.reuse_rate == 1.0
+
+
+def test_pings_do_not_count_as_requests(mock_server: str) -> None:
+    pool = SharedHttpClient(_policy(mock_server))
+
+    async def main() -> None:
+        await pool.start()
+        await pool.warmup()
+        await pool.close()
+
+    asyncio.run(main())
+    assert pool.stats.pings == 2
+    assert pool.stats.requests == 0
+    assert pool.stats.reuse_rate == 0.0
+
+
+def test_client_from_a_previous_loop_is_closed(mock_server: str) -> None:
+    pool = SharedHttpClient(_policy(mock_server))
+
+    async def first() -> None:
+        await pool.start()
+
+    async def second() -> None:
+        pool.ensure_started(warmup=False)
+        # El cierre del cliente viejo corre como tarea del loop nuevo
+        await asyncio.sleep(0)
+        await pool.close()
+
+    asyncio.run(first())
+    stale = pool.client
+    asyncio.run(second())
+    assert stale is not None and stale.is_closed
+    assert litellm.aclient_session is None
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+
+from agentix.models import ResultEncoding
+from agentix.tools.encoding import encode_result, is_table
+
+
+def _rows(n: int = 3):
+    return [{"id": i, "name": f"n{i}", "currency": "USD", "note": None} for i in range(n)]
+
+
+def test_homogeneous_records_become_a_table() -> None:
+    text = encode_result(_rows(), ResultEncoding())
+    lines = text.splitlines()
+    assert lines[0] == "3 filas"
+    # La columna sin ningún valor se quita
+    assert lines[1] == "id\tname\tcurrency"
+    assert lines[2:] == ["0\tn0\tUSD", "1\tn1\tUSD", "2\tn2\tUSD"]
+
+
+def test_few_or_mixed_records_stay_json() -> None:
+    encoding = ResultEncoding()
+    assert not is_table(_rows(2), encoding)
+    mixed = [{"a": 1}, {"b": 2}, {"c": 3}]
+    assert not is_table(mixed, encoding)
+    assert json.loads(encode_result(mixed, encoding)) == mixed
+
+
+def test_defaults_are_blank_and_declared_in_the_legend() -> None:
+    rows = _rows()
+    rows[1]["currency"] = "UYU"
+    text = encode_result(rows, ResultEncoding(defaults={"currency": "USD"}))
+    lines = text.splitlines()
+    assert lines[1] == "vacío = currency=USD"
+    assert lines[3:] == ["0\tn0\t", "1\tn1\tUYU", "2\tn2\t"]
+
+
+def test_column_with_nulls_keeps_its_values() -> None:
+    rows = _rows()
+    rows[1]["currency"] = None
+    text = encode_result(rows, ResultEncoding(defaults={"currency": "USD"}))
+    lines = text.splitlines()
+    # Un blanco ahí sería ambiguo (¿USD o nulo?): no se aplica el default ni se anuncia
+    assert "vacío" not in text
+    assert lines[2:] == ["0\tn0\tUSD", "1\tn1\t", "2\tn2\tUSD"]
+
+
+def test_nested_tables_omitted_fields_and_timestamps() -> None:
+    created = datetime(2025, 10, 1, 12, 30, 45, tzinfo=timezone.utc)
+    result = {"total": 3, "items": [{"id": i, "secret": "x", "created": created} for i in range(3)]}
+    text = encode_result(result, ResultEncoding(omit=["secret"]))
+    head, table = text.split("\n\n")
+    assert head == "total: 3"
+    assert table.splitlines()[:3] == ["items: 3 filas", "id\tcreated", "0\t2025-10-01 12:30"]
+
+
+def test_cells_with_separator_or_newline_are_quoted() -> None:
+    rows = [{"id": i, "text": "a\tb" if i == 0 else "línea\nnueva"} for i in range(3)]
+    lines = encode_result(rows, ResultEncoding()).splitlines()
+    assert lines[2] == '0\t"a\\tb"'
+    assert lines[3] == '1\t"línea\\nnueva"'
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from agentix import Agent, LeasePolicy, LeaseUnavailable, SimpleContextManager, StaleLeaseError, tool_from_fn
+from agentix.leases import LeaseManager
+from agentix.storage import InMemoryAgentRepository
+
+from fakes import llm_response
+
+FAST = dict(poll_interval=0.01, max_poll_interval=0.02)
+
+
+def test_busy_session_fails_or_waits_for_release() -> None:
+    repo = InMemoryAgentRepository()
+    first = LeaseManager(repo, LeasePolicy(**FAST), owner="a")
+    failing = LeaseManager(repo, LeasePolicy(on_busy="fail", **FAST), owner="b")
+    waiting = LeaseManager(repo, LeasePolicy(wait_timeout=2, **FAST), owner="c")
+
+    async def main() -> None:
+        lease = await first.acquire("s", "u")
+        with pytest.raises(LeaseUnavailable):
+            await failing.acquire("s", "u")
+        pending = asyncio.create_task(waiting.acquire("s", "u"))
+        await asyncio.sleep(0.05)
+        assert not pending.done()
+        await repo.release_lease(lease)
+        second = await pending
+        assert second.owner == "c"
+        assert second.token > lease.token
+
+    asyncio.run(main())
+
+
+def test_expired_lease_can_be_taken_and_stale_release_is_ignored() -> None:
+    repo = InMemoryAgentRepository()
+    manager = LeaseManager(repo, LeasePolicy(on_busy="fail", **FAST))
+
+    async def main() -> None:
+        old = await manager.acquire("s", "u")
+        repo.leases[("s", "u")]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        new = await manager.acquire("s", "u")
+        await repo.release_lease(old)
+        assert repo.leases[("s", "u")]["token"] == new.token
+        assert not await repo.renew_lease(old, 30)
+
+    asyncio.run(main())
+
+
+def test_save_with_a_stale_fencing_token_is_rejected() -> None:
+    repo = InMemoryAgentRepository()
+    manager = LeaseManager(repo, LeasePolicy(**FAST))
+
+    async def main() -> None:
+        old = await manager.acquire("s", "u")
+        session = await repo.get_or_create_session("s", "u")
+        repo.leases.clear()
+        new = await manager.acquire("s", "u")
+        with pytest.raises(StaleLeaseError):
+            await repo.save_session(session, fencing_token=old.token)
+        await repo.save_session(session, fencing_token=new.token)
+
+    asyncio.run(main())
+
+
+def test_run_that_lost_its_lease_does_not_overwrite_the_session(scripted_llm) -> None:
+    repo = InMemoryAgentRepository()
+    intruder = LeaseManager(repo, LeasePolicy(**FAST), owner="otro")
+
+    async def lookup(key: str) -> str:
+        """
+        Consulta una clave
+        :param str key: clave
+        """
+        # Mientras el run trabaja su lease vence y otro worker toma la sesión
+        repo.leases[("s", "u")]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await intruder.acquire("s", "u")
+        return "valor"
+
+    scripted_llm([llm_response(calls=[("lookup", {"key": "k"})]), llm_response("listo")])
+    agent = Agent("test", repo, SimpleContextManager("s", tools=[tool_from_fn(lookup)]),
+                  lease_policy=LeasePolicy(**FAST))
+
+    async def main() -> None:
+        with pytest.raises(StaleLeaseError):
+            await agent.run_detailed("u", "s", "hola", run_id="R1")
+
+    asyncio.run(main())
+    assert repo.sessions[("s", "u")]["messages"] == []
+    # Queda reanudable con el mismo run_id
+    assert repo.runs["R1"]["status"] == "failed"
+
+
+def test_concurrent_runs_on_one_session_are_serialized(scripted_llm) -> None:
+    repo = InMemoryAgentRepository()
+
+    async def slow_reply(_kwargs):
+        await asyncio.sleep(0.05)
+        return llm_response("ok")
+
+    scripted_llm([slow_reply, slow_reply])
+    agent = Agent("test", repo, SimpleContextManager("s"), lease_policy=LeasePolicy(**FAST))
+
+    async def main() -> None:
+        await asyncio.gather(agent.run("u", "s", "uno"), agent.run("u", "s", "dos"))
+
+    asyncio.run(main())
+    # Sin lease el segundo guardado pisaría al primero
+    contents = [m["content"] for m in repo.sessions[("s", "u")]["messages"] if m["role"] == "user"]
+    assert sorted(contents) == ["dos", "uno"]
+    assert repo.leases == {}
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from agentix import Agent, tool_from_fn
+from agentix.stack.manager import StackContextManager
+from agentix.stack.view import View, ViewRouter
+from agentix.storage import InMemoryAgentRepository
+
+from fakes import llm_response
+
+
+class HomeView(View):
+    screen_key = "home"
+
+    def build_tools(self, agent_state, view_state):
+        async def pick():
+            """
+            Abre el selector
+            """
+            return View.call_view("picker", return_path="chosen")
+
+        return [tool_from_fn(pick)]
+
+
+class PickerView(View):
+    screen_key = "picker"
+
+    def __init__(self, executed: List[str]):
+        self.executed = executed
+
+    def build_tools(self, agent_state, view_state):
+        async def select(name: str):
+            """
+            Elige una opción
+            :param str name: opción elegida
+            """
+            self.executed.append(name)
+            view_state["__pending_result"] = name
+            return {"ok": True}
+
+        async def _confirm():
+            """
+            Devuelve la opción elegida
+            """
+            return {"nav": "confirm"}
+
+        return [tool_from_fn(select), tool_from_fn(_confirm)]
+
+
+def _agent(repo: InMemoryAgentRepository, executed: List[str]) -> Agent:
+    router = ViewRouter()
+    router.register("home", HomeView)
+    router.register("picker", lambda: PickerView(executed))
+    router.set_index("home")
+    return Agent("test", repo, StackContextManager(router))
+
+
+def _crash(_kwargs: Dict[str, Any]) -> Any:
+    raise RuntimeError("worker caído")
+
+
+def _script(crash: bool) -> List[Any]:
+    steps: List[Any] = [
+        llm_response(calls=[("pick", {})]),
+        llm_response(calls=[("select", {"name": "A"}), ("_confirm", {})]),
+    ]
+    return steps + ([_crash] if crash else []) + [llm_response("listo")]
+
+
+def _chosen(repo: InMemoryAgentRepository) -> Any:
+    state = repo.sessions[("s", "u")]["state"]
+    return state["ui_stack"][0]["view_state"].get("chosen")
+
+
+@pytest.mark.parametrize("crash", [False, True])
+def test_resume_restores_view_state_written_by_completed_tools(scripted_llm, crash: bool) -> None:
+    scripted_llm(_script(crash))
+    repo = InMemoryAgentRepository()
+    executed: List[str] = []
+    agent = _agent(repo, executed)
+
+    async def main() -> None:
+        try:
+            await agent.run_detailed("u", "s", "elegí A", run_id="R1")
+        except RuntimeError:
+            assert crash
+            result = await agent.run_detailed("u", "s", "elegí A", run_id="R1")
+            assert result.resumed and result.status == "completed"
+
+    asyncio.run(main())
+    # Con o sin caída, la selección llega a la vista que abrió el selector
+    assert _chosen(repo) == "A"
+    # y la tool que ya había terminado no se repite al reanudar
+    assert executed == ["A"]
+
+
+def test_checkpoint_stores_the_stack_with_each_tool_result(scripted_llm) -> None:
+    scripted_llm(_script(crash=True))
+    repo = InMemoryAgentRepository()
+    agent = _agent(repo, [])
+
+    async def main() -> None:
+        with pytest.raises(RuntimeError):
+            await agent.run_detailed("u", "s", "elegí A", run_id="R1")
+
+    asyncio.run(main())
+    checkpoint = repo.runs["R1"]
+    assert checkpoint["status"] == "failed"
+    assert [f["screen_key"] for f in checkpoint["state"]] == ["home"]
+    assert checkpoint["state"][0]["view_state"]["chosen"] == "A"
+    # El run fallido no tocó la sesión guardada
+    assert "ui_stack" not in repo.sessions[("s", "u")]["state"]
+
+
+def test_finished_run_is_not_executed_again(scripted_llm) -> None:
+    llm = scripted_llm([llm_response("hola")])
+    repo = InMemoryAgentRepository()
+    agent = _agent(repo, [])
+
+    async def main() -> None:
+        first = await agent.run_detailed("u", "s", "hola", run_id="R1")
+        again = await agent.run_detailed("u", "s", "hola", run_id="R1")
+        assert again.resumed and again.output == first.output == "hola"
+
+    asyncio.run(main())
+    assert len(llm.calls) == 1
+    session = repo.sessions[("s", "u")]
+    assert [m["role"] for m in session["messages"]] == ["user", "assistant"]
+
+
+def test_memory_repository_returns_copies() -> None:
+    repo = InMemoryAgentRepository()
+
+    async def main() -> None:
+        session = await repo.get_or_create_session("s", "u")
+        session.state["ui_stack"] = [{"screen_key": "home", "view_state": {}}]
+        await repo.save_session(session)
+        session.state["ui_stack"][0]["view_state"]["x"] = 1
+        loaded = await repo.get_or_create_session("s", "u")
+        loaded.state["ui_stack"][0]["view_state"]["y"] = 1
+
+    asyncio.run(main())
+    assert repo.sessions[("s", "u")]["state"]["ui_stack"][0]["view_state"] == {}
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List
+
+from agentix import Agent, tool_from_fn
+from agentix.speculation import SpeculativeCall
+from agentix.stack.manager import StackContextManager
+from agentix.stack.view import View, ViewRouter
+from agentix.storage import InMemoryAgentRepository
+
+from fakes import llm_response
+
+
+class ListView(View):
+    screen_key = "list"
+
+    def build_tools(self, agent_state, view_state):
+        async def open_item(item_id: str):
+            """
+            Abre un ítem
+            :param str item_id: id del ítem
+            """
+            return View.call_view("item", params={"item_id": item_id})
+
+        return [tool_from_fn(open_item)]
+
+
+class ItemView(View):
+    screen_key = "item"
+
+    def __init__(self, reads: List[str]):
+        self.reads = reads
+
+    def speculate(self, agent_state, view_state) -> List[SpeculativeCall]:
+        if "get_item" in view_state.get("__calls", []):
+            return []
+        return [SpeculativeCall(tool_name="get_item")]
+
+    def build_tools(self, agent_state, view_state):
+        async def get_item() -> Dict[str, Any]:
+            """
+            Devuelve el ítem abierto
+            """
+            self.reads.append(view_state["item_id"])
+            return {"item_id": view_state["item_id"]}
+
+        async def _cancel():
+            """
+            Vuelve a la lista
+            """
+            return {"nav": "cancel"}
+
+        return [tool_from_fn(get_item, read_only=True), tool_from_fn(_cancel)]
+
+
+def _agent(repo: InMemoryAgentRepository, reads: List[str]) -> Agent:
+    router = ViewRouter()
+    router.register("list", ListView)
+    router.register("item", lambda: ItemView(reads))
+    router.set_index("list")
+    return Agent("test", repo, StackContextManager(router))
+
+
+def _stack(repo: InMemoryAgentRepository) -> List[Dict[str, Any]]:
+    return repo.sessions[("s", "u")]["state"]["ui_stack"]
+
+
+def test_prediction_stops_after_the_model_reads_the_item(scripted_llm) -> None:
+    scripted_llm([
+        llm_response(calls=[("open_item", {"item_id": "1"})]),
+        llm_response(calls=[("get_item", {})]),
+        llm_response(calls=[("get_item", {})]),
+        llm_response("listo"),
+    ])
+    repo = InMemoryAgentRepository()
+    reads: List[str] = []
+    agent = _agent(repo, reads)
+
+    asyncio.run(agent.run("u", "s", "abrí el 1"))
+    # Primera lectura especulada (acierto); la segunda ya no se predice y va por el camino normal
+    assert agent.speculation_stats.launched == 1
+    assert agent.speculation_stats.hits == 1
+    assert reads == ["1", "1"]
+    assert _stack(repo)[-1]["view_state"]["__calls"] == ["get_item"]
+
+
+def test_discarded_prediction_leaves_no_trace(scripted_llm) -> None:
+    async def slow_text(_kwargs):
+        await asyncio.sleep(0.05)
+        return llm_response("¿Qué querés saber?")
+
+    scripted_llm([llm_response(calls=[("open_item", {"item_id": "1"})]), slow_text])
+    repo = InMemoryAgentRepository()
+    agent = _agent(repo, [])
+
+    asyncio.run(agent.run("u", "s", "abrí el 1"))
+    assert agent.speculation_stats.wasted == 1
+    assert "__calls" not in _stack(repo)[-1]["view_state"]
+
+
+def test_navigation_discards_the_previous_view_prediction(scripted_llm) -> None:
+    async def slow_nav(_kwargs):
+        # Da tiempo a que termine la lectura especulada del ítem 1
+        await asyncio.sleep(0.05)
+        return llm_response(calls=[("_cancel", {}), ("open_item", {"item_id": "2"}), ("get_item", {})])
+
+    llm = scripted_llm([
+        llm_response(calls=[("open_item", {"item_id": "1"})]),
+        slow_nav,
+        llm_response("listo"),
+    ])
+    repo = InMemoryAgentRepository()
+    reads: List[str] = []
+    agent = _agent(repo, reads)
+
+    asyncio.run(agent.run("u", "s", "mejor el 2"))
+    assert reads == ["1", "2"]
+    tool_results = [m["content"] for m in llm.calls[-1]["messages"] if m["role"] == "tool"]
+    assert '{"item_id": "2"}' in tool_results[-1]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices, Usage
+
+from agentix import Agent, SimpleContextManager, tool_from_fn
+from agentix.models import ToolCall
+from agentix.storage import InMemoryAgentRepository
+from agentix.streaming import ToolCallAccumulator
+
+from fakes import llm_response
+
+
+def _chunk(**delta: Any) -> ModelResponseStream:
+    finish_reason = delta.pop("finish_reason", None)
+    return ModelResponseStream(id="x", model="gpt-3.5-turbo",
+                               choices=[StreamingChoices(index=0, delta=Delta(**delta), finish_reason=finish_reason)])
+
+
+def _tool_stream(calls: List[Tuple[str, Dict[str, Any]]], gap: float = 0.05, fail_after: int = -1):
+    """
+    Stream con las tool calls partidas en dos deltas cada una; con `fail_after` se corta tras esa.
+    """
+    async def stream():
+        for i, (name, args) in enumerate(calls):
+            raw = json.dumps(args)
+            yield _chunk(tool_calls=[{"index": i, "id": f"c{i}", "type": "function",
+                                      "function": {"name": name, "arguments": raw[:5]}}])
+            await asyncio.sleep(gap)
+            yield _chunk(tool_calls=[{"index": i, "function": {"arguments": raw[5:]}}])
+            if i == fail_after:
+                await asyncio.sleep(gap)
+                raise RuntimeError("stream cortado")
+            await asyncio.sleep(gap)
+        yield _chunk(finish_reason="tool_calls")
+        yield ModelResponseStream(id="x", model="gpt-3.5-turbo", choices=[],
+                                  usage=Usage(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+
+    async def reply(kwargs: Dict[str, Any]):
+        assert kwargs.get("stream")
+        return stream()
+    return reply
+
+
+def _text_stream(text: str):
+    async def stream():
+        yield _chunk(content=text)
+        yield _chunk(finish_reason="stop")
+
+    async def reply(kwargs: Dict[str, Any]):
+        return stream() if kwargs.get("stream") else llm_response(text)
+    return reply
+
+
+class _Tools:
+    def __init__(self) -> None:
+        self.log: List[Tuple[str, str, float]] = []
+        self.started = time.monotonic()
+
+    def build(self) -> SimpleContextManager:
+        async def fetch(key: str) -> str:
+            """
+            Lee una clave
+            :param str key: clave
+            """
+            self.log.append(("fetch", key, time.monotonic() - self.started))
+            await asyncio.sleep(0.05)
+            return f"v-{key}"
+
+        async def write(key: str) -> str:
+            """
+            Escribe una clave
+            :param str key: clave
+            """
+            self.log.append(("write", key, time.monotonic() - self.started))
+            await asyncio.sleep(0.05)
+            return f"w-{key}"
+
+        return SimpleContextManager("s", tools=[tool_from_fn(fetch, read_only=True), tool_from_fn(write)])
+
+
+CALLS = [("fetch", {"key": "a"}), ("write", {"key": "b"}), ("fetch", {"key": "c"})]
+
+
+def test_accumulator_emits_each_call_once_complete() -> None:
+    emitted: List[ToolCall] = []
+    accumulator = ToolCallAccumulator(emitted.append)
+    accumulator.feed(_chunk(tool_calls=[{"index": 0, "id": "c0", "type": "function",
+                                         "function": {"name": "fetch", "arguments": '{"key"'}}]))
+    assert emitted == []
+    accumulator.feed(_chunk(tool_calls=[{"index": 0, "function": {"arguments": ': "a"}'}}]))
+    assert [(c.function_name, json.loads(c.arguments)) for c in emitted] == [("fetch", {"key": "a"})]
+    accumulator.feed(_chunk(tool_calls=[{"index": 1, "id": "c1", "type": "function",
+                                         "function": {"name": "write", "arguments": "{}"}}]))
+    assert [c.tool_call_id for c in emitted] == ["c0", "c1"]
+
+
+def test_eager_mode_runs_reads_early_and_keeps_order(scripted_llm) -> None:
+    scripted_llm([_tool_stream(CALLS), _text_stream("listo")])
+    tools = _Tools()
+    repo = InMemoryAgentRepository()
+    agent = Agent("test", repo, tools.build(), eager_tools=True)
+
+    async def main():
+        return await agent.run_detailed("u", "s", "hola", run_id="R1")
+
+    result = asyncio.run(main())
+    assert result.output == "listo"
+    assert [(name, key) for name, key, _ in tools.log] == [("fetch", "a"), ("write", "b"), ("fetch", "c")]
+    # La lectura arrancó con el stream abierto; la escritura, recién con el paso completo
+    stream_end = 3 * 2 * 0.05
+    assert tools.log[0][2] < stream_end <= tools.log[1][2]
+    messages = repo.sessions[("s", "u")]["messages"]
+    assert [(m["role"], m["content"]) for m in messages[1:]] == [
+        ("assistant", None), ("tool", '"v-a"'), ("tool", '"w-b"'), ("tool", '"v-c"'), ("assistant", "listo"),
+    ]
+    # El checkpoint tiene el mensaje del modelo antes que sus resultados
+    assert [m["role"] for m in repo.runs["R1"]["messages"]] == ["user", "assistant", "tool", "tool", "tool", "assistant"]
+
+
+def test_failed_stream_never_runs_writes(scripted_llm) -> None:
+    scripted_llm([_tool_stream(CALLS, fail_after=1)])
+    tools = _Tools()
+    agent = Agent("test", InMemoryAgentRepository(), tools.build(), eager_tools=True)
+
+    async def main() -> None:
+        with pytest.raises(RuntimeError):
+            await agent.run_detailed("u", "s", "hola")
+
+    asyncio.run(main())
+    assert [(name, key) for name, key, _ in tools.log] == [("fetch", "a")]